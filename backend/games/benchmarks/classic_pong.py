@@ -0,0 +1,59 @@
+import time
+from ..engine import ClassicPongBatch, ClassicPongEngine
+
+ROOM_COUNTS = (10, 100, 300, 1000, 5000)
+
+
+def make_engines(count):
+    engines = []
+    for seed in range(count):
+        engine = ClassicPongEngine(seed=seed)
+        engine.state.update(player1='player1', player2='player2', gameStarted=True)
+        engines.append(engine)
+    return engines
+
+
+def make_batch(engines):
+    engine = ClassicPongEngine
+    batch = ClassicPongBatch(
+        engine.GAME_WIDTH, engine.GAME_HEIGHT, engine.PADDLE_WIDTH, engine.PADDLE_HEIGHT,
+        engine.BALL_SIZE, engine.PADDLE_OFFSET, engine.INITIAL_BALL_SPEED,
+        engine.MAX_BALL_SPEED, engine.BALL_SPEEDUP,
+        capacity=len(engines), seed=0
+    )
+    for engine in engines:
+        batch.add(engine.state)
+    batch.running[:] = True
+    return batch
+
+
+def time_scalar(engines, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for engine in engines:
+            engine.update_ball_position()
+            engine.check_scoring()
+    return (time.perf_counter() - started) / iterations
+
+
+def time_batch(batch, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        rows, left_hit, right_hit, scored1, scored2 = batch.step(1)
+        batch.reset_ball(rows[scored1 | scored2])
+    return (time.perf_counter() - started) / iterations
+
+
+def run(iterations=50):
+    results = []
+    for count in ROOM_COUNTS:
+        engines = make_engines(count)
+        batch = make_batch(engines)
+        row = {
+            'rooms': count,
+            'scalar_us': time_scalar(engines, iterations) * 1e6,
+            'batch_us': time_batch(batch, iterations) * 1e6,
+        }
+        row['speedup'] = row['scalar_us'] / row['batch_us']
+        results.append(row)
+    return results
@@ -0,0 +1,67 @@
+import math
+import random
+import time
+from ..engine import SpaceRivalryEngine
+
+ASTEROID_COUNTS = (10, 50, 200, 1000)
+LASER_COUNTS = (4, 20, 100, 400)
+
+
+def populate(engine, asteroids, lasers, seed=0):
+    rng = random.Random(seed)
+    game_state = engine.state
+    for _ in range(asteroids):
+        engine.add_asteroid(
+            game_state,
+            rng.uniform(0, engine.GAME_WIDTH),
+            rng.uniform(0, engine.GAME_HEIGHT),
+            rng.choice(engine.ASTEROID_KINDS)
+        )
+    for player in [1, 2]:
+        for _ in range(lasers // 2):
+            game_state[f'lasers{player}'].add(
+                x=rng.uniform(0, engine.GAME_WIDTH),
+                y=rng.uniform(0, engine.GAME_HEIGHT)
+            )
+    return game_state
+
+
+def make_engine(linear_pairs):
+    # linear_pairs 0 always uses the grid, infinity always the Python scan.
+    engine = SpaceRivalryEngine(seed=0)
+    engine.LINEAR_COLLISION_PAIRS = linear_pairs
+    return engine
+
+
+def time_collisions(engine, game_state, iterations):
+    stores = ['lasers1', 'lasers2', 'asteroids', 'debris', 'powerups', 'explosions']
+    pristine = {key: game_state[key].copy() for key in stores}
+    state = engine.rng.getstate()
+    elapsed = 0.0
+
+    for _ in range(iterations):
+        for key in stores:
+            game_state[key] = pristine[key].copy()
+        engine.rng.setstate(state)
+
+        started = time.perf_counter()
+        engine.check_all_collisions(game_state)
+        elapsed += time.perf_counter() - started
+
+    return elapsed / iterations
+
+
+def run(iterations=50):
+    results = []
+
+    for asteroids in ASTEROID_COUNTS:
+        for lasers in LASER_COUNTS:
+            row = {'asteroids': asteroids, 'lasers': lasers}
+            for name, linear_pairs in [('grid', 0), ('linear', math.inf)]:
+                engine = make_engine(linear_pairs)
+                game_state = populate(engine, asteroids, lasers)
+                row[f'{name}_us'] = time_collisions(engine, game_state, iterations) * 1e6
+            row['speedup'] = row['linear_us'] / row['grid_us']
+            results.append(row)
+
+    return results
@@ -0,0 +1,87 @@
+import time
+from ..matchqueue import MatchQueue
+
+WAITING_COUNTS = (100, 1000, 10000, 50000)
+GAME_TYPE = 'classic_pong'
+
+
+class Player:
+    def __init__(self, username):
+        self.username = username
+        self.scope = {'user': username}
+
+
+class BenchQueue(MatchQueue):
+    _queues = {}
+    _waiting = {}
+    _waits = {}
+
+
+def indexed_round(queue, players, waiting, newcomers):
+    # What the consumer does per connect, leave and match, on MatchQueue.
+    middle = players[waiting // 2]
+    queue.is_waiting(middle.username)
+    queue.cancel(middle.username, middle)
+    queue.enqueue(GAME_TYPE, middle.username, middle)
+    for player in newcomers:
+        queue.enqueue(GAME_TYPE, player.username, player)
+    return queue.pop_pair(GAME_TYPE)
+
+
+def list_round(queues, players, waiting, newcomers):
+    # The same on the previous per-game-type lists.
+    middle = players[waiting // 2]
+    for queue in queues.values():
+        for player in queue:
+            if player.scope['user'] == middle.username:
+                break
+    for queue in queues.values():
+        if middle in queue:
+            queue.remove(middle)
+            break
+    queues[GAME_TYPE].append(middle)
+    queues[GAME_TYPE].extend(newcomers)
+    return queues[GAME_TYPE].pop(0), queues[GAME_TYPE].pop(0)
+
+
+def time_rounds(play, requeue, queue, players, waiting, iterations):
+    elapsed = 0.0
+    for i in range(iterations):
+        newcomers = [Player(f'new{i}a'), Player(f'new{i}b')]
+        started = time.perf_counter()
+        pair = play(queue, players, waiting, newcomers)
+        elapsed += time.perf_counter() - started
+        # The matched players queue again so nobody the rounds use runs out.
+        for player in pair:
+            requeue(queue, player)
+    return elapsed / iterations
+
+
+def requeue_indexed(queue, player):
+    queue.enqueue(GAME_TYPE, player.username, player)
+
+
+def requeue_list(queues, player):
+    queues[GAME_TYPE].append(player)
+
+
+def run(iterations=50):
+    results = []
+    for waiting in WAITING_COUNTS:
+        players = [Player(f'player{i}') for i in range(waiting)]
+
+        BenchQueue._queues, BenchQueue._waiting, BenchQueue._waits = {}, {}, {}
+        for player in players:
+            BenchQueue.enqueue(GAME_TYPE, player.username, player)
+        indexed = time_rounds(indexed_round, requeue_indexed, BenchQueue, players, waiting, iterations)
+
+        queues = {GAME_TYPE: list(players)}
+        linear = time_rounds(list_round, requeue_list, queues, players, waiting, iterations)
+
+        results.append({
+            'waiting': waiting,
+            'indexed_us': indexed * 1e6,
+            'list_us': linear * 1e6,
+            'speedup': linear / indexed if indexed else None,
+        })
+    return results
@@ -0,0 +1,224 @@
+import math
+from ..engine import SpaceRivalryEngine
+
+
+class ReferenceSpaceRivalry(SpaceRivalryEngine):
+    # Space Rivalry as it ran before the NumPy entity stores and the grid:
+    # entities are lists of dicts and every check walks the lists. Kept only
+    # so bench_games can time full ticks against it; it uses the engine's
+    # rng and clock, so a seeded run follows the same rules.
+    def __init__(self, engine):
+        super().__init__(clock=engine.clock, state=to_dicts(engine))
+        self.rng.setstate(engine.rng.getstate())
+
+    def handle_shooting(self, game_state, player_num):
+        current_time = self.clock
+        last_shot_key = f'lastShot{player_num}'
+
+        if current_time - game_state.get(last_shot_key, -math.inf) >= self.get_shooting_cooldown(game_state, player_num):
+            player_pos = game_state[f'player{player_num}Pos']
+            lasers_key = f'lasers{player_num}'
+            effects = game_state[f'activeEffects{player_num}']
+
+            if effects.get('DOUBLE_BULLETS', {}).get('active'):
+                game_state[lasers_key].extend([
+                    {'x': player_pos - 10, 'y': self.GAME_HEIGHT - self.SHIP_HEIGHT - 10},
+                    {'x': player_pos + 10, 'y': self.GAME_HEIGHT - self.SHIP_HEIGHT - 10}
+                ])
+            else:
+                game_state[lasers_key].append({
+                    'x': player_pos,
+                    'y': self.GAME_HEIGHT - self.SHIP_HEIGHT - 10
+                })
+
+            game_state[last_shot_key] = current_time
+
+    def update_lasers(self, game_state):
+        for player in [1, 2]:
+            game_state[f'lasers{player}'] = [
+                {**laser, 'y': laser['y'] - 10}
+                for laser in game_state[f'lasers{player}']
+                if laser['y'] > 0
+            ]
+
+    def update_asteroids(self, game_state, speed_multiplier):
+        game_state['asteroids'] = [
+            {**asteroid, 'y': asteroid['y'] + asteroid['speed'] * speed_multiplier}
+            for asteroid in game_state['asteroids']
+            if asteroid['y'] < self.GAME_HEIGHT + asteroid['size']
+        ]
+
+    def update_powerups(self, game_state):
+        current_time = self.clock
+
+        game_state['powerups'] = [
+            {**powerup, 'y': powerup['y'] + 2}
+            for powerup in game_state['powerups']
+            if powerup['y'] < self.GAME_HEIGHT
+        ]
+
+        for player in [1, 2]:
+            effects_key = f'activeEffects{player}'
+            for powerup_type, effect in game_state[effects_key].items():
+                if effect.get('active') and current_time >= effect.get('endsAt', 0):
+                    game_state[effects_key][powerup_type] = {'active': False}
+
+    def update_debris(self, game_state):
+        game_state['debris'] = [
+            {**debris, 'y': debris['y'] + 3}
+            for debris in game_state['debris']
+            if debris['y'] < self.GAME_HEIGHT
+        ]
+
+    def update_explosions(self, game_state):
+        current_time = self.clock
+        game_state['explosions'] = [
+            explosion for explosion in game_state['explosions']
+            if current_time - explosion['created'] < 500
+        ]
+
+    def check_all_collisions(self, game_state):
+        self.check_laser_collisions(game_state, 1)
+        self.check_laser_collisions(game_state, 2)
+        self.check_ship_collisions(game_state)
+        self.check_powerup_collisions(game_state)
+
+    def check_laser_collisions(self, game_state, player_num):
+        lasers_key = f'lasers{player_num}'
+        new_lasers = []
+
+        for laser in game_state[lasers_key]:
+            hit = False
+            for asteroid in game_state['asteroids'][:]:
+                if self.check_collision(
+                    laser['x'], laser['y'], self.LASER_WIDTH, self.LASER_HEIGHT,
+                    asteroid['x'], asteroid['y'], asteroid['size'], asteroid['size']
+                ):
+                    hit = True
+                    game_state['asteroids'].remove(asteroid)
+
+                    if asteroid['type'] == 'SPLIT':
+                        self.split_asteroid(game_state, asteroid)
+                    elif asteroid['type'] == 'EXPLODING':
+                        self.create_explosion(game_state, asteroid)
+                        self.damage_nearby_asteroids(game_state, asteroid)
+
+                    self.update_score(game_state, player_num, asteroid['points'])
+
+                    if self.rng.random() < 0.2:
+                        self.spawn_powerup(game_state, asteroid)
+
+                    self.create_debris(game_state, asteroid, 3 - player_num)
+                    break
+
+            if not hit:
+                new_lasers.append(laser)
+
+        game_state[lasers_key] = new_lasers
+
+    def check_ship_collisions(self, game_state):
+        for player_num in [1, 2]:
+            if game_state[f'activeEffects{player_num}'].get('SHIELD', {}).get('active'):
+                continue
+
+            ship_pos = game_state[f'player{player_num}Pos']
+
+            for asteroid in game_state['asteroids'][:]:
+                if self.check_collision(
+                    ship_pos, self.GAME_HEIGHT - self.SHIP_HEIGHT, self.SHIP_WIDTH, self.SHIP_HEIGHT,
+                    asteroid['x'], asteroid['y'], asteroid['size'], asteroid['size']
+                ):
+                    game_state[f'health{player_num}'] = max(0, game_state[f'health{player_num}'] - 20)
+                    game_state['asteroids'].remove(asteroid)
+
+            for debris in game_state['debris'][:]:
+                if debris['targetPlayer'] == player_num and self.check_collision(
+                    ship_pos, self.GAME_HEIGHT - self.SHIP_HEIGHT, self.SHIP_WIDTH, self.SHIP_HEIGHT,
+                    debris['x'], debris['y'], self.DEBRIS_SIZE, self.DEBRIS_SIZE
+                ):
+                    game_state[f'health{player_num}'] = max(0, game_state[f'health{player_num}'] - 10)
+                    game_state['debris'].remove(debris)
+
+    def check_powerup_collisions(self, game_state):
+        current_time = self.clock
+
+        for player_num in [1, 2]:
+            ship_pos = game_state[f'player{player_num}Pos']
+
+            for powerup in game_state['powerups'][:]:
+                if self.check_collision(
+                    ship_pos, self.GAME_HEIGHT - self.SHIP_HEIGHT, self.SHIP_WIDTH, self.SHIP_HEIGHT,
+                    powerup['x'], powerup['y'], self.POWERUP_SIZE, self.POWERUP_SIZE
+                ):
+                    effects_key = f'activeEffects{player_num}'
+                    game_state[effects_key][powerup['type']] = {
+                        'active': True,
+                        'endsAt': current_time + self.POWERUPS[powerup['type']]['duration']
+                    }
+                    game_state['powerups'].remove(powerup)
+
+    def check_collision(self, x1, y1, w1, h1, x2, y2, w2, h2):
+        return (
+            abs(x1 - x2) * 2 < (w1 + w2) and
+            abs(y1 - y2) * 2 < (h1 + h2)
+        )
+
+    def add_asteroid(self, game_state, x, y, asteroid_type):
+        game_state['asteroids'].append({
+            'x': x,
+            'y': y,
+            'type': asteroid_type,
+            **self.ASTEROID_TYPES[asteroid_type]
+        })
+
+    def create_explosion(self, game_state, asteroid):
+        game_state['explosions'].append({
+            'x': asteroid['x'],
+            'y': asteroid['y'],
+            'created': self.clock
+        })
+
+    def damage_nearby_asteroids(self, game_state, exploding_asteroid):
+        explosion_radius = 100
+        for asteroid in game_state['asteroids'][:]:
+            dx = asteroid['x'] - exploding_asteroid['x']
+            dy = asteroid['y'] - exploding_asteroid['y']
+            distance = math.sqrt(dx * dx + dy * dy)
+
+            if distance < explosion_radius:
+                game_state['asteroids'].remove(asteroid)
+
+    def spawn_powerup(self, game_state, asteroid):
+        powerup_type = self.rng.choice(self.POWERUP_KINDS)
+        game_state['powerups'].append({
+            'x': asteroid['x'],
+            'y': asteroid['y'],
+            'type': powerup_type,
+            **self.POWERUPS[powerup_type]
+        })
+
+    def create_debris(self, game_state, asteroid, target_player):
+        game_state['debris'].append({
+            'x': asteroid['x'],
+            'y': asteroid['y'],
+            'targetPlayer': target_player
+        })
+
+
+def to_dicts(engine):
+    # The engine's state with every entity store turned into a list of dicts.
+    game_state = dict(engine.state)
+    for player in [1, 2]:
+        game_state[f'lasers{player}'] = engine.state[f'lasers{player}'].to_list(['x', 'y'])
+    game_state['asteroids'] = engine.state['asteroids'].to_list(
+        ['x', 'y'], 'kind', engine.ASTEROID_KINDS, engine.ASTEROID_TYPES
+    )
+    game_state['debris'] = engine.state['debris'].to_list(['x', 'y', 'targetPlayer'])
+    game_state['powerups'] = engine.state['powerups'].to_list(
+        ['x', 'y'], 'kind', engine.POWERUP_KINDS, engine.POWERUPS
+    )
+    game_state['explosions'] = engine.state['explosions'].to_list(['x', 'y', 'created'])
+    for player in [1, 2]:
+        effects_key = f'activeEffects{player}'
+        game_state[effects_key] = {key: dict(value) for key, value in game_state[effects_key].items()}
+    return game_state
@@ -0,0 +1,58 @@
+import json
+import time
+from ..consumers.classic_pong_consumer import ClassicPongConsumer
+from ..consumers.space_rivalry_consumer import SpaceRivalryConsumer
+from ..engine import ClassicPongEngine, SpaceRivalryEngine
+from ..snapshots import quantize
+from .ticks import SPACE_RIVALRY_SCENARIOS, populate
+
+QUANTIZE_SCALE = 10
+
+
+def time_snapshot(build, iterations, fields):
+    # Cost of building the snapshot and of encoding the game_state message
+    # the consumers send, plus its size on the wire, with full-precision and
+    # with quantized coordinates.
+    started = time.perf_counter()
+    for _ in range(iterations):
+        state = build()
+    build_time = (time.perf_counter() - started) / iterations
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        text = json.dumps({'type': 'game_state', 'state': state})
+    encode_time = (time.perf_counter() - started) / iterations
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        quantized = json.dumps({'type': 'game_state', 'state': quantize(state, fields, QUANTIZE_SCALE)})
+    quantized_time = (time.perf_counter() - started) / iterations
+
+    return {
+        'build_us': build_time * 1e6,
+        'encode_us': encode_time * 1e6,
+        'bytes': len(text.encode()),
+        'quantized_encode_us': quantized_time * 1e6,
+        'quantized_bytes': len(quantized.encode()),
+    }
+
+
+def run(iterations=50):
+    engine = ClassicPongEngine(seed=0)
+    engine.state.update(player1='player1', player2='player2', gameStarted=True)
+    results = [{'game': 'classic_pong', **time_snapshot(
+        lambda: engine.state, iterations, ClassicPongConsumer.QUANTIZED_FIELDS
+    )}]
+
+    for asteroids, lasers, debris, effects in SPACE_RIVALRY_SCENARIOS:
+        engine = SpaceRivalryEngine(seed=0)
+        populate(engine, asteroids, lasers, debris, effects)
+        results.append({
+            'game': 'space_rivalry',
+            'asteroids': asteroids,
+            'lasers': lasers,
+            'debris': debris,
+            'effects': effects,
+            **time_snapshot(engine.snapshot, iterations, SpaceRivalryConsumer.QUANTIZED_FIELDS),
+        })
+    return results
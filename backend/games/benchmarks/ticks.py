@@ -0,0 +1,137 @@
+import copy
+import random
+import time
+from ..engine import ClassicPongEngine, SpaceRivalryEngine
+from .classic_pong import make_engines
+from .reference import ReferenceSpaceRivalry
+
+# Space Rivalry scenarios as (asteroids, lasers, debris, effects); effects is
+# the number of power-ups active for each player.
+SPACE_RIVALRY_SCENARIOS = (
+    (10, 4, 0, 0),
+    (50, 20, 10, 1),
+    (200, 100, 40, 2),
+    (500, 200, 100, 4),
+)
+CLASSIC_PONG_ROOMS = (1, 100, 1000)
+
+
+def populate(engine, asteroids, lasers, debris, effects, seed=0):
+    rng = random.Random(seed)
+    game_state = engine.state
+    game_state.update(player1='player1', player2='player2', gameStarted=True)
+    for _ in range(asteroids):
+        engine.add_asteroid(
+            game_state,
+            rng.uniform(0, engine.GAME_WIDTH),
+            rng.uniform(0, engine.GAME_HEIGHT),
+            rng.choice(engine.ASTEROID_KINDS)
+        )
+    for player in [1, 2]:
+        for _ in range(lasers // 2):
+            game_state[f'lasers{player}'].add(
+                x=rng.uniform(0, engine.GAME_WIDTH),
+                y=rng.uniform(0, engine.GAME_HEIGHT)
+            )
+        for powerup_type in engine.POWERUP_KINDS[:effects]:
+            game_state[f'activeEffects{player}'][powerup_type] = {
+                'active': True,
+                'endsAt': engine.clock + 3600 * 1000
+            }
+    for _ in range(debris):
+        game_state['debris'].add(
+            x=rng.uniform(0, engine.GAME_WIDTH),
+            y=rng.uniform(0, engine.GAME_HEIGHT / 2),
+            targetPlayer=rng.choice([1, 2])
+        )
+    return game_state
+
+
+def time_space_rivalry(engine, iterations, ticks=10):
+    # Each sample restores the populated state and runs `ticks` full steps,
+    # so entity counts stay near the scenario instead of drifting away.
+    stores = ['lasers1', 'lasers2', 'asteroids', 'debris', 'powerups', 'explosions']
+    game_state = engine.state
+    pristine = {key: game_state[key].copy() for key in stores}
+    scalars = {key: value for key, value in game_state.items() if key not in pristine}
+    clock, rng_state = engine.clock, engine.rng.getstate()
+    dt = 1 / engine.TICK_RATE
+    elapsed = 0.0
+
+    for _ in range(iterations):
+        for key in stores:
+            game_state[key] = pristine[key].copy()
+        game_state.update({key: dict(value) if isinstance(value, dict) else value for key, value in scalars.items()})
+        engine.clock = clock
+        engine.rng.setstate(rng_state)
+
+        started = time.perf_counter()
+        for _ in range(ticks):
+            engine.step(dt=dt)
+        elapsed += time.perf_counter() - started
+
+    return elapsed / (iterations * ticks)
+
+
+def time_reference(engine, iterations, ticks=10):
+    # time_space_rivalry() for the list-of-dicts reference implementation.
+    reference = ReferenceSpaceRivalry(engine)
+    pristine = copy.deepcopy(reference.state)
+    clock, rng_state = reference.clock, reference.rng.getstate()
+    dt = 1 / reference.TICK_RATE
+    elapsed = 0.0
+
+    for _ in range(iterations):
+        reference.state = copy.deepcopy(pristine)
+        reference.clock = clock
+        reference.rng.setstate(rng_state)
+
+        started = time.perf_counter()
+        for _ in range(ticks):
+            reference.step(dt=dt)
+        elapsed += time.perf_counter() - started
+
+    return elapsed / (iterations * ticks)
+
+
+def time_classic_pong(engines, iterations):
+    dt = 1 / ClassicPongEngine.REFERENCE_RATE
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for engine in engines:
+            engine.step(dt=dt)
+    return (time.perf_counter() - started) / iterations
+
+
+def run(iterations=50):
+    # Everything runs on one core, so ticks/sec is per core: how many room
+    # ticks one worker process could simulate if it did nothing else.
+    # Space Rivalry rows also time the same ticks on the list-of-dicts
+    # implementation the engine replaced (baseline).
+    results = []
+    for rooms in CLASSIC_PONG_ROOMS:
+        tick = time_classic_pong(make_engines(rooms), iterations)
+        results.append({
+            'game': 'classic_pong',
+            'rooms': rooms,
+            'tick_us': tick * 1e6,
+            'room_ticks_per_sec': rooms / tick,
+        })
+
+    for asteroids, lasers, debris, effects in SPACE_RIVALRY_SCENARIOS:
+        engine = SpaceRivalryEngine(seed=0)
+        populate(engine, asteroids, lasers, debris, effects)
+        baseline = time_reference(engine, iterations)
+        tick = time_space_rivalry(engine, iterations)
+        results.append({
+            'game': 'space_rivalry',
+            'asteroids': asteroids,
+            'lasers': lasers,
+            'debris': debris,
+            'effects': effects,
+            'tick_us': tick * 1e6,
+            'room_ticks_per_sec': 1 / tick,
+            'baseline_us': baseline * 1e6,
+            'speedup': baseline / tick,
+        })
+    return results
@@ -0,0 +1,125 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+
+class RoomCheckpoints:
+    # Room state saved to the cache (Redis) so a room survives a worker
+    # restart. Saves are throttled to one per INTERVAL per room and only the
+    # top-level fields that changed since the last save are written; every
+    # FULL_EVERY saves all fields are written again to refresh their TTL.
+    INTERVAL = settings.GAME_CHECKPOINT_INTERVAL
+    TTL = 600
+    FULL_EVERY = 20
+    KEY_PREFIX = 'game_room_checkpoint'
+    SKIP_FIELDS = ('lastUpdate', 'last_update')
+
+    _written = {}
+    _saved_at = {}
+    _saves = {}
+
+    writes_total = 0
+    fields_total = 0
+
+    @classmethod
+    def index_key(cls, room_key):
+        return f'{cls.KEY_PREFIX}:{room_key}'
+
+    @classmethod
+    def field_key(cls, room_key, field):
+        return f'{cls.KEY_PREFIX}:{room_key}:{field}'
+
+    @classmethod
+    def due(cls, room_key, now=None):
+        if cls.INTERVAL <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - cls._saved_at.get(room_key, -cls.INTERVAL) >= cls.INTERVAL
+
+    @classmethod
+    async def save(cls, room_key, state):
+        if not cls.due(room_key):
+            return
+        cls._saved_at[room_key] = time.monotonic()
+
+        saves = cls._saves.get(room_key, 0)
+        full = saves % cls.FULL_EVERY == 0
+        written = cls._written.get(room_key, {})
+        changed = {
+            field: value for field, value in state.items()
+            if field not in cls.SKIP_FIELDS and (full or written.get(field, cls) != value)
+        }
+
+        try:
+            if changed:
+                await cache.aset_many({
+                    cls.field_key(room_key, field): value for field, value in changed.items()
+                }, cls.TTL)
+            if full or any(field not in written for field in changed):
+                await cache.aset(cls.index_key(room_key), list({**written, **changed}), cls.TTL)
+        except Exception as e:
+            print(f"Error checkpointing room {room_key}: {e}")
+            return
+
+        # Copies, so later in-place edits of nested values and entity stores
+        # still count as changes on the next save.
+        cls._written[room_key] = {**written, **{f: cls.copy(v) for f, v in changed.items()}}
+        cls._saves[room_key] = saves + 1
+        cls.writes_total += 1
+        cls.fields_total += len(changed)
+
+    @classmethod
+    def copy(cls, value):
+        if isinstance(value, dict):
+            return {k: cls.copy(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [cls.copy(v) for v in value]
+        if hasattr(value, 'copy'):
+            return value.copy()
+        return value
+
+    @classmethod
+    async def load(cls, room_key):
+        if cls.INTERVAL <= 0:
+            return None
+        try:
+            fields = await cache.aget(cls.index_key(room_key))
+            if not fields:
+                return None
+            values = await cache.aget_many([cls.field_key(room_key, field) for field in fields])
+        except Exception as e:
+            print(f"Error loading checkpoint for room {room_key}: {e}")
+            return None
+
+        state = {}
+        for field in fields:
+            key = cls.field_key(room_key, field)
+            if key not in values:
+                return None
+            state[field] = values[key]
+        return state
+
+    @classmethod
+    async def delete(cls, room_key):
+        fields = list(cls._written.pop(room_key, {}))
+        cls._saved_at.pop(room_key, None)
+        cls._saves.pop(room_key, None)
+        if cls.INTERVAL <= 0:
+            return
+        try:
+            if not fields:
+                fields = await cache.aget(cls.index_key(room_key)) or []
+            await cache.adelete_many(
+                [cls.index_key(room_key)] + [cls.field_key(room_key, field) for field in fields]
+            )
+        except Exception as e:
+            print(f"Error deleting checkpoint for room {room_key}: {e}")
+
+    @classmethod
+    def stats(cls):
+        return {
+            'interval': cls.INTERVAL,
+            'rooms': len(cls._written),
+            'writes': cls.writes_total,
+            'fields_written': cls.fields_total,
+        }
@@ -1,13 +1,23 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
 import asyncio
-import random
-import math
 import time
+import numpy as np
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from ..checkpoint import RoomCheckpoints
+from ..delivery import RoomDelivery
+from ..engine import ClassicPongBatch, ClassicPongEngine
+from ..inputs import InputQueue
 from ..models import Match
+from ..outbox import Outbox, websocket_message
+from ..protocol import JsonProtocol, negotiate
+from ..quality import LinkQuality
+from ..room_directory import RoomDirectory
+from ..scheduler import RoomScheduler
+from ..snapshots import SnapshotFrames, SnapshotStream, SnapshotView
+from ..timestep import FixedTimestep
 from ..utils import PlayersManager, XPManager
 
 class ClassicPongConsumer(AsyncWebsocketConsumer):
@@ -16,16 +26,24 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
     active_connections = {}
     connection_timestamps = {}
     disconnection_cleanup_tasks = {}
-
-    GAME_WIDTH = 800
-    GAME_HEIGHT = 400
-    PADDLE_WIDTH = 15
-    PADDLE_HEIGHT = 80
-    BALL_SIZE = 10
-    PADDLE_SPEED = 11
-    INITIAL_BALL_SPEED = 7
-    MAX_BALL_SPEED = 15
-    BALL_SPEEDUP = 0.2
+    engines = {}
+    input_queues = {}
+
+    PHYSICS_RATE = settings.GAME_PHYSICS_RATE
+    BROADCAST_RATE = settings.GAME_BROADCAST_RATE
+    QUANTIZED_FIELDS = ['paddle1Y', 'paddle2Y', 'ballX', 'ballY', 'ballSpeedX', 'ballSpeedY']
+
+    # In 'batch' mode ball and paddle positions live in one ClassicPongBatch
+    # row per room. Every room applies its inputs in prepare(), then the
+    # first room stepped in the tick advances all of them.
+    ENGINE = settings.GAME_CLASSIC_PONG_ENGINE
+    batch = None
+    batch_rows = {}
+    batch_rooms = {}
+    batch_timestep = None
+    batch_tick = None
+    batch_broadcast_due = False
+    batch_inputs = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -33,10 +51,19 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
         self.game_id = None
         self.username = None
         self.player_num = None
-        self.delta_time = 1/60
         self.reconnection_grace_period = 0
         self.cleanup_ref = False
         self.user = None
+        self.room_key = None
+        self.room_owner = None
+        self.snapshots = None
+        self.snapshot_view = SnapshotView(self.QUANTIZED_FIELDS)
+        self.protocol = JsonProtocol
+        self.outbox = None
+        self.link = None
+        self.timestep = None
+        self.broadcast_due = False
+        self.pending_game_end = None
 
     @database_sync_to_async
     def check_match_status(self):
@@ -84,6 +111,7 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
                 return
 
             self.room_group_name = f'pong_{self.game_id}'
+            self.room_key = f'classic_pong_{self.game_id}'
 
             is_completed = await self.check_match_status()
             if is_completed:
@@ -100,16 +128,31 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
                 self.room_group_name,
                 self.channel_name
             )
-            await self.accept()
-
-            if self.game_id not in self.shared_games:
-                self.initialize_game_state()
-                if self.game_id not in self.game_loops:
-                    self.game_loops[self.game_id] = asyncio.create_task(self.game_loop())
+            RoomDelivery.join(self)
+            self.protocol = negotiate(self.scope)
+            await self.accept(subprotocol=self.protocol.name)
+            self.outbox = Outbox(self)
+            self.outbox.start()
+            self.link = LinkQuality(self, self.BROADCAST_RATE, self.PHYSICS_RATE)
+            self.link.start()
+
+            # Another worker may already run this room; then inputs are
+            # forwarded to it and its snapshots arrive through the group.
+            self.room_owner = await RoomDirectory.claim(self)
+            if self.room_owner is not None:
+                await RoomDirectory.join(self, self.room_owner)
+            if self.room_owner is None and self.game_id not in self.shared_games:
+                # Resume from the last checkpoint if a worker restart lost
+                # the room.
+                checkpoint = await RoomCheckpoints.load(self.room_key)
+                if self.game_id not in self.shared_games:
+                    self.initialize_game_state(checkpoint)
+                    if self.game_id not in self.game_loops:
+                        self.start_game_loop()
 
             if self.active_connections.get(self.game_id, 0) > 0:
-                await self.channel_layer.group_send(
-                    self.room_group_name,
+                await RoomDelivery.group_send(
+                    self, self.room_group_name,
                     {
                         'type': 'player_reconnected',
                         'message': 'Opponent has reconnected'
@@ -125,6 +168,13 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
             if not hasattr(self, 'game_id'):
                 return
 
+            # The socket is gone; events from here on are not for it.
+            RoomDelivery.leave(self)
+            if self.outbox is not None:
+                self.outbox.stop()
+            if self.link is not None:
+                self.link.stop()
+
             disconnect_time = time.time()
             connection_time = self.connection_timestamps.get(self.channel_name, disconnect_time)
             connection_duration = disconnect_time - connection_time
@@ -134,16 +184,21 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
             PlayersManager.remove_player(self.username)
 
             if connection_duration < 1:
+                if self.room_owner is not None:
+                    await RoomDirectory.leave(self, self.room_owner)
                 await self.handle_unstable_connection()
                 return
 
-            cleanup_task = asyncio.create_task(
-                self.delayed_cleanup(self.game_id, self.player_num)
-            )
-            self.disconnection_cleanup_tasks[self.game_id] = cleanup_task
+            if self.room_owner is not None:
+                await RoomDirectory.forward_cleanup(self, self.room_owner, self.player_num)
+            else:
+                cleanup_task = asyncio.create_task(
+                    self.delayed_cleanup(self.game_id, self.player_num)
+                )
+                self.disconnection_cleanup_tasks[self.game_id] = cleanup_task
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await RoomDelivery.group_send(
+                self, self.room_group_name,
                 {
                     'type': 'player_disconnected',
                     'player': self.player_num,
@@ -161,18 +216,25 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
         except Exception:
             pass
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         try:
-            data = json.loads(text_data)
+            data = self.protocol.decode(text_data, bytes_data)
+            if self.link is not None and await self.link.handle(data):
+                return
+            if self.snapshot_view.handle(data):
+                return
+
+            if self.room_owner is not None:
+                await RoomDirectory.forward(self, self.room_owner, text_data, bytes_data)
+                return
             game_state = self.shared_games[self.game_id]
 
             if data['type'] == 'init':
                 await self.handle_init(data, game_state)
+                self.request_snapshot(keyframe=True)
             elif data['type'] == 'player_input':
                 self.handle_player_input(data['input'])
 
-            await self.broadcast_game_state()
-
         except Exception as e:
             print(f"Error in receive: {e}")
             await self.send_error("An error occurred processing your input")
@@ -191,162 +253,200 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
             game_state['gameStarted'] = True
 
     def handle_player_input(self, input_type):
-        game_state = self.shared_games[self.game_id]
-        paddle_key = 'paddle1Y' if self.player_num == 'player1' else 'paddle2Y'
-
-        if input_type == 'up':
-            game_state[paddle_key] = max(
-                0,
-                game_state[paddle_key] - self.PADDLE_SPEED
-            )
-        elif input_type == 'down':
-            game_state[paddle_key] = min(
-                self.GAME_HEIGHT - self.PADDLE_HEIGHT,
-                game_state[paddle_key] + self.PADDLE_SPEED
+        # Applied by the room at its next tick, see step().
+        self.input_queues[self.game_id].push((self.player_num, input_type))
+        RoomScheduler.wake(self.room_key)
+
+    def request_snapshot(self, keyframe=False):
+        room = self.game_loops.get(self.game_id)
+        if room is not None:
+            room.broadcast_due = True
+            if keyframe:
+                # Connections that just joined rebuild the state from it.
+                room.snapshots.keyframe_due = True
+            RoomScheduler.wake(room.room_key)
+
+    def initialize_game_state(self, checkpoint=None):
+        engine = ClassicPongEngine(state=checkpoint)
+        engine.state['lastUpdate'] = time.time()
+        self.engines[self.game_id] = engine
+        self.input_queues[self.game_id] = InputQueue()
+        self.shared_games[self.game_id] = engine.state
+
+    def checkpoint_state(self):
+        return self.shared_games[self.game_id]
+
+    def start_game_loop(self):
+        self.timestep = FixedTimestep(self.PHYSICS_RATE, self.BROADCAST_RATE)
+        self.snapshots = SnapshotStream(self.BROADCAST_RATE)
+        self.game_loops[self.game_id] = self
+        if self.ENGINE == 'batch':
+            self.add_batch_row()
+        RoomScheduler.register(self.room_key, self, parked=True)
+
+    @classmethod
+    def get_batch(cls):
+        if cls.batch is None:
+            engine = ClassicPongEngine
+            cls.batch = ClassicPongBatch(
+                engine.GAME_WIDTH, engine.GAME_HEIGHT, engine.PADDLE_WIDTH, engine.PADDLE_HEIGHT,
+                engine.BALL_SIZE, engine.PADDLE_OFFSET, engine.INITIAL_BALL_SPEED,
+                engine.MAX_BALL_SPEED, engine.BALL_SPEEDUP
             )
+            cls.batch_timestep = FixedTimestep(cls.PHYSICS_RATE, cls.BROADCAST_RATE)
+        return cls.batch
+
+    def add_batch_row(self):
+        row = self.get_batch().add(self.shared_games[self.game_id])
+        self.batch_rows[self.game_id] = row
+        self.batch_rooms[row] = self
+
+    @classmethod
+    def remove_batch_row(cls, game_id):
+        row = cls.batch_rows.pop(game_id, None)
+        if row is not None:
+            cls.batch_rooms.pop(row, None)
+            cls.batch.remove(row)
+
+    def apply_batch_inputs(self, inputs):
+        engine = self.engines[self.game_id]
+        engine.apply_inputs(inputs)
+        row = self.batch_rows[self.game_id]
+        for paddle_key in ['paddle1Y', 'paddle2Y']:
+            self.batch.state[row, ClassicPongBatch.FIELDS.index(paddle_key)] = engine.state[paddle_key]
+
+    def sync_batch_row(self):
+        values = self.batch.read(self.batch_rows[self.game_id])
+        self.shared_games[self.game_id].update(zip(ClassicPongBatch.FIELDS, values))
+
+    @classmethod
+    def step_batch(cls, now):
+        # Every batch room calls this from its own step; only the first call
+        # of a scheduler tick does the work.
+        if cls.batch_tick == now:
+            return cls.batch_broadcast_due
+        cls.batch_tick = now
+        cls.batch_broadcast_due = False
+
+        if not cls.batch.running.any():
+            cls.batch_timestep.pause()
+            return False
 
-    def initialize_game_state(self):
-        self.shared_games[self.game_id] = {
-            'gameStarted': False,
-            'gameOver': False,
-            'player1': None,
-            'player2': None,
-            'paddle1Y': (self.GAME_HEIGHT - self.PADDLE_HEIGHT) / 2,
-            'paddle2Y': (self.GAME_HEIGHT - self.PADDLE_HEIGHT) / 2,
-            'ballX': self.GAME_WIDTH / 2,
-            'ballY': self.GAME_HEIGHT / 2,
-            'ballSpeedX': self.INITIAL_BALL_SPEED * (1 if random.random() > 0.5 else -1),
-            'ballSpeedY': self.INITIAL_BALL_SPEED * (random.random() * 2 - 1),
-            'score1': 0,
-            'score2': 0,
-            'lastUpdate': time.time(),
-            'winner': None,
-            'forfeit': False,
-            'combo1': 0,
-            'combo2': 0
-        }
-
-    async def game_loop(self):
-        try:
-            while True:
-                if self.game_id in self.shared_games:
-                    game_state = self.shared_games[self.game_id]
-                    current_time = time.time()
-                    dt = current_time - game_state['lastUpdate']
-
-                    if game_state['gameStarted'] and not game_state['gameOver']:
-                        self.update_game_state(dt)
-                        game_state['lastUpdate'] = current_time
-                        await self.check_scoring()
-                        await self.broadcast_game_state()
-
-                await asyncio.sleep(self.delta_time)
-
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            print(f"Error in game loop: {e}")
-
-    def update_game_state(self, dt):
-        game_state = self.shared_games[self.game_id]
-        self.update_ball_position()
-        self.check_collisions()
-
-    def update_ball_position(self):
-        game_state = self.shared_games[self.game_id]
-
-        next_x = game_state['ballX'] + game_state['ballSpeedX']
-        next_y = game_state['ballY'] + game_state['ballSpeedY']
-
-        if next_y - self.BALL_SIZE/2 <= 0:
-            next_y = self.BALL_SIZE/2
-            game_state['ballSpeedY'] = abs(game_state['ballSpeedY'])
-        elif next_y + self.BALL_SIZE/2 >= self.GAME_HEIGHT:
-            next_y = self.GAME_HEIGHT - self.BALL_SIZE/2
-            game_state['ballSpeedY'] = -abs(game_state['ballSpeedY'])
-
-        game_state['ballX'] = next_x
-        game_state['ballY'] = next_y
-
-    def check_collisions(self):
-        game_state = self.shared_games[self.game_id]
-
-        ball_left = game_state['ballX'] - self.BALL_SIZE/2
-        ball_right = game_state['ballX'] + self.BALL_SIZE/2
-        ball_top = game_state['ballY'] - self.BALL_SIZE/2
-        ball_bottom = game_state['ballY'] + self.BALL_SIZE/2
-
-        left_paddle_x = 50
-        if (ball_left <= left_paddle_x + self.PADDLE_WIDTH and
-            ball_right >= left_paddle_x and
-            ball_top <= game_state['paddle1Y'] + self.PADDLE_HEIGHT and
-            ball_bottom >= game_state['paddle1Y'] and
-            game_state['ballSpeedX'] < 0):
-
-            game_state['ballX'] = left_paddle_x + self.PADDLE_WIDTH + self.BALL_SIZE/2
-            self.handle_paddle_hit(game_state, game_state['paddle1Y'], True)
-            game_state['combo1'] += 1
-            game_state['combo2'] = 0
-
-        right_paddle_x = self.GAME_WIDTH - 50 - self.PADDLE_WIDTH
-        if (ball_right >= right_paddle_x and
-            ball_left <= right_paddle_x + self.PADDLE_WIDTH and
-            ball_top <= game_state['paddle2Y'] + self.PADDLE_HEIGHT and
-            ball_bottom >= game_state['paddle2Y'] and
-            game_state['ballSpeedX'] > 0):
-
-            game_state['ballX'] = right_paddle_x - self.BALL_SIZE/2
-            self.handle_paddle_hit(game_state, game_state['paddle2Y'], False)
-            game_state['combo2'] += 1
-            game_state['combo1'] = 0
-
-    def handle_paddle_hit(self, game_state, paddle_y, is_left_paddle):
-        relative_hit = (game_state['ballY'] - (paddle_y + self.PADDLE_HEIGHT/2)) / (self.PADDLE_HEIGHT/2)
-        relative_hit = max(-1, min(1, relative_hit))
-
-        max_angle = 5 * math.pi / 12
-        angle = relative_hit * max_angle
-
-        current_speed = math.sqrt(game_state['ballSpeedX']**2 + game_state['ballSpeedY']**2)
-        new_speed = min(current_speed + self.BALL_SPEEDUP, self.MAX_BALL_SPEED)
-        new_speed *= 1 + random.uniform(-0.1, 0.1)
-
-        direction = 1 if is_left_paddle else -1
-        game_state['ballSpeedX'] = direction * abs(new_speed * math.cos(angle))
-
-        y_direction = 1 if game_state['ballSpeedY'] > 0 else -1
-        game_state['ballSpeedY'] = y_direction * abs(new_speed * math.sin(angle))
-        game_state['ballSpeedY'] *= 1 + random.uniform(-0.1, 0.1)
-
-    async def check_scoring(self):
-        game_state = self.shared_games[self.game_id]
-
-        scored = False
-        if game_state['ballX'] <= 0:
-            game_state['score2'] += 1
-            game_state['combo2'] = 0
-            scored = True
-        elif game_state['ballX'] >= self.GAME_WIDTH:
-            game_state['score1'] += 1
-            game_state['combo1'] = 0
-            scored = True
-
-        if scored:
-            if game_state['score1'] >= 11 or game_state['score2'] >= 11:
-                winner = game_state['player1'] if game_state['score1'] > game_state['score2'] else game_state['player2']
-                game_state['winner'] = winner
-                game_state['gameOver'] = True
-                await self.update_match_record(game_state)
-                await self.broadcast_game_end(winner)
+        steps, broadcast_due = cls.batch_timestep.advance(now)
+        scale = cls.batch_timestep.step_dt * ClassicPongEngine.REFERENCE_RATE
+        for _ in range(steps):
+            rows, left_hit, right_hit, scored1, scored2 = cls.batch.step(scale)
+            events = np.flatnonzero(left_hit | right_hit | scored1 | scored2)
+            for i in events.tolist():
+                room = cls.batch_rooms[int(rows[i])]
+                room.apply_batch_events(left_hit[i], right_hit[i], scored1[i], scored2[i])
+
+        if broadcast_due:
+            rows = np.flatnonzero(cls.batch.running)
+            for row, values in zip(rows.tolist(), cls.batch.read(rows)):
+                game_state = cls.shared_games.get(cls.batch_rooms[row].game_id)
+                if game_state is not None:
+                    game_state.update(zip(ClassicPongBatch.FIELDS, values))
+        cls.batch_broadcast_due = broadcast_due
+        return broadcast_due
+
+    def apply_batch_events(self, left_hit, right_hit, scored1, scored2):
+        engine = self.engines[self.game_id]
+        row = self.batch_rows[self.game_id]
+        if left_hit:
+            engine.register_hit('player1')
+        if right_hit:
+            engine.register_hit('player2')
+
+        if scored1 or scored2:
+            if engine.score_point('player1' if scored1 else 'player2'):
+                self.batch.running[row] = False
+                self.sync_batch_row()
+                self.pending_game_end = engine.state['winner']
+                self.broadcast_due = True
             else:
-                self.reset_ball()
+                self.batch.reset_ball(row)
+
+    def current_tick(self):
+        if self.game_id in self.batch_rows:
+            return self.batch_timestep.steps
+        return self.timestep.steps
+
+    def park(self):
+        # Nothing to simulate until an input or init wakes the room again.
+        self.timestep.pause()
+        RoomScheduler.park(self.room_key)
+
+    def prepare(self, now):
+        # Batch rooms only: runs for every room before any room steps, so the
+        # shared batch step sees this tick's paddles and running flags.
+        if self.game_id not in self.batch_rows or self.game_id not in self.shared_games:
+            return
+        inputs = self.input_queues[self.game_id].drain()
+        self.apply_batch_inputs(inputs)
+        self.batch.running[self.batch_rows[self.game_id]] = self.engines[self.game_id].running
+        self.batch_inputs = bool(inputs)
+
+    def step(self, now):
+        game_state = self.shared_games.get(self.game_id)
+        if game_state is None:
+            return
+
+        engine = self.engines[self.game_id]
+        running = engine.running
+
+        if self.game_id in self.batch_rows:
+            if running and self.step_batch(now):
+                self.broadcast_due = True
+            elif self.batch_inputs:
+                self.broadcast_due = True
+            self.batch_inputs = False
+            if running:
+                game_state['lastUpdate'] = time.time()
+            else:
+                self.park()
+            return
+
+        # Inputs queued since the last tick are applied together here, and
+        # the room publishes at most one snapshot for them.
+        inputs = self.input_queues[self.game_id].drain()
+        if not running:
+            engine.apply_inputs(inputs)
+            if inputs:
+                self.broadcast_due = True
+            self.park()
+            return
+
+        steps, broadcast_due = self.timestep.advance(now)
+        if not steps:
+            engine.apply_inputs(inputs)
+        for step in range(steps):
+            engine.step(inputs if step == 0 else (), dt=self.timestep.step_dt)
+            if game_state['gameOver']:
+                self.pending_game_end = game_state['winner']
+                break
+        game_state['lastUpdate'] = time.time()
+
+        if broadcast_due or game_state['gameOver']:
+            self.broadcast_due = True
+
+    async def publish(self):
+        if self.game_id not in self.shared_games:
+            return
+
+        if self.pending_game_end:
+            winner = self.pending_game_end
+            self.pending_game_end = None
+            await self.update_match_record(self.shared_games[self.game_id])
+            await self.broadcast_game_end(winner)
+            await RoomCheckpoints.delete(self.room_key)
+
+        if self.broadcast_due:
+            self.broadcast_due = False
+            await self.broadcast_game_state()
 
-    def reset_ball(self):
-        game_state = self.shared_games[self.game_id]
-        game_state['ballX'] = self.GAME_WIDTH / 2
-        game_state['ballY'] = self.GAME_HEIGHT / 2
-        game_state['ballSpeedX'] = self.INITIAL_BALL_SPEED * (1 if random.random() > 0.5 else -1)
-        game_state['ballSpeedY'] = self.INITIAL_BALL_SPEED * (random.random() * 2 - 1)
+        if self.engines[self.game_id].running and RoomCheckpoints.due(self.room_key):
+            await RoomCheckpoints.save(self.room_key, self.checkpoint_state())
 
     async def delayed_cleanup(self, game_id, player_number):
         try:
@@ -370,8 +470,8 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
 
                     await self.update_match_record(game_state)
 
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
+                    await RoomDelivery.group_send(
+                        self, self.room_group_name,
                         {
                             'type': 'game_ended_by_forfeit',
                             'state': game_state,
@@ -380,8 +480,15 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
                     )
 
                 if game_id in self.game_loops:
-                    self.game_loops[game_id].cancel()
-                    del self.game_loops[game_id]
+                    room = self.game_loops.pop(game_id)
+                    RoomScheduler.unregister(room.room_key)
+                    if room.snapshots is not None:
+                        SnapshotFrames.discard(room.snapshots.id)
+                await RoomDirectory.release(self.room_key)
+                await RoomCheckpoints.delete(self.room_key)
+                self.remove_batch_row(game_id)
+                self.engines.pop(game_id, None)
+                self.input_queues.pop(game_id, None)
 
                 if game_id in self.shared_games:
                     del self.shared_games[game_id]
@@ -394,19 +501,24 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             print(f"Error in delayed cleanup for game {game_id}: {e}")
 
+    def snapshot_state(self, game_state):
+        # 'lastUpdate' changes every tick and no client reads it; leaving it out
+        # keeps it out of every delta.
+        return {key: value for key, value in game_state.items() if key != 'lastUpdate'}
+
     async def broadcast_game_state(self):
         if self.game_id in self.shared_games:
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await RoomDelivery.group_send(
+                self, self.room_group_name,
                 {
                     'type': 'game_state_update',
-                    'state': self.shared_games[self.game_id]
+                    **self.snapshots.event(self.snapshot_state(self.shared_games[self.game_id]), self.current_tick())
                 }
             )
 
     async def broadcast_game_end(self, winner):
-        await self.channel_layer.group_send(
-            self.room_group_name,
+        await RoomDelivery.group_send(
+            self, self.room_group_name,
             {
                 'type': 'game_ended',
                 'winner': winner,
@@ -415,54 +527,76 @@ class ClassicPongConsumer(AsyncWebsocketConsumer):
         )
 
     async def handle_unstable_connection(self):
-        await self.channel_layer.group_send(
-            self.room_group_name,
+        await RoomDelivery.group_send(
+            self, self.room_group_name,
             {
                 'type': 'connection_warning',
                 'message': 'Unstable connection detected. Please check your internet connection.'
             }
         )
 
+    async def send_message(self, message):
+        await self.send_frame(self.protocol.encode(message))
+
+    async def send_frame(self, frame, snapshot=False, seq=None):
+        # Proxies for connections on other workers have no outbox; what they
+        # send is relayed to the real connection right away.
+        if self.outbox is None:
+            await self.send(**frame)
+        elif snapshot:
+            self.outbox.put_snapshot(websocket_message(**frame), seq)
+        else:
+            self.outbox.put(websocket_message(**frame))
+
+    async def room_relay(self, event):
+        # Sent on behalf of this connection by the worker that owns the room.
+        if self.outbox is None:
+            await self.base_send(event['message'])
+        else:
+            self.outbox.put(event['message'])
+
     async def send_error(self, message):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'error',
             'message': message
-        }))
+        })
 
     async def game_state_update(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'game_state',
-            'state': event['state']
-        }))
+        if self.link is not None and not await self.link.admit(event):
+            self.snapshot_view.update(event)
+            return
+        frame = self.snapshot_view.frame(event, self.protocol)
+        if frame is not None:
+            await self.send_frame(frame, snapshot=True, seq=event.get('seq'))
 
     async def game_ended(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'game_ended',
             'winner': event['winner'],
             'state': event['state']
-        }))
+        })
 
     async def game_ended_by_forfeit(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'game_ended_by_forfeit',
             'state': event['state'],
             'message': event['message']
-        }))
+        })
 
     async def connection_warning(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'connection_warning',
             'message': event['message']
-        }))
+        })
 
     async def player_disconnected(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'player_disconnected',
             'message': event['message']
-        }))
+        })
 
     async def player_reconnected(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'player_reconnected',
             'message': event['message']
-        }))
+        })
@@ -1,11 +1,11 @@
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import sync_to_async
 from django.contrib.auth import get_user_model
+from ..matchqueue import MatchQueue
 from ..models import Match
 from ..utils import PlayersManager
 
 class MatchmakingConsumer(AsyncJsonWebsocketConsumer):
-    matchmaking_queues = {}
     player_to_user = {}
 
     # @database_sync_to_async
@@ -20,11 +20,9 @@ class MatchmakingConsumer(AsyncJsonWebsocketConsumer):
                 await self.close()
                 return
 
-            for queue in self.matchmaking_queues.values():
-                for player in queue:
-                    if player.scope['user'] == user:
-                        await self.close()
-                        return
+            if MatchQueue.is_waiting(user.username):
+                await self.close()
+                return
 
             # ingame_status = await self.get_user_ingame(user)
             print(f"players: {PlayersManager._players}")
@@ -45,10 +43,8 @@ class MatchmakingConsumer(AsyncJsonWebsocketConsumer):
 
     async def disconnect(self, code):
         try:
-            for queue in self.matchmaking_queues.values():
-                if self in queue:
-                    queue.remove(self)
-                    break
+            if self.user is not None:
+                MatchQueue.cancel(self.user.username, self)
         except Exception:
             pass
 
@@ -63,15 +59,11 @@ class MatchmakingConsumer(AsyncJsonWebsocketConsumer):
                     })
                     return
 
-                if game_type not in self.matchmaking_queues:
-                    self.matchmaking_queues[game_type] = []
-
-                self.matchmaking_queues[game_type].append(self)
-
-                if len(self.matchmaking_queues[game_type]) >= 2:
+                MatchQueue.enqueue(game_type, self.scope['user'].username, self)
 
-                    player1 = self.matchmaking_queues[game_type].pop(0)
-                    player2 = self.matchmaking_queues[game_type].pop(0)
+                pair = MatchQueue.pop_pair(game_type)
+                if pair is not None:
+                    player1, player2 = pair
 
                     match = await sync_to_async(self.create_match)(
                         player1,
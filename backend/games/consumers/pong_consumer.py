@@ -1,10 +1,20 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
 import asyncio
 import time
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from ..delivery import RoomDelivery
+from ..engine import Pong3DEngine
+from ..inputs import InputQueue
 from ..models import Match
+from ..outbox import Outbox, websocket_message
+from ..protocol import JsonProtocol, negotiate
+from ..quality import LinkQuality
+from ..room_directory import RoomDirectory
+from ..scheduler import RoomScheduler
+from ..snapshots import SnapshotFrames, SnapshotStream, SnapshotView
+from ..timestep import FixedTimestep
 from ..utils import PlayersManager, XPManager
 from django.utils import timezone
 
@@ -19,6 +29,14 @@ class PongConsumer(AsyncWebsocketConsumer):
     active_connections = {}
     connection_timestamps = {}
     disconnection_cleanup_tasks = {}
+    input_queues = {}
+    engines = {}
+
+    TICK_RATE = 60
+    BROADCAST_RATE = settings.GAME_BROADCAST_RATE
+    PHYSICS = settings.GAME_PONG3D_PHYSICS
+    CLIENT_PHYSICS_MESSAGES = ['ball_position', 'score_update', 'game_won', 'match_complete']
+    QUANTIZED_FIELDS = ['ball_position', 'ball_velocity', 'paddle1_position', 'paddle2_position']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -26,8 +44,17 @@ class PongConsumer(AsyncWebsocketConsumer):
         self.player_number = None
         self.game_id = None
         self.username = None
-        self.delta_time = 1/60
         self.reconnection_grace_period = 0
+        self.room_key = None
+        self.room_owner = None
+        self.snapshots = None
+        self.snapshot_view = SnapshotView(self.QUANTIZED_FIELDS)
+        self.protocol = JsonProtocol
+        self.outbox = None
+        self.link = None
+        self.timestep = None
+        self.broadcast_due = False
+        self.pending_match_result = None
 
     @database_sync_to_async
     def check_match_status(self):
@@ -66,6 +93,7 @@ class PongConsumer(AsyncWebsocketConsumer):
                 return
 
             self.room_group_name = f'pong_{self.game_id}'
+            self.room_key = f'pong3d_{self.game_id}'
 
             is_completed = await self.check_match_status()
             if is_completed:
@@ -82,16 +110,27 @@ class PongConsumer(AsyncWebsocketConsumer):
                 self.room_group_name,
                 self.channel_name
             )
-            await self.accept()
-
-            if self.game_id not in self.shared_games:
+            RoomDelivery.join(self)
+            self.protocol = negotiate(self.scope)
+            await self.accept(subprotocol=self.protocol.name)
+            self.outbox = Outbox(self)
+            self.outbox.start()
+            self.link = LinkQuality(self, self.BROADCAST_RATE, self.TICK_RATE)
+            self.link.start()
+
+            # Another worker may already run this room; then inputs are
+            # forwarded to it and its snapshots arrive through the group.
+            self.room_owner = await RoomDirectory.claim(self)
+            if self.room_owner is not None:
+                await RoomDirectory.join(self, self.room_owner)
+            if self.room_owner is None and self.game_id not in self.shared_games:
                 self.initialize_game_state()
                 if self.game_id not in self.game_loops:
-                    self.game_loops[self.game_id] = asyncio.create_task(self.game_loop())
+                    self.start_game_loop()
 
             if self.active_connections.get(self.game_id, 0) > 0:
-                await self.channel_layer.group_send(
-                    self.room_group_name,
+                await RoomDelivery.group_send(
+                    self, self.room_group_name,
                     {
                         'type': 'player_reconnected',
                         'message': 'Opponent has reconnected'
@@ -107,6 +146,13 @@ class PongConsumer(AsyncWebsocketConsumer):
             if not hasattr(self, 'game_id'):
                 return
 
+            # The socket is gone; events from here on are not for it.
+            RoomDelivery.leave(self)
+            if self.outbox is not None:
+                self.outbox.stop()
+            if self.link is not None:
+                self.link.stop()
+
             disconnect_time = time.time()
             connection_time = self.connection_timestamps.get(self.channel_name, disconnect_time)
             connection_duration = disconnect_time - connection_time
@@ -115,16 +161,21 @@ class PongConsumer(AsyncWebsocketConsumer):
 
             PlayersManager.remove_player(self.username)
             if connection_duration < 1:
+                if self.room_owner is not None:
+                    await RoomDirectory.leave(self, self.room_owner)
                 await self.handle_unstable_connection()
                 return
 
-            cleanup_task = asyncio.create_task(
-                self.delayed_cleanup(self.game_id, self.player_number)
-            )
-            self.disconnection_cleanup_tasks[self.game_id] = cleanup_task
+            if self.room_owner is not None:
+                await RoomDirectory.forward_cleanup(self, self.room_owner, self.player_number)
+            else:
+                cleanup_task = asyncio.create_task(
+                    self.delayed_cleanup(self.game_id, self.player_number)
+                )
+                self.disconnection_cleanup_tasks[self.game_id] = cleanup_task
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await RoomDelivery.group_send(
+                self, self.room_group_name,
                 {
                     'type': 'player_disconnected',
                     'player': self.player_number,
@@ -168,8 +219,8 @@ class PongConsumer(AsyncWebsocketConsumer):
                         'forfeit': True
                     })
 
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
+                    await RoomDelivery.group_send(
+                        self, self.room_group_name,
                         {
                             'type': 'game_ended_by_forfeit',
                             'state': game_state,
@@ -178,11 +229,16 @@ class PongConsumer(AsyncWebsocketConsumer):
                     )
 
                 if game_id in self.game_loops:
-                    self.game_loops[game_id].cancel()
-                    del self.game_loops[game_id]
+                    room = self.game_loops.pop(game_id)
+                    RoomScheduler.unregister(room.room_key)
+                    if room.snapshots is not None:
+                        SnapshotFrames.discard(room.snapshots.id)
+                await RoomDirectory.release(self.room_key)
 
                 if game_id in self.shared_games:
                     del self.shared_games[game_id]
+                self.input_queues.pop(game_id, None)
+                self.engines.pop(game_id, None)
 
                 if game_id in self.active_connections:
                     del self.active_connections[game_id]
@@ -193,8 +249,8 @@ class PongConsumer(AsyncWebsocketConsumer):
             print(f"Error in delayed cleanup for game {game_id}: {e}")
 
     async def handle_unstable_connection(self):
-        await self.channel_layer.group_send(
-            self.room_group_name,
+        await RoomDelivery.group_send(
+            self, self.room_group_name,
             {
                 'type': 'connection_warning',
                 'message': 'Unstable connection detected. Please check your internet connection.'
@@ -225,23 +281,28 @@ class PongConsumer(AsyncWebsocketConsumer):
             'rounds_won': {'player1': 0, 'player2': 0},
             'winner': None,
             'game_started': False,
-            'last_update': time.time()
+            'last_update': time.time(),
+            'physics': self.PHYSICS
         }
+        self.input_queues[self.game_id] = InputQueue()
+        if self.PHYSICS == 'server':
+            self.engines[self.game_id] = Pong3DEngine(self.shared_games[self.game_id])
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         try:
-            data = json.loads(text_data)
+            data = self.protocol.decode(text_data, bytes_data)
+            if self.link is not None and await self.link.handle(data):
+                return
+            if self.snapshot_view.handle(data):
+                return
 
-            if data['type'] == 'ping':
-                await self.send(text_data=json.dumps({
-                    'type': 'pong',
-                    'timestamp': time.time()
-                }))
+            if self.room_owner is not None:
+                await RoomDirectory.forward(self, self.room_owner, text_data, bytes_data)
                 return
 
             if data['type'] == 'client_disconnect':
-                await self.channel_layer.group_send(
-                    self.room_group_name,
+                await RoomDelivery.group_send(
+                    self, self.room_group_name,
                     {
                         'type': 'player_disconnected',
                         'player': self.player_number,
@@ -251,12 +312,30 @@ class PongConsumer(AsyncWebsocketConsumer):
                 await self.close()
                 return
 
+            # Positions are queued (latest wins) and applied at the next
+            # tick; the rest changes state right away. Either way the change
+            # goes out with the room's next snapshot.
+            if self.game_id in self.engines and data['type'] in self.CLIENT_PHYSICS_MESSAGES:
+                # The server owns the ball, score and match result.
+                return
+
+            if data['type'] == 'mouse_move':
+                self.input_queues[self.game_id].push(
+                    ('mouse_move', self.player_number, data['mouse_position']),
+                    key=('mouse_move', self.player_number)
+                )
+                RoomScheduler.wake(self.room_key)
+                return
+            elif data['type'] == 'ball_position':
+                self.input_queues[self.game_id].push(
+                    ('ball_position', self.player_number, data['ball_position']),
+                    key='ball_position'
+                )
+                RoomScheduler.wake(self.room_key)
+                return
+
             if data['type'] == 'init':
                 await self.handle_init(data)
-            elif data['type'] == 'mouse_move':
-                self.update_paddle_position(data)
-            elif data['type'] == 'ball_position':
-                self.update_ball_position(data)
             elif data['type'] == 'score_update':
                 await self.handle_score_update(data)
             elif data['type'] == 'game_won':
@@ -264,7 +343,7 @@ class PongConsumer(AsyncWebsocketConsumer):
             elif data['type'] == 'match_complete':
                 await self.handle_match_complete(data)
 
-            await self.broadcast_game_state()
+            self.request_snapshot(keyframe=data['type'] == 'init')
 
         except Exception as e:
             print(f"Error in receive: {e}")
@@ -284,22 +363,37 @@ class PongConsumer(AsyncWebsocketConsumer):
                 self.shared_games[self.game_id]['player2']]):
             self.shared_games[self.game_id]['game_started'] = True
 
-    def update_paddle_position(self, data):
-        if self.player_number == 'player1':
+    def request_snapshot(self, keyframe=False):
+        room = self.game_loops.get(self.game_id)
+        if room is not None:
+            room.broadcast_due = True
+            if keyframe:
+                # Connections that just joined rebuild the state from it.
+                room.snapshots.keyframe_due = True
+            RoomScheduler.wake(room.room_key)
+
+    def apply_input(self, input_type, player_number, value):
+        if input_type == 'mouse_move':
+            self.update_paddle_position(player_number, value)
+        elif input_type == 'ball_position':
+            self.update_ball_position(value)
+
+    def update_paddle_position(self, player_number, mouse_position):
+        if player_number == 'player1':
             self.shared_games[self.game_id]['paddle1_position'].update({
-                'x': 5.5 * data['mouse_position']['x'],
-                'z': 11 - abs(data['mouse_position']['x'] * 2),
-                'y': 5.03 + data['mouse_position']['y'] * 2
+                'x': 5.5 * mouse_position['x'],
+                'z': 11 - abs(mouse_position['x'] * 2),
+                'y': 5.03 + mouse_position['y'] * 2
             })
-        elif self.player_number == 'player2':
+        elif player_number == 'player2':
             self.shared_games[self.game_id]['paddle2_position'].update({
-                'x': -5.5 * data['mouse_position']['x'],
-                'z': -11 + abs(data['mouse_position']['x'] * 2),
-                'y': 5.03 + data['mouse_position']['y'] * 2
+                'x': -5.5 * mouse_position['x'],
+                'z': -11 + abs(mouse_position['x'] * 2),
+                'y': 5.03 + mouse_position['y'] * 2
             })
 
-    def update_ball_position(self, data):
-        self.shared_games[self.game_id]['ball_position'].update(data['ball_position'])
+    def update_ball_position(self, ball_position):
+        self.shared_games[self.game_id]['ball_position'].update(ball_position)
 
     async def handle_score_update(self, data):
         game_state = self.shared_games[self.game_id]
@@ -329,24 +423,80 @@ class PongConsumer(AsyncWebsocketConsumer):
         game_state['scores'] = {'player1': 0, 'player2': 0}
         game_state['rounds_won'] = {'player1': 0, 'player2': 0}
 
-    async def game_loop(self):
-        try:
-            while True:
-                if self.game_id in self.shared_games:
-                    game_state = self.shared_games[self.game_id]
-                    current_time = time.time()
-                    dt = current_time - game_state['last_update']
-
-                    if game_state['game_started'] and not game_state.get('winner'):
-                        game_state['last_update'] = current_time
-                        await self.broadcast_game_state()
-
-                await asyncio.sleep(self.delta_time)
-
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            print(f"Error in game loop: {e}")
+    def start_game_loop(self):
+        self.timestep = FixedTimestep(self.TICK_RATE, self.BROADCAST_RATE)
+        self.snapshots = SnapshotStream(self.BROADCAST_RATE)
+        self.game_loops[self.game_id] = self
+        RoomScheduler.register(self.room_key, self, parked=True)
+
+    def park(self):
+        # Nothing to simulate until an input or init wakes the room again.
+        self.timestep.pause()
+        RoomScheduler.park(self.room_key)
+
+    def step(self, now):
+        game_state = self.shared_games.get(self.game_id)
+        if game_state is None:
+            return
+
+        inputs = self.input_queues[self.game_id].drain()
+        if self.game_id in self.engines:
+            self.step_engine(self.engines[self.game_id], inputs, now)
+            return
+
+        for input_type, player_number, value in inputs:
+            self.apply_input(input_type, player_number, value)
+
+        if not game_state['game_started'] or game_state.get('winner'):
+            if inputs:
+                self.broadcast_due = True
+            self.park()
+            return
+
+        steps, broadcast_due = self.timestep.advance(now)
+        game_state['last_update'] = time.time()
+        if broadcast_due:
+            self.broadcast_due = True
+
+    def step_engine(self, engine, inputs, now):
+        game_state = engine.state
+        paddle_inputs = [
+            (player_number, value)
+            for input_type, player_number, value in inputs
+            if input_type == 'mouse_move'
+        ]
+
+        if not engine.running:
+            engine.apply_inputs(paddle_inputs)
+            if inputs:
+                self.broadcast_due = True
+            self.park()
+            return
+
+        steps, broadcast_due = self.timestep.advance(now)
+        if not steps:
+            engine.apply_inputs(paddle_inputs)
+        for step in range(steps):
+            engine.step(paddle_inputs if step == 0 else (), dt=self.timestep.step_dt)
+            if engine.match_result:
+                self.pending_match_result = engine.match_result
+                engine.match_result = None
+                broadcast_due = True
+                break
+        game_state['last_update'] = time.time()
+
+        if broadcast_due:
+            self.broadcast_due = True
+
+    async def publish(self):
+        if self.pending_match_result:
+            result = self.pending_match_result
+            self.pending_match_result = None
+            await self.update_match_record(result)
+
+        if self.broadcast_due:
+            self.broadcast_due = False
+            await self.broadcast_game_state()
 
     @database_sync_to_async
     def update_match_record(self, data):
@@ -373,53 +523,80 @@ class PongConsumer(AsyncWebsocketConsumer):
         game_state = self.shared_games[self.game_id]
         return game_state['player1'] if player_number == 'player1' else game_state['player2']
 
+    def snapshot_state(self, game_state):
+        # 'last_update' changes every tick and no client reads it; leaving it out
+        # keeps it out of every delta.
+        return {key: value for key, value in game_state.items() if key != 'last_update'}
+
     async def broadcast_game_state(self):
         if self.game_id in self.shared_games:
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await RoomDelivery.group_send(
+                self, self.room_group_name,
                 {
                     'type': 'send_game_state',
-                    'state': self.shared_games[self.game_id]
+                    **self.snapshots.event(self.snapshot_state(self.shared_games[self.game_id]), self.timestep.steps)
                 }
             )
 
     async def send_game_state(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'game_state',
-            'state': event['state']
-        }))
+        if self.link is not None and not await self.link.admit(event):
+            self.snapshot_view.update(event)
+            return
+        frame = self.snapshot_view.frame(event, self.protocol)
+        if frame is not None:
+            await self.send_frame(frame, snapshot=True, seq=event.get('seq'))
 
     async def player_disconnected(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'player_disconnected',
             'message': event['message']
-        }))
+        })
 
     async def player_reconnected(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'player_reconnected',
             'message': event['message']
-        }))
+        })
 
     async def connection_warning(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'connection_warning',
             'message': event['message']
-        }))
+        })
 
     async def game_ended_by_forfeit(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'game_ended_by_forfeit',
             'state': event['state'],
             'message': event['message']
-        }))
+        })
+
+    async def send_message(self, message):
+        await self.send_frame(self.protocol.encode(message))
+
+    async def send_frame(self, frame, snapshot=False, seq=None):
+        # Proxies for connections on other workers have no outbox; what they
+        # send is relayed to the real connection right away.
+        if self.outbox is None:
+            await self.send(**frame)
+        elif snapshot:
+            self.outbox.put_snapshot(websocket_message(**frame), seq)
+        else:
+            self.outbox.put(websocket_message(**frame))
+
+    async def room_relay(self, event):
+        # Sent on behalf of this connection by the worker that owns the room.
+        if self.outbox is None:
+            await self.base_send(event['message'])
+        else:
+            self.outbox.put(event['message'])
 
     async def send_error(self, message):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'error',
             'message': message,
             'timestamp': time.time()
-        }))
+        })
 
     @database_sync_to_async
     def get_user_by_username(self, username):
@@ -464,8 +641,8 @@ class PongConsumer(AsyncWebsocketConsumer):
         game_state['connection_warning'] = False
         game_state['last_activity'] = time.time()
 
-        await self.channel_layer.group_send(
-            self.room_group_name,
+        await RoomDelivery.group_send(
+            self, self.room_group_name,
             {
                 'type': 'player_reconnected',
                 'message': f"{self.username} has reconnected",
@@ -1,12 +1,22 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
 import asyncio
-import random
-import math
 import time
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from ..checkpoint import RoomCheckpoints
+from ..delivery import RoomDelivery
+from ..engine import SpaceRivalryEngine
+from ..inputs import InputQueue
 from ..models import Match
+from ..outbox import Outbox, websocket_message
+from ..protocol import JsonProtocol, negotiate
+from ..quality import LinkQuality
+from ..pool import PhysicsPool, step_space_rivalry
+from ..room_directory import RoomDirectory
+from ..scheduler import RoomScheduler
+from ..snapshots import SnapshotFrames, SnapshotStream, SnapshotView
+from ..timestep import FixedTimestep
 from ..utils import PlayersManager, XPManager
 from django.utils import timezone
 
@@ -17,30 +27,12 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
     connection_timestamps = {}
     disconnection_cleanup_tasks = {}
 
-    GAME_WIDTH = 800
-    GAME_HEIGHT = 600
-    SHIP_WIDTH = 40
-    SHIP_HEIGHT = 30
-    LASER_WIDTH = 4
-    LASER_HEIGHT = 15
-    ASTEROID_SIZE = 30
-    DEBRIS_SIZE = 20
-    POWERUP_SIZE = 25
-    MOVEMENT_SPEED = 10
-
-    POWERUPS = {
-        'RAPID_FIRE': {'duration': 5000, 'color': 'yellow'},
-        'SHIELD': {'duration': 8000, 'color': 'cyan'},
-        'DOUBLE_BULLETS': {'duration': 6000, 'color': 'magenta'},
-        'SLOW_MOTION': {'duration': 4000, 'color': 'lime'}
-    }
-
-    ASTEROID_TYPES = {
-        'NORMAL': {'speed': 3, 'size': ASTEROID_SIZE, 'health': 1, 'points': 100},
-        'FAST': {'speed': 5, 'size': ASTEROID_SIZE * 0.7, 'health': 1, 'points': 150},
-        'SPLIT': {'speed': 2, 'size': ASTEROID_SIZE * 1.2, 'health': 1, 'points': 200},
-        'EXPLODING': {'speed': 2, 'size': ASTEROID_SIZE * 1.3, 'health': 1, 'points': 300}
-    }
+    engines = {}
+    input_queues = {}
+
+    TICK_RATE = SpaceRivalryEngine.TICK_RATE
+    BROADCAST_RATE = settings.GAME_BROADCAST_RATE
+    QUANTIZED_FIELDS = ['player1Pos', 'player2Pos', 'x', 'y']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -49,7 +41,17 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
         self.username = None
         self.player_num = None
         self.reconnection_grace_period = 0
-        self.delta_time = 1/60
+        self.room_key = None
+        self.room_owner = None
+        self.snapshots = None
+        self.snapshot_view = SnapshotView(self.QUANTIZED_FIELDS, self.player_view)
+        self.protocol = JsonProtocol
+        self.outbox = None
+        self.link = None
+        self.timestep = None
+        self.broadcast_due = False
+        self.pending_game_end = None
+        self.pending_step = None
 
     @database_sync_to_async
     def check_match_status(self):
@@ -84,6 +86,7 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
                 return
 
             self.room_group_name = f'space_rivalry_{self.game_id}'
+            self.room_key = self.room_group_name
 
             is_completed = await self.check_match_status()
             if is_completed:
@@ -100,16 +103,31 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
                 self.room_group_name,
                 self.channel_name
             )
-            await self.accept()
-
-            if self.game_id not in self.shared_games:
-                self.initialize_game_state()
-                if self.game_id not in self.game_loops:
-                    self.game_loops[self.game_id] = asyncio.create_task(self.game_loop())
+            RoomDelivery.join(self)
+            self.protocol = negotiate(self.scope)
+            await self.accept(subprotocol=self.protocol.name)
+            self.outbox = Outbox(self)
+            self.outbox.start()
+            self.link = LinkQuality(self, self.BROADCAST_RATE, self.TICK_RATE)
+            self.link.start()
+
+            # Another worker may already run this room; then inputs are
+            # forwarded to it and its snapshots arrive through the group.
+            self.room_owner = await RoomDirectory.claim(self)
+            if self.room_owner is not None:
+                await RoomDirectory.join(self, self.room_owner)
+            if self.room_owner is None and self.game_id not in self.shared_games:
+                # Resume from the last checkpoint if a worker restart lost
+                # the room.
+                checkpoint = await RoomCheckpoints.load(self.room_key)
+                if self.game_id not in self.shared_games:
+                    self.initialize_game_state(checkpoint)
+                    if self.game_id not in self.game_loops:
+                        self.start_game_loop()
 
             if self.active_connections.get(self.game_id, 0) > 0:
-                await self.channel_layer.group_send(
-                    self.room_group_name,
+                await RoomDelivery.group_send(
+                    self, self.room_group_name,
                     {
                         'type': 'player_reconnected',
                         'message': 'Opponent has reconnected'
@@ -141,21 +159,27 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
 
                     await self.update_match_record(game_state)
 
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
+                    await RoomDelivery.group_send(
+                        self, self.room_group_name,
                         {
                             'type': 'game_ended_by_forfeit',
-                            'state': game_state,
+                            'state': self.snapshot_state(game_state),
                             'message': f'Game ended due to player disconnection. {game_state[winning_player]} wins by forfeit.'
                         }
                     )
 
                 if game_id in self.game_loops:
-                    self.game_loops[game_id].cancel()
-                    del self.game_loops[game_id]
+                    room = self.game_loops.pop(game_id)
+                    RoomScheduler.unregister(room.room_key)
+                    if room.snapshots is not None:
+                        SnapshotFrames.discard(room.snapshots.id)
+                await RoomDirectory.release(self.room_key)
+                await RoomCheckpoints.delete(self.room_key)
 
                 if game_id in self.shared_games:
                     del self.shared_games[game_id]
+                self.engines.pop(game_id, None)
+                self.input_queues.pop(game_id, None)
 
                 if game_id in self.active_connections:
                     del self.active_connections[game_id]
@@ -170,6 +194,13 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
             if not hasattr(self, 'game_id'):
                 return
 
+            # The socket is gone; events from here on are not for it.
+            RoomDelivery.leave(self)
+            if self.outbox is not None:
+                self.outbox.stop()
+            if self.link is not None:
+                self.link.stop()
+
             disconnect_time = time.time()
             connection_time = self.connection_timestamps.get(self.channel_name, disconnect_time)
             connection_duration = disconnect_time - connection_time
@@ -181,16 +212,21 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
             PlayersManager.remove_player(self.username)
             print(f"players: {PlayersManager._players}")
             if connection_duration < 1:
+                if self.room_owner is not None:
+                    await RoomDirectory.leave(self, self.room_owner)
                 await self.handle_unstable_connection()
                 return
 
-            cleanup_task = asyncio.create_task(
-                self.delayed_cleanup(self.game_id, self.player_num)
-            )
-            self.disconnection_cleanup_tasks[self.game_id] = cleanup_task
+            if self.room_owner is not None:
+                await RoomDirectory.forward_cleanup(self, self.room_owner, self.player_num)
+            else:
+                cleanup_task = asyncio.create_task(
+                    self.delayed_cleanup(self.game_id, self.player_num)
+                )
+                self.disconnection_cleanup_tasks[self.game_id] = cleanup_task
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await RoomDelivery.group_send(
+                self, self.room_group_name,
                 {
                     'type': 'player_disconnected',
                     'player': self.player_num,
@@ -208,9 +244,17 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
         except Exception:
             pass
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         try:
-            data = json.loads(text_data)
+            data = self.protocol.decode(text_data, bytes_data)
+            if self.link is not None and await self.link.handle(data):
+                return
+            if self.snapshot_view.handle(data):
+                return
+
+            if self.room_owner is not None:
+                await RoomDirectory.forward(self, self.room_owner, text_data, bytes_data)
+                return
             game_state = self.shared_games[self.game_id]
 
             if data['type'] == 'init':
@@ -225,26 +269,25 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
 
                 if game_state['player1'] and game_state['player2']:
                     game_state['gameStarted'] = True
+                self.request_snapshot(keyframe=True)
 
             elif data['type'] == 'player_input':
                 self.handle_player_input(data['input'])
 
-            await self.broadcast_game_state()
-
         except Exception as e:
             print(f"Error in receive: {e}")
             await self.send_error("An error occurred processing your input")
 
     async def game_ended_by_forfeit(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'game_ended_by_forfeit',
             'state': event['state'],
             'message': event['message']
-        }))
+        })
 
     async def handle_unstable_connection(self):
-        await self.channel_layer.group_send(
-            self.room_group_name,
+        await RoomDelivery.group_send(
+            self, self.room_group_name,
             {
                 'type': 'connection_warning',
                 'message': 'Unstable connection detected. Please check your internet connection.'
@@ -252,333 +295,156 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
         )
 
     def handle_player_input(self, input_type):
-        game_state = self.shared_games[self.game_id]
-        player_pos_key = f'player{self.player_num[-1]}Pos'
-
-        if input_type == 'left':
-            current_pos = game_state[player_pos_key]
-            min_pos = self.SHIP_WIDTH/2 if self.player_num == 'player1' else self.GAME_WIDTH/2 + self.SHIP_WIDTH/2
-            game_state[player_pos_key] = max(min_pos, current_pos - self.MOVEMENT_SPEED)
-
-        elif input_type == 'right':
-            current_pos = game_state[player_pos_key]
-            max_pos = self.GAME_WIDTH/2 - self.SHIP_WIDTH/2 if self.player_num == 'player1' else self.GAME_WIDTH - self.SHIP_WIDTH/2
-            game_state[player_pos_key] = min(max_pos, current_pos + self.MOVEMENT_SPEED)
-
-        elif input_type == 'shoot':
-            self.handle_shooting(game_state)
-
-    def handle_shooting(self, game_state):
-        player_num = int(self.player_num[-1])
-        current_time = time.time() * 1000
-        last_shot_key = f'lastShot{player_num}'
-
-        if current_time - game_state.get(last_shot_key, 0) >= self.get_shooting_cooldown(game_state, player_num):
-            player_pos = game_state[f'player{player_num}Pos']
-            lasers_key = f'lasers{player_num}'
-            effects = game_state[f'activeEffects{player_num}']
-
-            if effects.get('DOUBLE_BULLETS', {}).get('active'):
-                game_state[lasers_key].extend([
-                    {'x': player_pos - 10, 'y': self.GAME_HEIGHT - self.SHIP_HEIGHT - 10},
-                    {'x': player_pos + 10, 'y': self.GAME_HEIGHT - self.SHIP_HEIGHT - 10}
-                ])
-            else:
-                game_state[lasers_key].append({
-                    'x': player_pos,
-                    'y': self.GAME_HEIGHT - self.SHIP_HEIGHT - 10
-                })
-
-            game_state[last_shot_key] = current_time
-
-    def get_shooting_cooldown(self, game_state, player_num):
-        effects = game_state[f'activeEffects{player_num}']
-        return 250 if effects.get('RAPID_FIRE', {}).get('active') else 500
-
-    async def game_loop(self):
-        try:
-            while True:
-                if self.game_id in self.shared_games:
-                    game_state = self.shared_games[self.game_id]
-                    current_time = time.time()
-                    dt = current_time - game_state['lastUpdate']
-
-                    if game_state['gameStarted'] and not game_state['gameOver']:
-                        self.update_game_state(dt)
-                        game_state['lastUpdate'] = current_time
-                        await self.check_game_over()
-                        await self.broadcast_game_state()
-
-                await asyncio.sleep(self.delta_time)
-
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            print(f"Error in game loop: {e}")
-
-    def initialize_game_state(self):
-        self.shared_games[self.game_id] = {
-            'gameStarted': False,
-            'gameOver': False,
-            'player1': None,
-            'player2': None,
-            'player1Pos': self.GAME_WIDTH / 4,
-            'player2Pos': 3 * self.GAME_WIDTH / 4,
-            'health1': 75,
-            'health2': 75,
-            'score1': 0,
-            'score2': 0,
-            'lasers1': [],
-            'lasers2': [],
-            'asteroids': [],
-            'debris': [],
-            'powerups': [],
-            'explosions': [],
-            'activeEffects1': {},
-            'activeEffects2': {},
-            'combo1': 0,
-            'combo2': 0,
-            'wave': 1,
-            'difficulty': 1,
-            'lastUpdate': time.time(),
-            'winner': None,
-            'forfeit': False
-        }
-
-    def update_game_state(self, dt):
-        game_state = self.shared_games[self.game_id]
-
-        self.update_lasers(game_state)
-
-        slow_motion = any(
-            game_state[f'activeEffects{i}'].get('SLOW_MOTION', {}).get('active')
-            for i in [1, 2]
-        )
-        speed_multiplier = 0.5 if slow_motion else 1
-
-        self.update_asteroids(game_state, speed_multiplier)
-
-        self.update_powerups(game_state)
-
-        self.update_debris(game_state)
-
-        self.update_explosions(game_state)
-
-        self.check_all_collisions(game_state)
-
-        game_state['difficulty'] = min(game_state['difficulty'] + 0.1 * dt / 30, 10)
-
-        if random.random() < 0.02 * game_state['difficulty']:
-            self.spawn_asteroid(game_state)
-
-    def update_lasers(self, game_state):
-        for player in [1, 2]:
-            game_state[f'lasers{player}'] = [
-                {**laser, 'y': laser['y'] - 10}
-                for laser in game_state[f'lasers{player}']
-                if laser['y'] > 0
-            ]
-
-    def update_asteroids(self, game_state, speed_multiplier):
-        game_state['asteroids'] = [
-            {**asteroid, 'y': asteroid['y'] + asteroid['speed'] * speed_multiplier}
-            for asteroid in game_state['asteroids']
-            if asteroid['y'] < self.GAME_HEIGHT + asteroid['size']
-        ]
-
-    def update_powerups(self, game_state):
-        current_time = time.time() * 1000
-
-        game_state['powerups'] = [
-            {**powerup, 'y': powerup['y'] + 2}
-            for powerup in game_state['powerups']
-            if powerup['y'] < self.GAME_HEIGHT
-        ]
-
-        for player in [1, 2]:
-            effects_key = f'activeEffects{player}'
-            for powerup_type, effect in game_state[effects_key].items():
-                if effect.get('active') and current_time >= effect.get('endsAt', 0):
-                    game_state[effects_key][powerup_type] = {'active': False}
-
-    def update_debris(self, game_state):
-        game_state['debris'] = [
-            {**debris, 'y': debris['y'] + 3}
-            for debris in game_state['debris']
-            if debris['y'] < self.GAME_HEIGHT
-        ]
-
-    def update_explosions(self, game_state):
-        current_time = time.time() * 1000
-        game_state['explosions'] = [
-            explosion for explosion in game_state['explosions']
-            if current_time - explosion['created'] < 500
-        ]
-
-    def check_all_collisions(self, game_state):
-
-        self.check_laser_collisions(game_state, 1)
-        self.check_laser_collisions(game_state, 2)
-
-        self.check_ship_collisions(game_state)
-
-        self.check_powerup_collisions(game_state)
-
-    def check_laser_collisions(self, game_state, player_num):
-        lasers_key = f'lasers{player_num}'
-        new_lasers = []
-        current_time = time.time() * 1000
-
-        for laser in game_state[lasers_key]:
-            hit = False
-            for asteroid in game_state['asteroids'][:]:
-                if self.check_collision(
-                    laser['x'], laser['y'], self.LASER_WIDTH, self.LASER_HEIGHT,
-                    asteroid['x'], asteroid['y'], asteroid['size'], asteroid['size']
-                ):
-                    hit = True
-                    game_state['asteroids'].remove(asteroid)
-
-                    if asteroid['type'] == 'SPLIT':
-                        self.split_asteroid(game_state, asteroid)
-                    elif asteroid['type'] == 'EXPLODING':
-                        self.create_explosion(game_state, asteroid)
-                        self.damage_nearby_asteroids(game_state, asteroid)
-
-                    self.update_score(game_state, player_num, asteroid['points'])
-
-                    if random.random() < 0.2:
-                        self.spawn_powerup(game_state, asteroid)
-
-                    self.create_debris(game_state, asteroid, 3 - player_num)
-                    break
-
-            if not hit:
-                new_lasers.append(laser)
-
-        game_state[lasers_key] = new_lasers
-
-    def check_ship_collisions(self, game_state):
-        for player_num in [1, 2]:
-            if game_state[f'activeEffects{player_num}'].get('SHIELD', {}).get('active'):
-                continue
-
-            ship_pos = game_state[f'player{player_num}Pos']
-
-            for asteroid in game_state['asteroids'][:]:
-                if self.check_collision(
-                    ship_pos, self.GAME_HEIGHT - self.SHIP_HEIGHT, self.SHIP_WIDTH, self.SHIP_HEIGHT,
-                    asteroid['x'], asteroid['y'], asteroid['size'], asteroid['size']
-                ):
-                    game_state[f'health{player_num}'] = max(0, game_state[f'health{player_num}'] - 20)
-                    game_state['asteroids'].remove(asteroid)
-
-            for debris in game_state['debris'][:]:
-                if debris['targetPlayer'] == player_num and self.check_collision(
-                    ship_pos, self.GAME_HEIGHT - self.SHIP_HEIGHT, self.SHIP_WIDTH, self.SHIP_HEIGHT,
-                    debris['x'], debris['y'], self.DEBRIS_SIZE, self.DEBRIS_SIZE
-                ):
-                    game_state[f'health{player_num}'] = max(0, game_state[f'health{player_num}'] - 10)
-                    game_state['debris'].remove(debris)
-
-    def check_powerup_collisions(self, game_state):
-        current_time = time.time() * 1000
-
-        for player_num in [1, 2]:
-            ship_pos = game_state[f'player{player_num}Pos']
-
-            for powerup in game_state['powerups'][:]:
-                if self.check_collision(
-                    ship_pos, self.GAME_HEIGHT - self.SHIP_HEIGHT, self.SHIP_WIDTH, self.SHIP_HEIGHT,
-                    powerup['x'], powerup['y'], self.POWERUP_SIZE, self.POWERUP_SIZE
-                ):
-                    # Activate power-up
-                    effects_key = f'activeEffects{player_num}'
-                    game_state[effects_key][powerup['type']] = {
-                        'active': True,
-                        'endsAt': current_time + self.POWERUPS[powerup['type']]['duration']
-                    }
-                    game_state['powerups'].remove(powerup)
-
-    def check_collision(self, x1, y1, w1, h1, x2, y2, w2, h2):
-        return (
-            abs(x1 - x2) * 2 < (w1 + w2) and
-            abs(y1 - y2) * 2 < (h1 + h2)
+        # Applied by the room at its next tick, see step().
+        self.input_queues[self.game_id].push((self.player_num, input_type))
+        RoomScheduler.wake(self.room_key)
+
+    def request_snapshot(self, keyframe=False):
+        room = self.game_loops.get(self.game_id)
+        if room is not None:
+            room.broadcast_due = True
+            if keyframe:
+                # Connections that just joined rebuild the state from it.
+                room.snapshots.keyframe_due = True
+            RoomScheduler.wake(room.room_key)
+
+    def start_game_loop(self):
+        self.timestep = FixedTimestep(self.TICK_RATE, self.BROADCAST_RATE)
+        self.snapshots = SnapshotStream(self.BROADCAST_RATE)
+        self.game_loops[self.game_id] = self
+        RoomScheduler.register(self.room_key, self, parked=True)
+
+    def park(self):
+        # Nothing to simulate until an input or init wakes the room again.
+        self.timestep.pause()
+        RoomScheduler.park(self.room_key)
+
+    def step(self, now):
+        game_state = self.shared_games.get(self.game_id)
+        if game_state is None:
+            return
+
+        if self.pending_step is not None:
+            # The pool still has the previous step; time and inputs keep
+            # accumulating until it comes back.
+            return
+
+        # Inputs queued since the last tick are applied together here, and
+        # the room publishes at most one snapshot for them.
+        engine = self.engines[self.game_id]
+        inputs = self.input_queues[self.game_id].drain()
+
+        if not engine.running:
+            engine.apply_inputs(inputs)
+            if inputs:
+                self.broadcast_due = True
+            self.park()
+            return
+
+        steps, broadcast_due = self.timestep.advance(now)
+        if not steps:
+            engine.apply_inputs(inputs)
+        elif PhysicsPool.enabled():
+            self.submit_step(engine, inputs, steps, broadcast_due)
+            return
+        for step in range(steps):
+            engine.step(inputs if step == 0 else (), dt=self.timestep.step_dt)
+            if game_state['gameOver']:
+                self.pending_game_end = game_state['winner']
+                break
+        game_state['lastUpdate'] = time.time()
+
+        if broadcast_due or game_state['gameOver']:
+            self.broadcast_due = True
+
+    def submit_step(self, engine, inputs, steps, broadcast_due):
+        # The state is pickled on the executor's thread, hence the copy. The
+        # pool gets a seed drawn from the room's rng, so a seeded room still
+        # replays the same way.
+        future = PhysicsPool.submit(
+            step_space_rivalry,
+            dict(engine.state),
+            engine.clock,
+            engine.rng.getrandbits(32),
+            inputs,
+            steps,
+            self.timestep.step_dt
         )
+        self.pending_step = future
+        future.add_done_callback(lambda f: self.finish_step(f, broadcast_due))
+
+    def finish_step(self, future, broadcast_due):
+        self.pending_step = None
+        engine = self.engines.get(self.game_id)
+        result = PhysicsPool.result(future)
+        if engine is None or result is None:
+            return
+
+        state, clock = result
+        game_state = engine.state
+        if game_state['gameOver']:
+            # Ended here (forfeit) while the step was in the pool.
+            return
+
+        # Update in place: shared_games holds this same dict.
+        game_state.update(state)
+        engine.clock = clock
+        game_state['lastUpdate'] = time.time()
+
+        if game_state['gameOver']:
+            self.pending_game_end = game_state['winner']
+        if broadcast_due or game_state['gameOver']:
+            self.broadcast_due = True
+
+    async def publish(self):
+        if self.game_id not in self.shared_games:
+            return
+
+        if self.pending_game_end:
+            winner = self.pending_game_end
+            self.pending_game_end = None
+            await self.update_match_record(self.shared_games[self.game_id])
+            await self.broadcast_game_end(winner)
+            await RoomCheckpoints.delete(self.room_key)
 
-    def update_score(self, game_state, player_num, points):
-        combo_key = f'combo{player_num}'
-        score_key = f'score{player_num}'
-
-        game_state[combo_key] += 1
-        combo_multiplier = 1 + game_state[combo_key] // 5
-        game_state[score_key] += points * combo_multiplier
-
-        game_state[f'lastHit{player_num}'] = time.time() * 1000
-
-    def spawn_asteroid(self, game_state):
-        asteroid_type = random.choice(list(self.ASTEROID_TYPES.keys()))
-        asteroid_data = self.ASTEROID_TYPES[asteroid_type]
-
-        game_state['asteroids'].append({
-            'x': random.uniform(0, self.GAME_WIDTH),
-            'y': -asteroid_data['size'],
-            'type': asteroid_type,
-            **asteroid_data
-        })
-
-    def split_asteroid(self, game_state, asteroid):
-        for offset in [-20, 20]:
-            game_state['asteroids'].append({
-                'x': asteroid['x'] + offset,
-                'y': asteroid['y'],
-                'type': 'NORMAL',
-                **self.ASTEROID_TYPES['NORMAL']
-            })
-
-    def create_explosion(self, game_state, asteroid):
-        game_state['explosions'].append({
-            'x': asteroid['x'],
-            'y': asteroid['y'],
-            'created': time.time() * 1000
-        })
-
-    def damage_nearby_asteroids(self, game_state, exploding_asteroid):
-        explosion_radius = 100
-        for asteroid in game_state['asteroids'][:]:
-            dx = asteroid['x'] - exploding_asteroid['x']
-            dy = asteroid['y'] - exploding_asteroid['y']
-            distance = math.sqrt(dx * dx + dy * dy)
-
-            if distance < explosion_radius:
-                game_state['asteroids'].remove(asteroid)
-
-    def spawn_powerup(self, game_state, asteroid):
-        powerup_type = random.choice(list(self.POWERUPS.keys()))
-        game_state['powerups'].append({
-            'x': asteroid['x'],
-            'y': asteroid['y'],
-            'type': powerup_type,
-            **self.POWERUPS[powerup_type]
-        })
-
-    def create_debris(self, game_state, asteroid, target_player):
-        game_state['debris'].append({
-            'x': asteroid['x'],
-            'y': asteroid['y'],
-            'targetPlayer': target_player
-        })
-
-    async def check_game_over(self):
-        game_state = self.shared_games[self.game_id]
-
-        if game_state['health1'] <= 0 or game_state['health2'] <= 0:
-            game_state['gameOver'] = True
-            winner = game_state['player2'] if game_state['health1'] <= 0 else game_state['player1']
-            game_state['winner'] = winner
+        if self.broadcast_due:
+            self.broadcast_due = False
+            await self.broadcast_game_state()
 
-            await self.update_match_record(game_state)
-            await self.broadcast_game_end(winner)
+        if self.engines[self.game_id].running and RoomCheckpoints.due(self.room_key):
+            await RoomCheckpoints.save(self.room_key, self.checkpoint_state())
+
+    def initialize_game_state(self, checkpoint=None):
+        clock = time.time() * 1000
+        if checkpoint is not None:
+            # Effect and spawn times in the state are on the engine clock.
+            clock = checkpoint.pop('engineClock', clock)
+        engine = SpaceRivalryEngine(clock=clock, state=checkpoint)
+        engine.state['lastUpdate'] = time.time()
+        self.engines[self.game_id] = engine
+        self.input_queues[self.game_id] = InputQueue()
+        self.shared_games[self.game_id] = engine.state
+
+    def checkpoint_state(self):
+        engine = self.engines[self.game_id]
+        return dict(engine.state, engineClock=engine.clock)
+
+    def snapshot_state(self, game_state):
+        return self.engines[self.game_id].snapshot()
+
+    @classmethod
+    def player_view(cls, state, viewer):
+        # A player sees whether the opponent's power-ups are active, not
+        # their timers.
+        if viewer is None:
+            return state
+        opponent = 'activeEffects2' if viewer == 'player1' else 'activeEffects1'
+        view = dict(state)
+        view[opponent] = {
+            name: {'active': effect.get('active', False)}
+            for name, effect in state[opponent].items()
+        }
+        return view
 
     @database_sync_to_async
     def update_match_record(self, game_state):
@@ -602,52 +468,76 @@ class SpaceRivalryConsumer(AsyncWebsocketConsumer):
             print(f"Error updating match record: {e}")
 
     async def broadcast_game_end(self, winner):
-        await self.channel_layer.group_send(
-            self.room_group_name,
+        await RoomDelivery.group_send(
+            self, self.room_group_name,
             {
                 'type': 'game_ended',
                 'winner': winner,
-                'state': self.shared_games[self.game_id]
+                'state': self.snapshot_state(self.shared_games[self.game_id])
             }
         )
 
     async def broadcast_game_state(self):
         if self.game_id in self.shared_games:
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await RoomDelivery.group_send(
+                self, self.room_group_name,
                 {
                     'type': 'game_state_update',
-                    'state': self.shared_games[self.game_id]
+                    **self.snapshots.event(
+                        self.snapshot_state(self.shared_games[self.game_id]), self.timestep.steps
+                    )
                 }
             )
 
     async def game_state_update(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'game_state',
-            'state': event['state']
-        }))
+        if self.link is not None and not await self.link.admit(event):
+            self.snapshot_view.update(event)
+            return
+        frame = self.snapshot_view.frame(event, self.protocol)
+        if frame is not None:
+            await self.send_frame(frame, snapshot=True, seq=event.get('seq'))
 
     async def player_disconnected(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'player_disconnected',
             'message': event['message']
-        }))
+        })
 
     async def player_reconnected(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'player_reconnected',
             'message': event['message']
-        }))
+        })
 
     async def game_ended(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'game_ended',
             'winner': event['winner'],
             'state': event['state']
-        }))
+        })
+
+    async def send_message(self, message):
+        await self.send_frame(self.protocol.encode(message))
+
+    async def send_frame(self, frame, snapshot=False, seq=None):
+        # Proxies for connections on other workers have no outbox; what they
+        # send is relayed to the real connection right away.
+        if self.outbox is None:
+            await self.send(**frame)
+        elif snapshot:
+            self.outbox.put_snapshot(websocket_message(**frame), seq)
+        else:
+            self.outbox.put(websocket_message(**frame))
+
+    async def room_relay(self, event):
+        # Sent on behalf of this connection by the worker that owns the room.
+        if self.outbox is None:
+            await self.base_send(event['message'])
+        else:
+            self.outbox.put(event['message'])
 
     async def send_error(self, message):
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'error',
             'message': message
-        }))
+        })
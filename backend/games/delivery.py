@@ -0,0 +1,53 @@
+from channels.consumer import get_handler_name
+from .room_directory import RoomDirectory
+
+
+class RoomDelivery:
+    # Group sends for game rooms. When every member of a room's group is a
+    # consumer of this worker, the event is handed to their handlers
+    # directly instead of making a round trip through the channel layer
+    # (Redis). Otherwise, e.g. when the room runs on another worker or has
+    # proxied connections from one, it goes through group_send as before.
+    _members = {}
+    local_total = 0
+    remote_total = 0
+
+    @classmethod
+    def join(cls, consumer):
+        cls._members.setdefault(consumer.room_group_name, set()).add(consumer)
+
+    @classmethod
+    def leave(cls, consumer):
+        members = cls._members.get(consumer.room_group_name)
+        if members is not None:
+            members.discard(consumer)
+            if not members:
+                del cls._members[consumer.room_group_name]
+
+    @classmethod
+    async def group_send(cls, consumer, group, event):
+        members = cls._members.get(group)
+        if not members or not RoomDirectory.is_local(consumer.room_key):
+            cls.remote_total += 1
+            await consumer.channel_layer.group_send(group, event)
+            return
+
+        cls.local_total += 1
+        for member in list(members):
+            handler = getattr(member, get_handler_name(event), None)
+            if handler is None:
+                continue
+            try:
+                await handler(event)
+            except Exception as e:
+                print(f"Error delivering {event['type']} to {member.channel_name}: {e}")
+
+    @classmethod
+    def stats(cls):
+        total = cls.local_total + cls.remote_total
+        return {
+            'groups': len(cls._members),
+            'local': cls.local_total,
+            'remote': cls.remote_total,
+            'local_fraction': cls.local_total / total if total else None,
+        }
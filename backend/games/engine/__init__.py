@@ -0,0 +1,8 @@
+from .batch import ClassicPongBatch
+from .classic_pong import ClassicPongEngine
+from .entities import EntityStore
+from .pong3d import Pong3DEngine
+from .space_rivalry import SpaceRivalryEngine
+from .spatial import SpatialGrid
+
+__all__ = ['ClassicPongBatch', 'ClassicPongEngine', 'EntityStore', 'Pong3DEngine', 'SpaceRivalryEngine', 'SpatialGrid']
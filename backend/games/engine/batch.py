@@ -0,0 +1,168 @@
+import math
+import numpy as np
+
+
+class ClassicPongBatch:
+    # Every classic pong room in the process as one row of a float array, so
+    # a single vectorized step advances all balls. Rows hold the same values
+    # (and units) as the per-room state dict fields listed in FIELDS.
+    FIELDS = ('ballX', 'ballY', 'ballSpeedX', 'ballSpeedY', 'paddle1Y', 'paddle2Y')
+    BALL_X, BALL_Y, SPEED_X, SPEED_Y, PADDLE1_Y, PADDLE2_Y = range(6)
+
+    def __init__(self, width, height, paddle_width, paddle_height, ball_size,
+                 paddle_offset, initial_speed, max_speed, speedup, capacity=64, seed=None):
+        self.width = width
+        self.height = height
+        self.paddle_width = paddle_width
+        self.paddle_height = paddle_height
+        self.ball_size = ball_size
+        self.left_paddle_x = paddle_offset
+        self.right_paddle_x = width - paddle_offset - paddle_width
+        self.initial_speed = initial_speed
+        self.max_speed = max_speed
+        self.speedup = speedup
+        self.max_angle = 5 * math.pi / 12
+        self.max_sweep_events = 4
+
+        self.capacity = capacity
+        self.state = np.zeros((capacity, len(self.FIELDS)))
+        self.running = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        state = np.zeros((capacity, len(self.FIELDS)))
+        state[:self.capacity] = self.state
+        running = np.zeros(capacity, dtype=bool)
+        running[:self.capacity] = self.running
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.state, self.running, self.capacity = state, running, capacity
+
+    def add(self, values):
+        if not self.free:
+            self._grow()
+        row = self.free.pop()
+        self.load(row, values)
+        return row
+
+    def remove(self, row):
+        self.running[row] = False
+        self.free.append(row)
+
+    def load(self, row, values):
+        self.state[row] = [values[field] for field in self.FIELDS]
+
+    def read(self, rows):
+        return self.state[rows].tolist()
+
+    def reset_ball(self, rows):
+        rows = np.atleast_1d(rows)
+        self.state[rows, self.BALL_X] = self.width / 2
+        self.state[rows, self.BALL_Y] = self.height / 2
+        self.state[rows, self.SPEED_X] = self.initial_speed * np.where(self.rng.random(len(rows)) > 0.5, 1, -1)
+        self.state[rows, self.SPEED_Y] = self.initial_speed * (self.rng.random(len(rows)) * 2 - 1)
+
+    def _paddle_hit(self, rows, ball_y, speed_x, speed_y, paddle_y, direction):
+        relative_hit = (ball_y[rows] - (paddle_y[rows] + self.paddle_height / 2)) / (self.paddle_height / 2)
+        angle = np.clip(relative_hit, -1, 1) * self.max_angle
+
+        current_speed = np.hypot(speed_x[rows], speed_y[rows])
+        new_speed = np.minimum(current_speed + self.speedup, self.max_speed)
+        new_speed *= 1 + self.rng.uniform(-0.1, 0.1, len(rows))
+
+        y_direction = np.where(speed_y[rows] > 0, 1, -1)
+        speed_x[rows] = direction * np.abs(new_speed * np.cos(angle))
+        speed_y[rows] = y_direction * np.abs(new_speed * np.sin(angle))
+        speed_y[rows] *= 1 + self.rng.uniform(-0.1, 0.1, len(rows))
+
+    def _sweep_paddle(self, x, y, dx, dy, paddle_x, paddle_y):
+        # Vectorized version of ClassicPongEngine.sweep_paddle: entry
+        # fraction into the paddle box grown by half the ball, inf if none.
+        half = self.ball_size / 2
+        t_enter = np.zeros(len(x))
+        t_exit = np.ones(len(x))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for start, delta, low, high in [
+                (x, dx, paddle_x - half, paddle_x + self.paddle_width + half),
+                (y, dy, paddle_y - half, paddle_y + self.paddle_height + half)
+            ]:
+                t0, t1 = (low - start) / delta, (high - start) / delta
+                still = delta == 0
+                inside = (start >= low) & (start <= high)
+                t0 = np.where(still, np.where(inside, -np.inf, np.inf), t0)
+                t1 = np.where(still, np.where(inside, np.inf, -np.inf), t1)
+                t_enter = np.maximum(t_enter, np.minimum(t0, t1))
+                t_exit = np.minimum(t_exit, np.maximum(t0, t1))
+        return np.where(t_enter <= t_exit, t_enter, np.inf)
+
+    def step(self, scale):
+        # Advance every running row by one swept physics step (see
+        # ClassicPongEngine.update_ball_position). Returns the stepped row
+        # indices and, aligned with them, masks of left/right paddle hits and
+        # of rows where player 1 / player 2 scored.
+        rows = np.flatnonzero(self.running)
+        state = self.state[rows]
+        x, y, speed_x, speed_y, paddle1_y, paddle2_y = state.T
+        half = self.ball_size / 2
+
+        left_hit = np.zeros(len(rows), dtype=bool)
+        right_hit = np.zeros(len(rows), dtype=bool)
+        remaining = np.ones(len(rows))
+        moving = np.arange(len(rows))
+
+        for _ in range(self.max_sweep_events):
+            if not len(moving):
+                break
+            mx, my = x[moving], y[moving]
+            dx = speed_x[moving] * scale * remaining[moving]
+            dy = speed_y[moving] * scale * remaining[moving]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                top = (dy < 0) & (my + dy < half)
+                bottom = (dy > 0) & (my + dy > self.height - half)
+                t_wall = np.where(top, (half - my) / dy, np.where(bottom, (self.height - half - my) / dy, np.inf))
+            t_wall = np.maximum(t_wall, 0)
+
+            t_left = np.where(dx < 0, self._sweep_paddle(mx, my, dx, dy, self.left_paddle_x, paddle1_y[moving]), np.inf)
+            t_right = np.where(dx > 0, self._sweep_paddle(mx, my, dx, dy, self.right_paddle_x, paddle2_y[moving]), np.inf)
+
+            t = np.minimum(np.minimum(t_wall, t_left), np.minimum(t_right, 1.0))
+            x[moving] = mx + dx * t
+            y[moving] = my + dy * t
+            remaining[moving] *= 1 - t
+
+            # Paddles win ties with walls, as in the scalar engine.
+            hits_left = t_left <= t
+            hits_right = ~hits_left & (t_right <= t)
+            hits_wall = ~hits_left & ~hits_right & (t_wall <= t)
+
+            rows_top = moving[hits_wall & top]
+            y[rows_top] = half
+            speed_y[rows_top] = np.abs(speed_y[rows_top])
+            rows_bottom = moving[hits_wall & bottom]
+            y[rows_bottom] = self.height - half
+            speed_y[rows_bottom] = -np.abs(speed_y[rows_bottom])
+
+            hit_rows = moving[hits_left]
+            if len(hit_rows):
+                x[hit_rows] = self.left_paddle_x + self.paddle_width + half
+                self._paddle_hit(hit_rows, y, speed_x, speed_y, paddle1_y, 1)
+                left_hit[hit_rows] = True
+
+            hit_rows = moving[hits_right]
+            if len(hit_rows):
+                x[hit_rows] = self.right_paddle_x - half
+                self._paddle_hit(hit_rows, y, speed_x, speed_y, paddle2_y, -1)
+                right_hit[hit_rows] = True
+
+            moving = moving[hits_left | hits_right | hits_wall]
+
+        self.state[rows] = state
+
+        scored2 = x <= 0
+        scored1 = ~scored2 & (x >= self.width)
+        return rows, left_hit, right_hit, scored1, scored2
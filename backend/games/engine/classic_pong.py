@@ -0,0 +1,209 @@
+import math
+import random
+
+
+class ClassicPongEngine:
+    # Classic pong rules with no networking or Django. Every random draw goes
+    # through self.rng, so the same seed and inputs replay the same match.
+    GAME_WIDTH = 800
+    GAME_HEIGHT = 400
+    PADDLE_WIDTH = 15
+    PADDLE_HEIGHT = 80
+    PADDLE_OFFSET = 50
+    BALL_SIZE = 10
+    PADDLE_SPEED = 11
+    INITIAL_BALL_SPEED = 7
+    MAX_BALL_SPEED = 15
+    BALL_SPEEDUP = 0.2
+    WIN_SCORE = 11
+    # Bounces resolved per step; more than two never happen in practice.
+    MAX_SWEEP_EVENTS = 4
+
+    # Speeds above are in pixels per 1/60 s frame; step() scales them by dt.
+    REFERENCE_RATE = 60
+
+    def __init__(self, seed=None, state=None):
+        self.rng = random.Random(seed)
+        self.state = state if state is not None else self.initial_state()
+
+    def initial_state(self):
+        return {
+            'gameStarted': False,
+            'gameOver': False,
+            'player1': None,
+            'player2': None,
+            'paddle1Y': (self.GAME_HEIGHT - self.PADDLE_HEIGHT) / 2,
+            'paddle2Y': (self.GAME_HEIGHT - self.PADDLE_HEIGHT) / 2,
+            'ballX': self.GAME_WIDTH / 2,
+            'ballY': self.GAME_HEIGHT / 2,
+            'ballSpeedX': self.INITIAL_BALL_SPEED * (1 if self.rng.random() > 0.5 else -1),
+            'ballSpeedY': self.INITIAL_BALL_SPEED * (self.rng.random() * 2 - 1),
+            'score1': 0,
+            'score2': 0,
+            'winner': None,
+            'forfeit': False,
+            'combo1': 0,
+            'combo2': 0
+        }
+
+    @property
+    def running(self):
+        return self.state['gameStarted'] and not self.state['gameOver']
+
+    def step(self, inputs=(), dt=1 / REFERENCE_RATE):
+        # inputs is an iterable of (player, input) pairs such as
+        # ('player1', 'up'), applied in order before the physics step.
+        self.apply_inputs(inputs)
+
+        if not self.running:
+            return
+
+        self.update_ball_position(dt * self.REFERENCE_RATE)
+        self.check_scoring()
+
+    def apply_inputs(self, inputs):
+        for player, input_type in inputs:
+            self.apply_input(player, input_type)
+
+    def apply_input(self, player, input_type):
+        game_state = self.state
+        paddle_key = 'paddle1Y' if player == 'player1' else 'paddle2Y'
+
+        if input_type == 'up':
+            game_state[paddle_key] = max(
+                0,
+                game_state[paddle_key] - self.PADDLE_SPEED
+            )
+        elif input_type == 'down':
+            game_state[paddle_key] = min(
+                self.GAME_HEIGHT - self.PADDLE_HEIGHT,
+                game_state[paddle_key] + self.PADDLE_SPEED
+            )
+
+    def update_ball_position(self, scale=1):
+        # Swept movement: the ball centre travels along a segment and stops at
+        # the first wall or paddle it meets, bounces, then spends the rest of
+        # the step on the new heading. Nothing can be skipped over, so low
+        # physics rates (20-30 Hz) play the same as 60 Hz.
+        game_state = self.state
+        half = self.BALL_SIZE/2
+        remaining = 1.0
+
+        for _ in range(self.MAX_SWEEP_EVENTS):
+            x, y = game_state['ballX'], game_state['ballY']
+            dx = game_state['ballSpeedX'] * scale * remaining
+            dy = game_state['ballSpeedY'] * scale * remaining
+
+            event, t = None, 1.0
+            if dy < 0 and y + dy < half:
+                event, t = 'top', max(0.0, (half - y) / dy)
+            elif dy > 0 and y + dy > self.GAME_HEIGHT - half:
+                event, t = 'bottom', max(0.0, (self.GAME_HEIGHT - half - y) / dy)
+
+            if dx < 0:
+                hit = self.sweep_paddle(x, y, dx, dy, self.PADDLE_OFFSET, game_state['paddle1Y'])
+                if hit is not None and hit <= t:
+                    event, t = 'player1', hit
+            elif dx > 0:
+                right_paddle_x = self.GAME_WIDTH - self.PADDLE_OFFSET - self.PADDLE_WIDTH
+                hit = self.sweep_paddle(x, y, dx, dy, right_paddle_x, game_state['paddle2Y'])
+                if hit is not None and hit <= t:
+                    event, t = 'player2', hit
+
+            game_state['ballX'] = x + dx * t
+            game_state['ballY'] = y + dy * t
+            if event is None:
+                return
+            remaining *= 1 - t
+
+            if event == 'top':
+                game_state['ballY'] = half
+                game_state['ballSpeedY'] = abs(game_state['ballSpeedY'])
+            elif event == 'bottom':
+                game_state['ballY'] = self.GAME_HEIGHT - half
+                game_state['ballSpeedY'] = -abs(game_state['ballSpeedY'])
+            elif event == 'player1':
+                game_state['ballX'] = self.PADDLE_OFFSET + self.PADDLE_WIDTH + half
+                self.handle_paddle_hit(game_state['paddle1Y'], True)
+                self.register_hit('player1')
+            else:
+                game_state['ballX'] = self.GAME_WIDTH - self.PADDLE_OFFSET - self.PADDLE_WIDTH - half
+                self.handle_paddle_hit(game_state['paddle2Y'], False)
+                self.register_hit('player2')
+
+    def sweep_paddle(self, x, y, dx, dy, paddle_x, paddle_y):
+        # Fraction of the move (0..1) at which the ball first touches the
+        # paddle, or None. Slab test of the centre's segment against the
+        # paddle box grown by half the ball size; a ball already touching the
+        # paddle hits at 0, like the old overlap test.
+        half = self.BALL_SIZE/2
+        t_enter, t_exit = 0.0, 1.0
+        for start, delta, low, high in [
+            (x, dx, paddle_x - half, paddle_x + self.PADDLE_WIDTH + half),
+            (y, dy, paddle_y - half, paddle_y + self.PADDLE_HEIGHT + half)
+        ]:
+            if delta == 0:
+                if start < low or start > high:
+                    return None
+                continue
+            t0, t1 = (low - start) / delta, (high - start) / delta
+            t_enter = max(t_enter, min(t0, t1))
+            t_exit = min(t_exit, max(t0, t1))
+            if t_enter > t_exit:
+                return None
+        return t_enter
+
+    def handle_paddle_hit(self, paddle_y, is_left_paddle):
+        game_state = self.state
+        relative_hit = (game_state['ballY'] - (paddle_y + self.PADDLE_HEIGHT/2)) / (self.PADDLE_HEIGHT/2)
+        relative_hit = max(-1, min(1, relative_hit))
+
+        max_angle = 5 * math.pi / 12
+        angle = relative_hit * max_angle
+
+        current_speed = math.sqrt(game_state['ballSpeedX']**2 + game_state['ballSpeedY']**2)
+        new_speed = min(current_speed + self.BALL_SPEEDUP, self.MAX_BALL_SPEED)
+        new_speed *= 1 + self.rng.uniform(-0.1, 0.1)
+
+        direction = 1 if is_left_paddle else -1
+        game_state['ballSpeedX'] = direction * abs(new_speed * math.cos(angle))
+
+        y_direction = 1 if game_state['ballSpeedY'] > 0 else -1
+        game_state['ballSpeedY'] = y_direction * abs(new_speed * math.sin(angle))
+        game_state['ballSpeedY'] *= 1 + self.rng.uniform(-0.1, 0.1)
+
+    def register_hit(self, player):
+        hitter, other = ('1', '2') if player == 'player1' else ('2', '1')
+        self.state[f'combo{hitter}'] += 1
+        self.state[f'combo{other}'] = 0
+
+    def check_scoring(self):
+        if self.state['ballX'] <= 0:
+            scorer = 'player2'
+        elif self.state['ballX'] >= self.GAME_WIDTH:
+            scorer = 'player1'
+        else:
+            return
+
+        if not self.score_point(scorer):
+            self.reset_ball()
+
+    def score_point(self, player):
+        # Returns True when this point ends the match.
+        game_state = self.state
+        number = player[-1]
+        game_state[f'score{number}'] += 1
+        game_state[f'combo{number}'] = 0
+
+        if game_state['score1'] >= self.WIN_SCORE or game_state['score2'] >= self.WIN_SCORE:
+            game_state['winner'] = game_state['player1'] if game_state['score1'] > game_state['score2'] else game_state['player2']
+            game_state['gameOver'] = True
+            return True
+        return False
+
+    def reset_ball(self):
+        game_state = self.state
+        game_state['ballX'] = self.GAME_WIDTH / 2
+        game_state['ballY'] = self.GAME_HEIGHT / 2
+        game_state['ballSpeedX'] = self.INITIAL_BALL_SPEED * (1 if self.rng.random() > 0.5 else -1)
+        game_state['ballSpeedY'] = self.INITIAL_BALL_SPEED * (self.rng.random() * 2 - 1)
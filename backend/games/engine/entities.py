@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class EntityStore:
+    # Structure-of-arrays storage for one kind of game entity. Every field is
+    # a contiguous NumPy column; only the first `count` rows are live.
+    def __init__(self, fields, capacity=32):
+        self.fields = dict(fields)
+        self.capacity = capacity
+        self.count = 0
+        self.columns = {
+            name: np.zeros(capacity, dtype=dtype)
+            for name, dtype in self.fields.items()
+        }
+
+    def __len__(self):
+        return self.count
+
+    def __eq__(self, other):
+        # Same fields and same live rows; spare capacity is ignored.
+        if not isinstance(other, EntityStore):
+            return NotImplemented
+        return (
+            self.count == other.count
+            and self.fields == other.fields
+            and all(np.array_equal(self[name], other[name]) for name in self.columns)
+        )
+
+    def __getitem__(self, name):
+        return self.columns[name][:self.count]
+
+    def __setitem__(self, name, values):
+        self.columns[name][:self.count] = values
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            self.columns[name] = grown
+        self.capacity = capacity
+
+    def add(self, **values):
+        if self.count == self.capacity:
+            self._grow(self.count + 1)
+        index = self.count
+        for name, column in self.columns.items():
+            column[index] = values.get(name, 0)
+        self.count += 1
+        return index
+
+    def row(self, index):
+        return {name: column[index].item() for name, column in self.columns.items()}
+
+    def keep(self, mask):
+        # Compact the live rows selected by a boolean mask, preserving order.
+        kept = int(np.count_nonzero(mask))
+        if kept == self.count:
+            return
+        for column in self.columns.values():
+            column[:kept] = column[:self.count][mask]
+        self.count = kept
+
+    def remove_where(self, mask):
+        self.keep(~mask)
+
+    def remove(self, index):
+        if index < 0 or index >= self.count:
+            raise IndexError(index)
+        for column in self.columns.values():
+            column[index:self.count - 1] = column[index + 1:self.count]
+        self.count -= 1
+
+    def clear(self):
+        self.count = 0
+
+    def copy(self):
+        clone = EntityStore.__new__(EntityStore)
+        clone.fields = dict(self.fields)
+        clone.capacity = self.capacity
+        clone.count = self.count
+        clone.columns = {name: column.copy() for name, column in self.columns.items()}
+        return clone
+
+    def to_list(self, fields, kind_field=None, kinds=None, kind_data=None):
+        # Convert to the JSON-friendly list-of-dicts shape. An integer kind
+        # column can be decoded to its name ('type') and merged with static
+        # per-kind attributes.
+        names = list(fields)
+        columns = [self[name].tolist() for name in names]
+        entities = [dict(zip(names, values)) for values in zip(*columns)]
+
+        if kind_field is not None:
+            for entity, kind in zip(entities, self[kind_field].tolist()):
+                kind_name = kinds[kind]
+                entity['type'] = kind_name
+                if kind_data is not None:
+                    entity.update(kind_data[kind_name])
+        return entities
@@ -0,0 +1,213 @@
+import math
+import random
+
+
+class Pong3DEngine:
+    # Server-side port of the ball physics the 3D remote client runs in
+    # RemoteMode.jsx: gravity, table and net bounces, paddle impulses and the
+    # bounce-count scoring rules. It works on the PongConsumer state dict
+    # (ball_position, paddle*_position, scores, rounds_won, ...). Player 1
+    # defends z > 0, player 2 defends z < 0.
+    GRAVITY = -9.82
+    FLOOR_Y = 0.5
+    BALL_RADIUS = 0.1
+    BALL_START_Y = 5.0387
+    BALL_START_Z = 8
+    SERVE_IMPULSE_Y = 4
+    SERVE_IMPULSE_Z = 14
+
+    # Axis-aligned boxes as (min, max) corners, matching the client meshes.
+    TABLE_BOX = ((-4.15, 3.85, -9.315), (4.13, 4.15, 9.195))
+    NET_BOX = ((-4.14, 3.7, -0.15), (4.14, 4.9, 0.15))
+    # Half extents of the paddle model's bounding box around its position.
+    PADDLE_HALF_EXTENTS = (0.5, 0.65, 0.15)
+    OUT_MARGIN = 3
+
+    COLLISION_DELAY = 0.1
+    MAX_SCORE = 11
+    MAX_GAMES = 3
+
+    def __init__(self, state, seed=None):
+        self.state = state
+        self.rng = random.Random(seed)
+        self.time = 0.0
+        self.velocity = [0.0, 0.0, 0.0]
+        self.last_hit = 'player2'
+        self.side_bounces = {'player1': 0, 'player2': 0}
+        self.collisions = {}
+        self.match_result = None
+        self.reset_ball(-1)
+
+    @property
+    def running(self):
+        return self.state['game_started'] and not self.state.get('winner')
+
+    def step(self, inputs=(), dt=1 / 60):
+        # inputs is an iterable of (player, mouse_position) pairs.
+        self.apply_inputs(inputs)
+
+        if not self.running:
+            return
+
+        self.time += dt
+        self.simulate(dt)
+        self.check_collisions()
+        self.check_out_of_bounds()
+        self.state['ball_velocity'] = dict(zip('xyz', self.velocity))
+
+    def apply_inputs(self, inputs):
+        for player, mouse_position in inputs:
+            self.move_paddle(player, mouse_position)
+
+    def move_paddle(self, player, mouse_position):
+        if player == 'player1':
+            self.state['paddle1_position'].update({
+                'x': 5.5 * mouse_position['x'],
+                'z': 11 - abs(mouse_position['x'] * 2),
+                'y': 5.03 + mouse_position['y'] * 2
+            })
+        elif player == 'player2':
+            self.state['paddle2_position'].update({
+                'x': -5.5 * mouse_position['x'],
+                'z': -11 + abs(mouse_position['x'] * 2),
+                'y': 5.03 + mouse_position['y'] * 2
+            })
+
+    def simulate(self, dt):
+        ball = self.state['ball_position']
+        self.velocity[1] += self.GRAVITY * dt
+        ball['x'] += self.velocity[0] * dt
+        ball['y'] += self.velocity[1] * dt
+        ball['z'] += self.velocity[2] * dt
+
+        if ball['y'] < self.FLOOR_Y:
+            self.velocity[1] *= -0.5
+            ball['y'] = self.FLOOR_Y
+
+    def ball_box(self):
+        ball = self.state['ball_position']
+        r = self.BALL_RADIUS
+        return (ball['x'] - r, ball['y'] - r, ball['z'] - r), (ball['x'] + r, ball['y'] + r, ball['z'] + r)
+
+    def paddle_box(self, player):
+        position = self.state[f'paddle{player[-1]}_position']
+        center = (position['x'], position['y'], position['z'])
+        return (
+            tuple(c - h for c, h in zip(center, self.PADDLE_HALF_EXTENTS)),
+            tuple(c + h for c, h in zip(center, self.PADDLE_HALF_EXTENTS))
+        )
+
+    def touches(self, key, box):
+        # Box overlap, ignored for COLLISION_DELAY after the last contact
+        # with the same object so one touch is not handled twice.
+        ball_min, ball_max = self.ball_box()
+        box_min, box_max = box
+        if not all(ball_min[i] <= box_max[i] and ball_max[i] >= box_min[i] for i in range(3)):
+            return False
+
+        last = self.collisions.get(key)
+        if last is not None and self.time - last <= self.COLLISION_DELAY:
+            return False
+        self.collisions[key] = self.time
+        return True
+
+    def check_collisions(self):
+        if self.last_hit == 'player2' and self.touches('paddle1', self.paddle_box('player1')):
+            self.hit_ball('player1')
+        elif self.last_hit == 'player1' and self.touches('paddle2', self.paddle_box('player2')):
+            self.hit_ball('player2')
+        elif self.touches('table', self.TABLE_BOX):
+            self.bounce_on_table()
+        elif self.touches('net', self.NET_BOX):
+            self.velocity[2] = -self.velocity[2] * 0.5
+            self.velocity[0] += (self.rng.random() - 0.5) * 0.2
+            self.velocity[1] *= 0.9
+            self.state['ball_position']['z'] += self.velocity[2] * 0.01
+
+    def hit_ball(self, player):
+        ball = self.state['ball_position']
+        (min_x, min_y, _), (max_x, max_y, _) = self.paddle_box(player)
+        paddle_width = max_x - min_x
+        paddle_height = max_y - min_y
+
+        # 0 at the paddle's left edge, 1 at its right; centre hits go straight.
+        hit_direction = (ball['x'] - min_x) / paddle_width
+        force_x = (hit_direction - 0.5) * 3
+        lift = math.log(max(ball['y'] - min_y, 0) / paddle_height + 1)
+        force_y = lift * 6 + 2
+        force_z = lift * 13 + 10
+
+        if player == 'player1':
+            self.velocity = [-force_x, force_y, -force_z]
+        else:
+            self.velocity = [force_x, force_y, force_z]
+
+        self.last_hit = player
+        self.side_bounces = {'player1': 0, 'player2': 0}
+
+    def bounce_on_table(self):
+        self.velocity[1] = -self.velocity[1]
+        z = self.state['ball_position']['z']
+        if z == 0:
+            return
+
+        side = 'player1' if z > 0 else 'player2'
+        self.side_bounces[side] += 1
+        if self.side_bounces[side] == 2:
+            self.award_point('player2' if side == 'player1' else 'player1')
+
+    def check_out_of_bounds(self):
+        z = self.state['ball_position']['z']
+        (_, _, table_min_z), (_, _, table_max_z) = self.TABLE_BOX
+
+        if z > table_max_z + self.OUT_MARGIN:
+            # Past player 1: their fault if the ball already bounced on
+            # their side, otherwise player 2 hit it out.
+            self.award_point('player2' if self.side_bounces['player1'] == 1 else 'player1')
+        elif z < table_min_z - self.OUT_MARGIN:
+            self.award_point('player1' if self.side_bounces['player2'] == 1 else 'player2')
+
+    def award_point(self, player):
+        game_state = self.state
+        scores = dict(game_state['scores'])
+        scores[player] += 1
+        game_state['scores'] = scores
+        game_state.setdefault('scoring_history', []).append({
+            'scorer': player,
+            'score': scores
+        })
+        # The point winner's opponent serves towards them.
+        self.reset_ball(-1 if player == 'player1' else 1)
+        self.check_game_won()
+
+    def check_game_won(self):
+        game_state = self.state
+        scores = game_state['scores']
+        if max(scores.values()) < self.MAX_SCORE or abs(scores['player1'] - scores['player2']) < 2:
+            return
+
+        winner = 'player1' if scores['player1'] > scores['player2'] else 'player2'
+        rounds_won = dict(game_state['rounds_won'])
+        rounds_won[winner] += 1
+        game_state['rounds_won'] = rounds_won
+        game_state['current_game_winner'] = winner
+        game_state['scores'] = {'player1': 0, 'player2': 0}
+
+        if rounds_won[winner] >= math.ceil(self.MAX_GAMES / 2):
+            game_state['winner'] = game_state[winner]
+            game_state['final_score'] = dict(rounds_won)
+            self.match_result = {
+                'winner': winner,
+                'finalScore': dict(rounds_won),
+                'forfeit': False
+            }
+
+    def reset_ball(self, direction):
+        self.state['ball_position'] = {
+            'x': 0,
+            'y': self.BALL_START_Y,
+            'z': self.BALL_START_Z * direction
+        }
+        self.velocity = [0.0, self.SERVE_IMPULSE_Y, self.SERVE_IMPULSE_Z * -direction]
+        self.last_hit = 'player2' if direction == -1 else 'player1'
+        self.side_bounces = {'player1': 0, 'player2': 0}
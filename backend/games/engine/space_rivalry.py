@@ -0,0 +1,557 @@
+import math
+import random
+import numpy as np
+from .entities import EntityStore
+from .spatial import SpatialGrid
+
+
+class SpaceRivalryEngine:
+    # Space Rivalry rules with no networking or Django. Randomness comes from
+    # self.rng and time from self.clock (ms, advanced by step), so the same
+    # seed, start clock and inputs replay the same match.
+    GAME_WIDTH = 800
+    GAME_HEIGHT = 600
+    SHIP_WIDTH = 40
+    SHIP_HEIGHT = 30
+    LASER_WIDTH = 4
+    LASER_HEIGHT = 15
+    ASTEROID_SIZE = 30
+    DEBRIS_SIZE = 20
+    POWERUP_SIZE = 25
+    MOVEMENT_SPEED = 10
+    COLLISION_CELL_SIZE = 64
+    # Below this many laser/ship x asteroid pairs a tick, a plain Python scan
+    # is cheaper than the grid and its fixed cost in NumPy calls.
+    LINEAR_COLLISION_PAIRS = 4000
+
+    # Entity speeds are per simulation tick, so the tick rate stays fixed.
+    TICK_RATE = 60
+
+    POWERUPS = {
+        'RAPID_FIRE': {'duration': 5000, 'color': 'yellow'},
+        'SHIELD': {'duration': 8000, 'color': 'cyan'},
+        'DOUBLE_BULLETS': {'duration': 6000, 'color': 'magenta'},
+        'SLOW_MOTION': {'duration': 4000, 'color': 'lime'}
+    }
+
+    ASTEROID_TYPES = {
+        'NORMAL': {'speed': 3, 'size': ASTEROID_SIZE, 'health': 1, 'points': 100},
+        'FAST': {'speed': 5, 'size': ASTEROID_SIZE * 0.7, 'health': 1, 'points': 150},
+        'SPLIT': {'speed': 2, 'size': ASTEROID_SIZE * 1.2, 'health': 1, 'points': 200},
+        'EXPLODING': {'speed': 2, 'size': ASTEROID_SIZE * 1.3, 'health': 1, 'points': 300}
+    }
+
+    # Entities live in NumPy columns; 'kind' indexes into these lists and is
+    # expanded back to the type name and static attributes at snapshot time.
+    ASTEROID_KINDS = list(ASTEROID_TYPES)
+    POWERUP_KINDS = list(POWERUPS)
+
+    # What snapshots carry per kind: only what the client draws with, not
+    # simulation values such as health, points or duration.
+    ASTEROID_VIEW = {name: {'speed': data['speed'], 'size': data['size']} for name, data in ASTEROID_TYPES.items()}
+    POWERUP_VIEW = {name: {'color': data['color']} for name, data in POWERUPS.items()}
+    SNAPSHOT_SKIP = ('lastShot1', 'lastShot2', 'lastUpdate')
+
+    LASER_FIELDS = {'x': np.float64, 'y': np.float64}
+    ASTEROID_FIELDS = {'x': np.float64, 'y': np.float64, 'size': np.float64, 'speed': np.float64, 'kind': np.int8}
+    DEBRIS_FIELDS = {'x': np.float64, 'y': np.float64, 'targetPlayer': np.int8}
+    POWERUP_FIELDS = {'x': np.float64, 'y': np.float64, 'kind': np.int8}
+    EXPLOSION_FIELDS = {'x': np.float64, 'y': np.float64, 'created': np.float64}
+
+    def __init__(self, seed=None, clock=0.0, state=None):
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.state = state if state is not None else self.initial_state()
+        self.asteroid_grid = SpatialGrid(self.GAME_WIDTH, self.GAME_HEIGHT, self.COLLISION_CELL_SIZE)
+        self.linear_collisions = False
+
+    @property
+    def running(self):
+        return self.state['gameStarted'] and not self.state['gameOver']
+
+    def step(self, inputs=(), dt=1 / TICK_RATE):
+        # inputs is an iterable of (player, input) pairs such as
+        # ('player2', 'shoot'), applied in order before the simulation step.
+        self.apply_inputs(inputs)
+
+        if not self.running:
+            return
+
+        self.clock += dt * 1000
+        self.update_game_state(dt)
+        self.check_game_over()
+
+    def apply_inputs(self, inputs):
+        for player, input_type in inputs:
+            self.apply_input(player, input_type)
+
+    def apply_input(self, player, input_type):
+        game_state = self.state
+        player_pos_key = f'player{player[-1]}Pos'
+
+        if input_type == 'left':
+            current_pos = game_state[player_pos_key]
+            min_pos = self.SHIP_WIDTH/2 if player == 'player1' else self.GAME_WIDTH/2 + self.SHIP_WIDTH/2
+            game_state[player_pos_key] = max(min_pos, current_pos - self.MOVEMENT_SPEED)
+
+        elif input_type == 'right':
+            current_pos = game_state[player_pos_key]
+            max_pos = self.GAME_WIDTH/2 - self.SHIP_WIDTH/2 if player == 'player1' else self.GAME_WIDTH - self.SHIP_WIDTH/2
+            game_state[player_pos_key] = min(max_pos, current_pos + self.MOVEMENT_SPEED)
+
+        elif input_type == 'shoot':
+            self.handle_shooting(game_state, int(player[-1]))
+
+    def handle_shooting(self, game_state, player_num):
+        current_time = self.clock
+        last_shot_key = f'lastShot{player_num}'
+
+        if current_time - game_state.get(last_shot_key, -math.inf) >= self.get_shooting_cooldown(game_state, player_num):
+            player_pos = game_state[f'player{player_num}Pos']
+            lasers = game_state[f'lasers{player_num}']
+            effects = game_state[f'activeEffects{player_num}']
+            laser_y = self.GAME_HEIGHT - self.SHIP_HEIGHT - 10
+
+            if effects.get('DOUBLE_BULLETS', {}).get('active'):
+                lasers.add(x=player_pos - 10, y=laser_y)
+                lasers.add(x=player_pos + 10, y=laser_y)
+            else:
+                lasers.add(x=player_pos, y=laser_y)
+
+            game_state[last_shot_key] = current_time
+
+    def get_shooting_cooldown(self, game_state, player_num):
+        effects = game_state[f'activeEffects{player_num}']
+        return 250 if effects.get('RAPID_FIRE', {}).get('active') else 500
+
+    def initial_state(self):
+        return {
+            'gameStarted': False,
+            'gameOver': False,
+            'player1': None,
+            'player2': None,
+            'player1Pos': self.GAME_WIDTH / 4,
+            'player2Pos': 3 * self.GAME_WIDTH / 4,
+            'health1': 75,
+            'health2': 75,
+            'score1': 0,
+            'score2': 0,
+            'lasers1': EntityStore(self.LASER_FIELDS),
+            'lasers2': EntityStore(self.LASER_FIELDS),
+            'asteroids': EntityStore(self.ASTEROID_FIELDS),
+            'debris': EntityStore(self.DEBRIS_FIELDS),
+            'powerups': EntityStore(self.POWERUP_FIELDS),
+            'explosions': EntityStore(self.EXPLOSION_FIELDS),
+            'activeEffects1': {},
+            'activeEffects2': {},
+            'combo1': 0,
+            'combo2': 0,
+            'wave': 1,
+            'difficulty': 1,
+            'winner': None,
+            'forfeit': False
+        }
+
+    def snapshot(self):
+        game_state = self.state
+        snapshot = {key: value for key, value in game_state.items() if key not in self.SNAPSHOT_SKIP}
+        for player in [1, 2]:
+            snapshot[f'lasers{player}'] = game_state[f'lasers{player}'].to_list(['x', 'y'])
+        snapshot['asteroids'] = game_state['asteroids'].to_list(
+            ['x', 'y'], 'kind', self.ASTEROID_KINDS, self.ASTEROID_VIEW
+        )
+        snapshot['debris'] = game_state['debris'].to_list(['x', 'y', 'targetPlayer'])
+        snapshot['powerups'] = game_state['powerups'].to_list(
+            ['x', 'y'], 'kind', self.POWERUP_KINDS, self.POWERUP_VIEW
+        )
+        snapshot['explosions'] = game_state['explosions'].to_list(['x', 'y', 'created'])
+        return snapshot
+
+    def update_game_state(self, dt):
+        game_state = self.state
+
+        self.update_lasers(game_state)
+
+        slow_motion = any(
+            game_state[f'activeEffects{i}'].get('SLOW_MOTION', {}).get('active')
+            for i in [1, 2]
+        )
+        speed_multiplier = 0.5 if slow_motion else 1
+
+        self.update_asteroids(game_state, speed_multiplier)
+
+        self.update_powerups(game_state)
+
+        self.update_debris(game_state)
+
+        self.update_explosions(game_state)
+
+        self.check_all_collisions(game_state)
+
+        game_state['difficulty'] = min(game_state['difficulty'] + 0.1 * dt / 30, 10)
+
+        if self.rng.random() < 0.02 * game_state['difficulty']:
+            self.spawn_asteroid(game_state)
+
+    def update_lasers(self, game_state):
+        for player in [1, 2]:
+            lasers = game_state[f'lasers{player}']
+            lasers.keep(lasers['y'] > 0)
+            lasers['y'] -= 10
+
+    def update_asteroids(self, game_state, speed_multiplier):
+        asteroids = game_state['asteroids']
+        asteroids.keep(asteroids['y'] < self.GAME_HEIGHT + asteroids['size'])
+        asteroids['y'] += asteroids['speed'] * speed_multiplier
+
+    def update_powerups(self, game_state):
+        current_time = self.clock
+
+        powerups = game_state['powerups']
+        powerups.keep(powerups['y'] < self.GAME_HEIGHT)
+        powerups['y'] += 2
+
+        for player in [1, 2]:
+            effects_key = f'activeEffects{player}'
+            for powerup_type, effect in game_state[effects_key].items():
+                if effect.get('active') and current_time >= effect.get('endsAt', 0):
+                    game_state[effects_key][powerup_type] = {'active': False}
+
+    def update_debris(self, game_state):
+        debris = game_state['debris']
+        debris.keep(debris['y'] < self.GAME_HEIGHT)
+        debris['y'] += 3
+
+    def update_explosions(self, game_state):
+        current_time = self.clock
+        explosions = game_state['explosions']
+        explosions.keep(current_time - explosions['created'] < 500)
+
+    def check_all_collisions(self, game_state):
+        # Asteroids hit during this pass are tombstoned with a NaN position
+        # (NaN never overlaps anything) so grid indices stay valid until the
+        # single compaction at the end.
+        asteroids = game_state['asteroids']
+        shooters = len(game_state['lasers1']) + len(game_state['lasers2']) + 2
+        self.linear_collisions = len(asteroids) * shooters < self.LINEAR_COLLISION_PAIRS
+
+        if self.linear_collisions:
+            self.check_laser_collisions_linear(game_state, 1)
+            self.check_laser_collisions_linear(game_state, 2)
+            self.check_ship_collisions_linear(game_state)
+        else:
+            self.asteroid_grid.build(asteroids['x'], asteroids['y'], asteroids['size'] / 2)
+            self.check_laser_collisions(game_state, 1)
+            self.check_laser_collisions(game_state, 2)
+            self.check_ship_collisions(game_state)
+
+        asteroids.keep(~np.isnan(asteroids['x']))
+
+        self.check_powerup_collisions(game_state)
+
+    def asteroid_candidates(self, asteroids, x0, y0, x1, y1):
+        if self.linear_collisions:
+            return np.arange(len(asteroids))
+        candidates = self.asteroid_grid.query(x0, y0, x1, y1)
+        if len(asteroids) > self.asteroid_grid.count:
+            # Asteroids spawned by splits during this pass are not in the grid.
+            candidates = np.concatenate((candidates, np.arange(self.asteroid_grid.count, len(asteroids))))
+        return candidates
+
+    def destroy_asteroid(self, asteroids, index):
+        asteroids['x'][index] = np.nan
+        asteroids['y'][index] = np.nan
+
+    def check_laser_collisions(self, game_state, player_num):
+        lasers = game_state[f'lasers{player_num}']
+        asteroids = game_state['asteroids']
+        hit_lasers = np.zeros(len(lasers), dtype=bool)
+        half_width, half_height = self.LASER_WIDTH / 2, self.LASER_HEIGHT / 2
+
+        # Broad phase for every laser at once. Hits only ever remove gridded
+        # asteroids, so a laser without a candidate here can only collide with
+        # asteroids that splits added after the grid was built.
+        pairs, candidates = self.asteroid_grid.query_pairs(
+            lasers['x'] - half_width, lasers['y'] - half_height,
+            lasers['x'] + half_width, lasers['y'] + half_height
+        )
+        sizes = asteroids['size'][candidates]
+        pair_hits = self.check_collision(
+            lasers['x'][pairs], lasers['y'][pairs], self.LASER_WIDTH, self.LASER_HEIGHT,
+            asteroids['x'][candidates], asteroids['y'][candidates], sizes, sizes
+        )
+        may_hit = np.zeros(len(lasers), dtype=bool)
+        may_hit[pairs[pair_hits]] = True
+        # Asteroids split off by the other player's lasers are not gridded.
+        self.flag_lasers_near_spawns(lasers, asteroids, self.asteroid_grid.count, 0, may_hit)
+
+        for i in range(len(lasers)):
+            if not may_hit[i]:
+                continue
+
+            laser_x, laser_y = lasers['x'][i], lasers['y'][i]
+            candidates = self.asteroid_candidates(
+                asteroids,
+                laser_x - half_width, laser_y - half_height,
+                laser_x + half_width, laser_y + half_height
+            )
+            sizes = asteroids['size'][candidates]
+            hits = self.check_collision(
+                laser_x, laser_y, self.LASER_WIDTH, self.LASER_HEIGHT,
+                asteroids['x'][candidates], asteroids['y'][candidates], sizes, sizes
+            )
+            if not hits.any():
+                continue
+
+            hit_lasers[i] = True
+            spawned_from = len(asteroids)
+            self.laser_hit(game_state, player_num, int(candidates[np.argmax(hits)]))
+            if len(asteroids) > spawned_from:
+                self.flag_lasers_near_spawns(lasers, asteroids, spawned_from, i + 1, may_hit)
+
+        lasers.remove_where(hit_lasers)
+
+    def check_laser_collisions_linear(self, game_state, player_num):
+        # Same result as check_laser_collisions: each laser hits the first
+        # live asteroid it overlaps, asteroids split off earlier included.
+        lasers = game_state[f'lasers{player_num}']
+        asteroids = game_state['asteroids']
+        if not len(lasers) or not len(asteroids):
+            return
+
+        hit_lasers = []
+        width, height = self.LASER_WIDTH, self.LASER_HEIGHT
+        rows = list(zip(asteroids['x'].tolist(), asteroids['y'].tolist(), asteroids['size'].tolist()))
+        for i, (laser_x, laser_y) in enumerate(zip(lasers['x'].tolist(), lasers['y'].tolist())):
+            # check_collision() inlined; this loop is the whole cost here.
+            for index, (x, y, size) in enumerate(rows):
+                if abs(laser_y - y) * 2 < (height + size) and abs(laser_x - x) * 2 < (width + size):
+                    break
+            else:
+                continue
+
+            hit_lasers.append(i)
+            self.laser_hit(game_state, player_num, index)
+            rows = list(zip(asteroids['x'].tolist(), asteroids['y'].tolist(), asteroids['size'].tolist()))
+
+        if hit_lasers:
+            mask = np.zeros(len(lasers), dtype=bool)
+            mask[hit_lasers] = True
+            lasers.remove_where(mask)
+
+    def laser_hit(self, game_state, player_num, index):
+        asteroids = game_state['asteroids']
+        asteroid = self.asteroid_at(asteroids, index)
+        self.destroy_asteroid(asteroids, index)
+
+        if asteroid['type'] == 'SPLIT':
+            self.split_asteroid(game_state, asteroid)
+        elif asteroid['type'] == 'EXPLODING':
+            self.create_explosion(game_state, asteroid)
+            self.damage_nearby_asteroids(game_state, asteroid)
+
+        self.update_score(game_state, player_num, asteroid['points'])
+
+        if self.rng.random() < 0.2:
+            self.spawn_powerup(game_state, asteroid)
+
+        self.create_debris(game_state, asteroid, 3 - player_num)
+
+    def flag_lasers_near_spawns(self, lasers, asteroids, spawned_from, first_laser, may_hit):
+        for index in range(spawned_from, len(asteroids)):
+            size = asteroids['size'][index]
+            may_hit[first_laser:] |= self.check_collision(
+                lasers['x'][first_laser:], lasers['y'][first_laser:], self.LASER_WIDTH, self.LASER_HEIGHT,
+                asteroids['x'][index], asteroids['y'][index], size, size
+            )
+
+    def check_ship_collisions(self, game_state):
+        ship_y = self.GAME_HEIGHT - self.SHIP_HEIGHT
+        asteroids = game_state['asteroids']
+
+        for player_num in [1, 2]:
+            if game_state[f'activeEffects{player_num}'].get('SHIELD', {}).get('active'):
+                continue
+
+            ship_pos = game_state[f'player{player_num}Pos']
+            health_key = f'health{player_num}'
+
+            candidates = self.asteroid_candidates(
+                asteroids,
+                ship_pos - self.SHIP_WIDTH / 2, ship_y - self.SHIP_HEIGHT / 2,
+                ship_pos + self.SHIP_WIDTH / 2, ship_y + self.SHIP_HEIGHT / 2
+            )
+            sizes = asteroids['size'][candidates]
+            hits = self.check_collision(
+                ship_pos, ship_y, self.SHIP_WIDTH, self.SHIP_HEIGHT,
+                asteroids['x'][candidates], asteroids['y'][candidates], sizes, sizes
+            )
+            hit_count = int(np.count_nonzero(hits))
+            if hit_count:
+                game_state[health_key] = max(0, game_state[health_key] - 20 * hit_count)
+                self.destroy_asteroid(asteroids, candidates[hits])
+
+            debris = game_state['debris']
+            hits = (debris['targetPlayer'] == player_num) & self.check_collision(
+                ship_pos, ship_y, self.SHIP_WIDTH, self.SHIP_HEIGHT,
+                debris['x'], debris['y'], self.DEBRIS_SIZE, self.DEBRIS_SIZE
+            )
+            hit_count = int(np.count_nonzero(hits))
+            if hit_count:
+                game_state[health_key] = max(0, game_state[health_key] - 10 * hit_count)
+                debris.remove_where(hits)
+
+    def check_ship_collisions_linear(self, game_state):
+        ship_y = self.GAME_HEIGHT - self.SHIP_HEIGHT
+        asteroids = game_state['asteroids']
+        debris = game_state['debris']
+        width, height = self.SHIP_WIDTH, self.SHIP_HEIGHT
+        rows = list(zip(asteroids['x'].tolist(), asteroids['y'].tolist(), asteroids['size'].tolist()))
+
+        for player_num in [1, 2]:
+            if game_state[f'activeEffects{player_num}'].get('SHIELD', {}).get('active'):
+                continue
+
+            ship_pos = game_state[f'player{player_num}Pos']
+            health_key = f'health{player_num}'
+
+            hits = [
+                index for index, (x, y, size) in enumerate(rows)
+                if abs(ship_y - y) * 2 < (height + size) and abs(ship_pos - x) * 2 < (width + size)
+            ]
+            if hits:
+                game_state[health_key] = max(0, game_state[health_key] - 20 * len(hits))
+                self.destroy_asteroid(asteroids, hits)
+                for index in hits:
+                    rows[index] = (math.nan, math.nan, rows[index][2])
+
+            if not len(debris):
+                continue
+            size = self.DEBRIS_SIZE
+            hits = [
+                target == player_num and abs(ship_y - y) * 2 < (height + size) and abs(ship_pos - x) * 2 < (width + size)
+                for x, y, target in zip(debris['x'].tolist(), debris['y'].tolist(), debris['targetPlayer'].tolist())
+            ]
+            hit_count = hits.count(True)
+            if hit_count:
+                game_state[health_key] = max(0, game_state[health_key] - 10 * hit_count)
+                debris.remove_where(np.array(hits))
+
+    def check_powerup_collisions(self, game_state):
+        current_time = self.clock
+        powerups = game_state['powerups']
+        if not len(powerups):
+            return
+
+        for player_num in [1, 2]:
+            ship_pos = game_state[f'player{player_num}Pos']
+
+            hits = self.check_collision(
+                ship_pos, self.GAME_HEIGHT - self.SHIP_HEIGHT, self.SHIP_WIDTH, self.SHIP_HEIGHT,
+                powerups['x'], powerups['y'], self.POWERUP_SIZE, self.POWERUP_SIZE
+            )
+            if not hits.any():
+                continue
+
+            # Activate power-ups
+            effects_key = f'activeEffects{player_num}'
+            for kind in powerups['kind'][hits].tolist():
+                powerup_type = self.POWERUP_KINDS[kind]
+                game_state[effects_key][powerup_type] = {
+                    'active': True,
+                    'endsAt': current_time + self.POWERUPS[powerup_type]['duration']
+                }
+            powerups.remove_where(hits)
+
+    def check_collision(self, x1, y1, w1, h1, x2, y2, w2, h2):
+        # Works on scalars as well as NumPy columns.
+        return (
+            (abs(x1 - x2) * 2 < (w1 + w2)) &
+            (abs(y1 - y2) * 2 < (h1 + h2))
+        )
+
+    def asteroid_at(self, asteroids, index):
+        asteroid_type = self.ASTEROID_KINDS[asteroids['kind'][index]]
+        return {
+            'x': asteroids['x'][index].item(),
+            'y': asteroids['y'][index].item(),
+            'type': asteroid_type,
+            **self.ASTEROID_TYPES[asteroid_type]
+        }
+
+    def update_score(self, game_state, player_num, points):
+        combo_key = f'combo{player_num}'
+        score_key = f'score{player_num}'
+
+        game_state[combo_key] += 1
+        combo_multiplier = 1 + game_state[combo_key] // 5
+        game_state[score_key] += points * combo_multiplier
+
+        game_state[f'lastHit{player_num}'] = self.clock
+
+    def spawn_asteroid(self, game_state):
+        asteroid_type = self.rng.choice(self.ASTEROID_KINDS)
+        asteroid_data = self.ASTEROID_TYPES[asteroid_type]
+        self.add_asteroid(
+            game_state,
+            self.rng.uniform(0, self.GAME_WIDTH),
+            -asteroid_data['size'],
+            asteroid_type
+        )
+
+    def add_asteroid(self, game_state, x, y, asteroid_type):
+        asteroid_data = self.ASTEROID_TYPES[asteroid_type]
+        game_state['asteroids'].add(
+            x=x,
+            y=y,
+            size=asteroid_data['size'],
+            speed=asteroid_data['speed'],
+            kind=self.ASTEROID_KINDS.index(asteroid_type)
+        )
+
+    def split_asteroid(self, game_state, asteroid):
+        for offset in [-20, 20]:
+            self.add_asteroid(game_state, asteroid['x'] + offset, asteroid['y'], 'NORMAL')
+
+    def create_explosion(self, game_state, asteroid):
+        game_state['explosions'].add(
+            x=asteroid['x'],
+            y=asteroid['y'],
+            created=self.clock
+        )
+
+    def damage_nearby_asteroids(self, game_state, exploding_asteroid):
+        explosion_radius = 100
+        asteroids = game_state['asteroids']
+        x, y = exploding_asteroid['x'], exploding_asteroid['y']
+
+        candidates = self.asteroid_candidates(
+            asteroids,
+            x - explosion_radius, y - explosion_radius,
+            x + explosion_radius, y + explosion_radius
+        )
+        dx = asteroids['x'][candidates] - x
+        dy = asteroids['y'][candidates] - y
+        self.destroy_asteroid(asteroids, candidates[np.sqrt(dx * dx + dy * dy) < explosion_radius])
+
+    def spawn_powerup(self, game_state, asteroid):
+        powerup_type = self.rng.choice(self.POWERUP_KINDS)
+        game_state['powerups'].add(
+            x=asteroid['x'],
+            y=asteroid['y'],
+            kind=self.POWERUP_KINDS.index(powerup_type)
+        )
+
+    def create_debris(self, game_state, asteroid, target_player):
+        game_state['debris'].add(
+            x=asteroid['x'],
+            y=asteroid['y'],
+            targetPlayer=target_player
+        )
+
+    def check_game_over(self):
+        game_state = self.state
+
+        if game_state['health1'] <= 0 or game_state['health2'] <= 0:
+            game_state['gameOver'] = True
+            game_state['winner'] = game_state['player2'] if game_state['health1'] <= 0 else game_state['player1']
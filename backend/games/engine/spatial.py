@@ -0,0 +1,88 @@
+import math
+import numpy as np
+
+
+class SpatialGrid:
+    # Uniform-grid broad phase. Entities are bucketed by the cell holding
+    # their centre; a query grows its box by the largest half-extent seen at
+    # build time so every entity that could overlap is returned. Positions
+    # outside the field are clamped to the border cells.
+    def __init__(self, width, height, cell_size):
+        self.cell_size = cell_size
+        self.cols = max(1, math.ceil(width / cell_size))
+        self.rows = max(1, math.ceil(height / cell_size))
+        self.order = np.empty(0, dtype=np.intp)
+        self.starts = np.zeros(self.cols * self.rows + 1, dtype=np.intp)
+        self.max_extent = 0.0
+        self.count = 0
+
+    def _cell_x(self, x):
+        return min(max(int(x // self.cell_size), 0), self.cols - 1)
+
+    def _cell_y(self, y):
+        return min(max(int(y // self.cell_size), 0), self.rows - 1)
+
+    def build(self, x, y, half_extent):
+        self.count = len(x)
+        if not self.count:
+            self.order = np.empty(0, dtype=np.intp)
+            self.starts[:] = 0
+            self.max_extent = 0.0
+            return self
+
+        cx = np.clip((x // self.cell_size).astype(np.intp), 0, self.cols - 1)
+        cy = np.clip((y // self.cell_size).astype(np.intp), 0, self.rows - 1)
+        cells = cy * self.cols + cx
+
+        self.order = np.argsort(cells, kind='stable')
+        self.starts = np.searchsorted(cells[self.order], np.arange(self.cols * self.rows + 1))
+        self.max_extent = float(np.max(half_extent))
+        return self
+
+    def query(self, x0, y0, x1, y1):
+        # Candidate indices (ascending) for entities that may touch the box.
+        if not self.count:
+            return self.order
+
+        margin = self.max_extent
+        cx0, cx1 = self._cell_x(x0 - margin), self._cell_x(x1 + margin)
+        cy0, cy1 = self._cell_y(y0 - margin), self._cell_y(y1 + margin)
+
+        # Cells are row-major, so each row of the query is one contiguous slice.
+        chunks = [
+            self.order[self.starts[row * self.cols + cx0]:self.starts[row * self.cols + cx1 + 1]]
+            for row in range(cy0, cy1 + 1)
+        ]
+        candidates = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        return np.sort(candidates)
+
+    def query_pairs(self, x0, y0, x1, y1):
+        # Vectorized query for many boxes at once. Returns parallel arrays of
+        # (box index, entity index) candidate pairs.
+        empty = np.empty(0, dtype=np.intp)
+        if not self.count or not len(x0):
+            return empty, empty
+
+        margin = self.max_extent
+        cx0 = np.clip(((x0 - margin) // self.cell_size).astype(np.intp), 0, self.cols - 1)
+        cx1 = np.clip(((x1 + margin) // self.cell_size).astype(np.intp), 0, self.cols - 1)
+        cy0 = np.clip(((y0 - margin) // self.cell_size).astype(np.intp), 0, self.rows - 1)
+        cy1 = np.clip(((y1 + margin) // self.cell_size).astype(np.intp), 0, self.rows - 1)
+
+        boxes, entities = [], []
+        for dy in range(int(np.max(cy1 - cy0)) + 1):
+            for dx in range(int(np.max(cx1 - cx0)) + 1):
+                box = np.flatnonzero((cx0 + dx <= cx1) & (cy0 + dy <= cy1))
+                cells = (cy0[box] + dy) * self.cols + cx0[box] + dx
+                counts = self.starts[cells + 1] - self.starts[cells]
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # Expand every (box, cell) into one pair per entity in the cell.
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                boxes.append(np.repeat(box, counts))
+                entities.append(self.order[np.repeat(self.starts[cells], counts) + offsets])
+
+        if not boxes:
+            return empty, empty
+        return np.concatenate(boxes), np.concatenate(entities)
@@ -0,0 +1,63 @@
+class InputQueue:
+    # Player inputs received between two scheduler ticks. The room drains the
+    # queue once per tick, so a burst of messages is applied together and
+    # costs a single snapshot. Inputs pushed with a key are latest-wins: a
+    # newer one replaces the queued one in place (e.g. mouse positions).
+    received_total = 0
+    coalesced_total = 0
+    superseded_total = 0
+
+    def __init__(self):
+        self.pending = []
+        self.keyed = {}
+        self.batch_received = 0
+        self.received = 0
+        self.coalesced = 0
+        self.superseded = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def push(self, item, key=None):
+        self.batch_received += 1
+        self.received += 1
+        InputQueue.received_total += 1
+
+        if key is None:
+            self.pending.append(item)
+        elif key in self.keyed:
+            self.pending[self.keyed[key]] = item
+            self.superseded += 1
+            InputQueue.superseded_total += 1
+        else:
+            self.keyed[key] = len(self.pending)
+            self.pending.append(item)
+
+    def drain(self):
+        # Every input after the first one of a tick shares that tick's
+        # snapshot instead of causing its own.
+        if self.batch_received > 1:
+            self.coalesced += self.batch_received - 1
+            InputQueue.coalesced_total += self.batch_received - 1
+
+        items = self.pending
+        self.pending = []
+        self.keyed = {}
+        self.batch_received = 0
+        return items
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'coalesced': self.coalesced,
+            'superseded': self.superseded,
+            'pending': len(self.pending),
+        }
+
+    @classmethod
+    def totals(cls):
+        return {
+            'received': cls.received_total,
+            'coalesced': cls.coalesced_total,
+            'superseded': cls.superseded_total,
+        }
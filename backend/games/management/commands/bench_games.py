@@ -0,0 +1,118 @@
+import json
+import os
+import platform
+import subprocess
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from games.benchmarks import classic_pong, collisions, matchmaking, snapshots, ticks
+
+SUITES = {
+    'collisions': collisions,
+    'classic_pong': classic_pong,
+    'ticks': ticks,
+    'snapshots': snapshots,
+    'matchmaking': matchmaking,
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-tick game simulation costs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--suite', action='append', choices=list(SUITES),
+                            help='Suite to run, can be repeated (default: all)')
+        parser.add_argument('--json', action='store_true',
+                            help='Print machine-readable results instead of tables')
+        parser.add_argument('--output', help='Also write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        results = {
+            name: SUITES[name].run(options['iterations'])
+            for name in options['suite'] or SUITES
+        }
+
+        if options['json'] or options['output']:
+            report = json.dumps({'meta': self.meta(options), 'results': results}, indent=2)
+            if options['output']:
+                with open(options['output'], 'w') as f:
+                    f.write(report + '\n')
+            if options['json']:
+                self.stdout.write(report)
+                return
+
+        for name, rows in results.items():
+            getattr(self, f'print_{name}')(rows)
+            self.stdout.write('')
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except Exception:
+            commit = None
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'commit': commit,
+            'iterations': options['iterations'],
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        }
+
+    def print_collisions(self, rows):
+        self.stdout.write('Space Rivalry collision pass (per tick)')
+        self.stdout.write(f"{'asteroids':>10} {'lasers':>8} {'grid us':>10} {'linear us':>10} {'speedup':>8}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['asteroids']:>10} {row['lasers']:>8} {row['grid_us']:>10.1f} "
+                f"{row['linear_us']:>10.1f} {row['speedup']:>7.1f}x"
+            )
+
+    def print_classic_pong(self, rows):
+        self.stdout.write('Classic pong physics step (all rooms, per tick)')
+        self.stdout.write(f"{'rooms':>10} {'scalar us':>10} {'batch us':>10} {'speedup':>8}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['rooms']:>10} {row['scalar_us']:>10.1f} {row['batch_us']:>10.1f} {row['speedup']:>7.1f}x"
+            )
+
+    def print_ticks(self, rows):
+        self.stdout.write('Full engine step, one core; baseline is the list-of-dicts Space Rivalry')
+        self.stdout.write(
+            f"{'game':>14} {'rooms':>6} {'ast':>5} {'las':>5} {'deb':>5} {'eff':>4} "
+            f"{'tick us':>10} {'room ticks/s':>13} {'baseline us':>12} {'speedup':>8}"
+        )
+        for row in rows:
+            baseline = f"{row['baseline_us']:>12.1f} {row['speedup']:>7.1f}x" if 'baseline_us' in row else f"{'-':>12} {'-':>8}"
+            self.stdout.write(
+                f"{row['game']:>14} {row.get('rooms', 1):>6} {row.get('asteroids', '-'):>5} "
+                f"{row.get('lasers', '-'):>5} {row.get('debris', '-'):>5} {row.get('effects', '-'):>4} "
+                f"{row['tick_us']:>10.1f} {row['room_ticks_per_sec']:>13.0f} {baseline}"
+            )
+
+    def print_snapshots(self, rows):
+        self.stdout.write('Snapshot build and JSON encode (per snapshot), full precision and quantized')
+        self.stdout.write(
+            f"{'game':>14} {'ast':>5} {'las':>5} {'deb':>5} {'eff':>4} "
+            f"{'build us':>9} {'encode us':>10} {'bytes':>8} {'q enc us':>9} {'q bytes':>8}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['game']:>14} {row.get('asteroids', '-'):>5} {row.get('lasers', '-'):>5} "
+                f"{row.get('debris', '-'):>5} {row.get('effects', '-'):>4} "
+                f"{row['build_us']:>9.1f} {row['encode_us']:>10.1f} {row['bytes']:>8} "
+                f"{row['quantized_encode_us']:>9.1f} {row['quantized_bytes']:>8}"
+            )
+
+    def print_matchmaking(self, rows):
+        self.stdout.write('Matchmaking queue: duplicate check, leave, rejoin and one match (per round)')
+        self.stdout.write(f"{'waiting':>10} {'indexed us':>11} {'list us':>10} {'speedup':>8}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['waiting']:>10} {row['indexed_us']:>11.1f} {row['list_us']:>10.1f} {row['speedup']:>7.1f}x"
+            )
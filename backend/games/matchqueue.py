@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from .metrics import Histogram
+
+WAIT_BUCKETS_MS = (1000, 5000, 10000, 30000, 60000, 120000, 300000, 600000)
+
+
+class MatchQueue:
+    # Players waiting for a match, one queue per game type. A queue is an
+    # OrderedDict of username -> (consumer, enqueued at) in arrival order
+    # and _waiting maps each username to its game type, so enqueueing,
+    # cancelling, the duplicate check and pairing the two longest-waiting
+    # players are all O(1) however many players wait.
+    _queues = {}
+    _waiting = {}
+    _waits = {}
+    matched_total = 0
+    cancelled_total = 0
+
+    @classmethod
+    def is_waiting(cls, username):
+        return username in cls._waiting
+
+    @classmethod
+    def enqueue(cls, game_type, username, consumer):
+        # Asking again for the same game type keeps the player's place;
+        # asking for another one moves them to the back of that queue.
+        current = cls._waiting.get(username)
+        if current == game_type:
+            return
+        if current is not None:
+            cls._remove(username, current)
+        cls._queues.setdefault(game_type, OrderedDict())[username] = (consumer, time.monotonic())
+        cls._waiting[username] = game_type
+
+    @classmethod
+    def cancel(cls, username, consumer=None):
+        # With `consumer`, only that connection's own entry is removed.
+        game_type = cls._waiting.get(username)
+        if game_type is None:
+            return False
+        queue = cls._queues[game_type]
+        if consumer is not None and queue[username][0] is not consumer:
+            return False
+        cls._remove(username, game_type)
+        cls.cancelled_total += 1
+        return True
+
+    @classmethod
+    def _remove(cls, username, game_type):
+        queue = cls._queues[game_type]
+        del queue[username]
+        del cls._waiting[username]
+        if not queue:
+            del cls._queues[game_type]
+
+    @classmethod
+    def pop_pair(cls, game_type):
+        # The two players who waited longest, or None if there are fewer.
+        queue = cls._queues.get(game_type)
+        if queue is None or len(queue) < 2:
+            return None
+        now = time.monotonic()
+        waits = cls._waits.setdefault(game_type, Histogram(WAIT_BUCKETS_MS))
+        pair = []
+        for _ in range(2):
+            username, (consumer, enqueued_at) = queue.popitem(last=False)
+            del cls._waiting[username]
+            waits.observe(now - enqueued_at)
+            pair.append(consumer)
+        if not queue:
+            del cls._queues[game_type]
+        cls.matched_total += 1
+        return pair
+
+    @classmethod
+    def stats(cls):
+        now = time.monotonic()
+        game_types = {}
+        for game_type in set(cls._queues) | set(cls._waits):
+            queue = cls._queues.get(game_type)
+            waits = cls._waits.get(game_type)
+            game_types[game_type] = {
+                'waiting': len(queue) if queue else 0,
+                'longest_wait_s': now - next(iter(queue.values()))[1] if queue else 0.0,
+                'matched_waits': waits.snapshot() if waits is not None else None,
+            }
+        return {
+            'waiting': len(cls._waiting),
+            'matched': cls.matched_total,
+            'cancelled': cls.cancelled_total,
+            'game_types': game_types,
+        }
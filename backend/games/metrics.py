@@ -0,0 +1,84 @@
+import bisect
+
+
+class Histogram:
+    # Fixed-bucket histogram of durations in seconds. observe() is one bisect
+    # and a few additions, so it can stay on for every tick in production.
+    # Bucket bounds are given in milliseconds.
+    def __init__(self, bounds_ms):
+        self.bounds_ms = tuple(bounds_ms)
+        self.bounds = tuple(bound / 1000 for bound in self.bounds_ms)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation, in ms.
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds_ms, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max * 1000
+
+    def snapshot(self):
+        buckets = {f'le_{bound:g}ms': count for bound, count in zip(self.bounds_ms, self.counts)}
+        buckets['inf'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+            'p50_ms': self.quantile(0.5),
+            'p99_ms': self.quantile(0.99),
+            'buckets': buckets,
+        }
+
+
+# Wake-up lateness is measured against a 1/60 s grid, so the buckets go
+# past one whole tick; step and publish times should stay well under it.
+LATENESS_BUCKETS_MS = (0.5, 1, 2, 4, 8, 16, 33, 66, 133)
+DURATION_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33)
+
+
+class TickMetrics:
+    # Timings for one clock (the whole process) or one room on it. Lateness
+    # is only recorded per process: every room shares the scheduler's clock,
+    # so a room's wake-up is exactly as late as the tick that stepped it.
+    def __init__(self, lateness=False):
+        self.lateness = Histogram(LATENESS_BUCKETS_MS) if lateness else None
+        self.step = Histogram(DURATION_BUCKETS_MS)
+        self.publish = Histogram(DURATION_BUCKETS_MS)
+        self.missed_ticks = 0
+        self.skipped_publishes = 0
+
+    def reset(self):
+        for histogram in (self.lateness, self.step, self.publish):
+            if histogram is not None:
+                histogram.reset()
+        self.missed_ticks = 0
+        self.skipped_publishes = 0
+
+    def snapshot(self):
+        data = {
+            'step': self.step.snapshot(),
+            'publish': self.publish.snapshot(),
+            'missed_ticks': self.missed_ticks,
+            'skipped_publishes': self.skipped_publishes,
+        }
+        if self.lateness is not None:
+            data['lateness'] = self.lateness.snapshot()
+        return data
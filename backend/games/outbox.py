@@ -0,0 +1,158 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+
+def websocket_message(text_data=None, bytes_data=None):
+    # The ASGI message AsyncWebsocketConsumer.send() would pass on.
+    if text_data is not None:
+        return {'type': 'websocket.send', 'text': text_data}
+    return {'type': 'websocket.send', 'bytes': bytes_data}
+
+
+class Outbox:
+    # Outgoing messages of one game socket, written by its own task so a
+    # slow client never holds up the room loop or the consumer's handlers.
+    # The server takes a message as soon as it is sent and buffers it
+    # itself, so how far behind a client is can only be told from its
+    # snapshot_ack messages: every snapshot handed to the server is kept
+    # by seq until the client acknowledges it (or a later one). Once the
+    # oldest unacknowledged snapshot is LAG_AFTER seconds old, new snapshots
+    # are held back instead of sent, the latest replacing the one held
+    # before and counted as dropped, until an ack catches up. A socket
+    # that acknowledges nothing for CLOSE_AFTER seconds is closed. Sockets
+    # that have never acked are never held back. Messages go out in order,
+    # and a snapshot still waiting in the queue is replaced by the next one.
+    LAG_AFTER = 1.0
+    CLOSE_AFTER = 5.0
+    HISTORY = 256
+
+    _open = {}
+    dropped_total = 0
+    closed_total = 0
+
+    def __init__(self, consumer):
+        self.consumer = consumer
+        self.queue = deque()
+        self.pending = None
+        self.held = None
+        self.unacked = OrderedDict()
+        self.acking = False
+        self.ready = asyncio.Event()
+        self.task = None
+        self.sent = 0
+        self.dropped = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+        Outbox._open[self.consumer.channel_name] = self
+
+    def stop(self):
+        Outbox._open.pop(self.consumer.channel_name, None)
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def put(self, message):
+        # A held snapshot goes out first so the client sees them in order.
+        if self.held is not None:
+            self.push(self.held)
+            self.held = None
+        self.pending = None
+        self.push([message, None])
+
+    def put_snapshot(self, message, seq=None):
+        behind = self.behind(time.monotonic())
+        if behind > self.CLOSE_AFTER:
+            self.close(f"no snapshot acknowledged for {behind:.1f}s")
+            return
+        if behind > self.LAG_AFTER:
+            if self.held is not None:
+                self.count_dropped()
+            self.held = [message, seq]
+            return
+        if self.pending is not None:
+            self.pending[:] = [message, seq]
+            self.count_dropped()
+            return
+        self.pending = [message, seq]
+        self.push(self.pending)
+
+    def ack(self, seq):
+        # When `seq` was handed to the server, None if it is not awaiting an
+        # ack. Acknowledges every snapshot sent before it as well.
+        if seq not in self.unacked:
+            return None
+        self.acking = True
+        while True:
+            sent_seq, sent_at = self.unacked.popitem(last=False)
+            if sent_seq == seq:
+                break
+        if self.held is not None and self.behind(time.monotonic()) <= self.LAG_AFTER:
+            held, self.held = self.held, None
+            self.put_snapshot(*held)
+        return sent_at
+
+    def behind(self, now):
+        # Age of the oldest snapshot the client has not acknowledged yet.
+        if not self.acking or not self.unacked:
+            return 0.0
+        return now - next(iter(self.unacked.values()))
+
+    def count_dropped(self):
+        self.dropped += 1
+        Outbox.dropped_total += 1
+
+    def close(self, reason):
+        if self.task is None:
+            return
+        print(f"Closing {self.consumer.channel_name}: {reason}")
+        Outbox.closed_total += 1
+        self.stop()
+        self.queue.clear()
+        self.pending = None
+        self.held = None
+        asyncio.create_task(self.consumer.close())
+
+    def push(self, entry):
+        self.queue.append(entry)
+        self.ready.set()
+
+    async def run(self):
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.queue:
+                entry = self.queue.popleft()
+                if entry is self.pending:
+                    self.pending = None
+                message, seq = entry
+                try:
+                    await self.consumer.base_send(message)
+                    self.sent += 1
+                except Exception as e:
+                    print(f"Error sending to {self.consumer.channel_name}: {e}")
+                    continue
+                if seq is not None:
+                    self.unacked[seq] = time.monotonic()
+                    if len(self.unacked) > self.HISTORY:
+                        self.unacked.popitem(last=False)
+
+    @classmethod
+    def stats(cls):
+        outboxes = list(cls._open.values())
+        now = time.monotonic()
+        lagging = sorted(outboxes, key=lambda outbox: outbox.behind(now), reverse=True)[:5]
+        return {
+            'sockets': len(outboxes),
+            'acking': sum(1 for outbox in outboxes if outbox.acking),
+            'queued': sum(len(outbox.queue) for outbox in outboxes),
+            'unacked': sum(len(outbox.unacked) for outbox in outboxes),
+            'lagging': sum(1 for outbox in outboxes if outbox.behind(now) > cls.LAG_AFTER),
+            'dropped': cls.dropped_total,
+            'closed': cls.closed_total,
+            'most_behind': {
+                outbox.consumer.channel_name: {'behind_s': outbox.behind(now), 'dropped': outbox.dropped}
+                for outbox in lagging if outbox.behind(now)
+            },
+        }
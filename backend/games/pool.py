@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from .engine import SpaceRivalryEngine
+
+
+def step_space_rivalry(state, clock, seed, inputs, steps, dt):
+    # Runs in a pool process: rebuild the engine around the shipped state,
+    # advance it like the consumer would and send the new state back.
+    engine = SpaceRivalryEngine(seed=seed, clock=clock, state=state)
+    for step in range(steps):
+        engine.step(inputs if step == 0 else (), dt=dt)
+        if state['gameOver']:
+            break
+    return engine.state, engine.clock
+
+
+class PhysicsPool:
+    # Worker processes that run room simulation steps off the event loop.
+    # Rooms ship their state and inputs with each step and get the new
+    # state back through the executor's pipes, so a heavy tick never holds
+    # up socket handling in the ASGI process.
+    WORKERS = settings.GAME_PHYSICS_WORKERS
+
+    _executor = None
+    submitted_total = 0
+    completed_total = 0
+    failed_total = 0
+    restarts_total = 0
+
+    @classmethod
+    def enabled(cls):
+        return cls.WORKERS > 0
+
+    @classmethod
+    def executor(cls):
+        if cls._executor is None:
+            # spawn: forking a process that runs an event loop and threads
+            # is not safe.
+            cls._executor = ProcessPoolExecutor(
+                cls.WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return cls._executor
+
+    @classmethod
+    def submit(cls, fn, *args):
+        cls.submitted_total += 1
+        return asyncio.get_running_loop().run_in_executor(cls.executor(), fn, *args)
+
+    @classmethod
+    def result(cls, future):
+        # The step's return value, or None if it failed. Only a dead worker
+        # breaks the executor; then the next submit starts a new one.
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:
+            cls.failed_total += 1
+            print(f"Physics pool broken, restarting it: {e}")
+            if cls._executor is not None:
+                cls.restarts_total += 1
+                cls.shutdown()
+            return None
+        except Exception as e:
+            cls.failed_total += 1
+            print(f"Error in physics pool step: {e}")
+            return None
+        cls.completed_total += 1
+        return result
+
+    @classmethod
+    def shutdown(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+
+    @classmethod
+    def stats(cls):
+        return {
+            'workers': cls.WORKERS,
+            'submitted': cls.submitted_total,
+            'completed': cls.completed_total,
+            'failed': cls.failed_total,
+            'restarts': cls.restarts_total,
+            'in_flight': cls.submitted_total - cls.completed_total - cls.failed_total,
+        }
@@ -0,0 +1,80 @@
+import json
+import msgpack
+
+MSGPACK_SUBPROTOCOL = 'transcendence.msgpack.v1'
+
+# Integer tags for message types in MessagePack frames. Append only: the
+# position in this tuple is the value on the wire.
+MESSAGE_TYPES = (
+    'init',
+    'player_input',
+    'mouse_move',
+    'ball_position',
+    'score_update',
+    'game_won',
+    'match_complete',
+    'client_disconnect',
+    'ping',
+    'pong',
+    'snapshot_ack',
+    'game_state',
+    'game_state_delta',
+    'game_ended',
+    'game_ended_by_forfeit',
+    'player_disconnected',
+    'player_reconnected',
+    'connection_warning',
+    'error',
+    'snapshot_rate',
+)
+MESSAGE_TAGS = {name: tag for tag, name in enumerate(MESSAGE_TYPES)}
+
+
+class JsonProtocol:
+    # The default: one JSON object per text frame.
+    name = None
+
+    @classmethod
+    def encode(cls, message):
+        return {'text_data': json.dumps(message)}
+
+    @classmethod
+    def decode(cls, text_data=None, bytes_data=None):
+        return json.loads(text_data)
+
+
+class MsgpackProtocol:
+    # Negotiated with the 'transcendence.msgpack.v1' WebSocket subprotocol.
+    # Each binary frame is a MessagePack array [tag, body]: the message type
+    # as its integer tag (or its name if it has no tag) and the remaining
+    # fields as a map. Text frames are still read as JSON.
+    name = MSGPACK_SUBPROTOCOL
+
+    @classmethod
+    def encode(cls, message):
+        body = dict(message)
+        message_type = body.pop('type')
+        return {'bytes_data': msgpack.packb([MESSAGE_TAGS.get(message_type, message_type), body])}
+
+    @classmethod
+    def decode(cls, text_data=None, bytes_data=None):
+        if bytes_data is None:
+            return json.loads(text_data)
+        tag, body = msgpack.unpackb(bytes_data)
+        body['type'] = MESSAGE_TYPES[tag] if isinstance(tag, int) else tag
+        return body
+
+
+PROTOCOLS = {MsgpackProtocol.name: MsgpackProtocol}
+
+
+def negotiate(scope):
+    # First subprotocol offered by the client that we speak, JSON otherwise.
+    for name in scope.get('subprotocols', []):
+        if name in PROTOCOLS:
+            return PROTOCOLS[name]
+    return JsonProtocol
+
+
+def by_name(name):
+    return PROTOCOLS.get(name, JsonProtocol)
@@ -0,0 +1,157 @@
+import time
+from .metrics import Histogram
+
+RTT_BUCKETS_MS = (10, 25, 50, 100, 150, 200, 300, 400, 600, 1000, 2000)
+
+
+class LinkQuality:
+    # Round-trip time and send pressure of one game socket, and the share of
+    # the room's snapshots it gets. The web clients ack every snapshot, so
+    # RTT is sampled from snapshot_ack messages on every game socket (see
+    # Outbox); clients that set 'adaptive': true in init are pinged as
+    # well. Pressure comes from the same acks: snapshots the Outbox held
+    # back and dropped because the client was behind, and the age of the
+    # oldest snapshot it has not acked, which counts as RTT once it is
+    # longer than the smoothed one. When the link is poor the
+    # socket gets every 2nd or 4th snapshot; it recovers one step at a time
+    # once the link stays good. Adaptive clients are told each change with a
+    # snapshot_rate message stamped with the room tick it starts at, so they
+    # can stretch their interpolation.
+    EVALUATE_INTERVAL = 1.0
+    PROBE_INTERVAL = 2.0
+    RTT_POOR = 0.2
+    RTT_BAD = 0.4
+    DIVISORS = (1, 2, 4)
+    RECOVER_AFTER = 3
+
+    _open = {}
+    rtt = Histogram(RTT_BUCKETS_MS)
+    rate_changes_total = 0
+
+    def __init__(self, consumer, broadcast_rate, tick_rate):
+        self.consumer = consumer
+        self.broadcast_rate = broadcast_rate
+        self.tick_rate = tick_rate
+        self.adaptive = False
+        self.srtt = None
+        self.divisor = 1
+        self.good_streak = 0
+        self.counter = 0
+        self.probes = {}
+        self.probe_id = 0
+        self.last_probe = 0.0
+        self.last_evaluated = time.monotonic()
+        self.last_dropped = 0
+
+    def start(self):
+        LinkQuality._open[self.consumer.channel_name] = self
+
+    def stop(self):
+        LinkQuality._open.pop(self.consumer.channel_name, None)
+
+    def sample(self, rtt):
+        LinkQuality.rtt.observe(rtt)
+        self.srtt = rtt if self.srtt is None else 0.875 * self.srtt + 0.125 * rtt
+
+    async def handle(self, data):
+        # Returns True for messages that only concern the link.
+        message_type = data.get('type')
+        if message_type == 'init' and data.get('adaptive'):
+            self.adaptive = True
+        elif message_type == 'snapshot_ack' and self.consumer.outbox is not None:
+            sent_at = self.consumer.outbox.ack(data.get('seq'))
+            if sent_at is not None:
+                self.sample(time.monotonic() - sent_at)
+        elif message_type == 'ping':
+            reply = {'type': 'pong', 'timestamp': time.time()}
+            if 'id' in data:
+                reply['id'] = data['id']
+            await self.consumer.send_message(reply)
+            return True
+        elif message_type == 'pong':
+            sent_at = self.probes.pop(data.get('id'), None)
+            if sent_at is not None:
+                self.sample(time.monotonic() - sent_at)
+            return True
+        return False
+
+    async def admit(self, event):
+        # Whether this socket gets the snapshot in `event`.
+        now = time.monotonic()
+        if self.adaptive and now - self.last_probe >= self.PROBE_INTERVAL:
+            self.last_probe = now
+            self.probe_id += 1
+            self.probes = {self.probe_id: now}
+            await self.consumer.send_message({'type': 'ping', 'id': self.probe_id})
+        if now - self.last_evaluated >= self.EVALUATE_INTERVAL:
+            self.last_evaluated = now
+            await self.evaluate(event.get('tick'))
+
+        self.counter += 1
+        return not self.counter % self.divisor
+
+    async def evaluate(self, tick):
+        outbox = self.consumer.outbox
+        dropped = outbox.dropped - self.last_dropped if outbox is not None else 0
+        behind = outbox.behind(time.monotonic()) if outbox is not None else 0.0
+        self.last_dropped += dropped
+        rtt = max(self.srtt or 0.0, behind)
+
+        if rtt > self.RTT_BAD or dropped > self.broadcast_rate / 4:
+            target = 2
+        elif rtt > self.RTT_POOR or dropped:
+            target = 1
+        else:
+            target = 0
+
+        level = self.DIVISORS.index(self.divisor)
+        if target > level:
+            level = target
+            self.good_streak = 0
+        elif target < level:
+            self.good_streak += 1
+            if self.good_streak >= self.RECOVER_AFTER:
+                level -= 1
+                self.good_streak = 0
+        else:
+            self.good_streak = 0
+
+        if self.DIVISORS[level] != self.divisor:
+            self.divisor = self.DIVISORS[level]
+            LinkQuality.rate_changes_total += 1
+            if self.adaptive:
+                await self.consumer.send_message({
+                    'type': 'snapshot_rate',
+                    'rate': self.broadcast_rate / self.divisor,
+                    'tick': tick,
+                    'tickRate': self.tick_rate,
+                })
+
+    def snapshot(self):
+        return {
+            'rtt_ms': self.srtt * 1000 if self.srtt is not None else None,
+            'rate': self.broadcast_rate / self.divisor,
+            'adaptive': self.adaptive,
+        }
+
+    @classmethod
+    def stats(cls):
+        links = list(cls._open.values())
+        reduced = [link for link in links if link.divisor > 1]
+        slowest = sorted(
+            (link for link in links if link.srtt is not None),
+            key=lambda link: link.srtt, reverse=True
+        )[:5]
+        return {
+            'sockets': len(links),
+            'rtt_measured': sum(1 for link in links if link.srtt is not None),
+            'reduced_rate': len(reduced),
+            'rate_changes': cls.rate_changes_total,
+            'rtt': cls.rtt.snapshot(),
+            'slowest': {link.consumer.channel_name: link.snapshot() for link in slowest},
+        }
+
+    @classmethod
+    def reset_metrics(cls):
+        cls.rtt.reset()
+        cls.rate_changes_total = 0
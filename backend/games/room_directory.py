@@ -0,0 +1,212 @@
+import asyncio
+from django.conf import settings
+from django.core.cache import cache
+from .protocol import by_name
+
+
+class RoomDirectory:
+    # Decides which worker process runs each game room. With the 'local'
+    # backend every worker owns the rooms it sees (one daphne process). With
+    # 'cache' the owner is claimed in the Django cache (Redis), so only one
+    # worker runs a room's loop; consumers on other workers forward their
+    # messages to the owner's worker channel and get the room's snapshots
+    # through the normal channel group.
+    BACKEND = settings.GAME_ROOM_DIRECTORY
+    LEASE = 30
+    KEY_PREFIX = 'game_room_owner'
+
+    worker_channel = None
+    _owned = {}
+    # room_key -> {reply channel: proxy consumer}
+    _proxies = {}
+    _listener = None
+    _heartbeat = None
+
+    @classmethod
+    def cache_key(cls, room_key):
+        return f'{cls.KEY_PREFIX}:{room_key}'
+
+    @classmethod
+    async def claim(cls, consumer):
+        # Returns None when this worker owns (or just took) the room,
+        # otherwise the owner's worker channel.
+        if cls.BACKEND == 'local':
+            return None
+
+        await cls.start(consumer.channel_layer)
+        room_key = consumer.room_key
+        if room_key in cls._owned:
+            return None
+
+        key = cls.cache_key(room_key)
+        try:
+            # A lease that expires between add and get is retried once.
+            for _ in range(2):
+                if await cache.aadd(key, cls.worker_channel, cls.LEASE):
+                    break
+                owner = await cache.aget(key)
+                if owner is not None and owner != cls.worker_channel:
+                    return owner
+        except Exception as e:
+            print(f"Error claiming room {room_key}, running it here: {e}")
+
+        cls._owned[room_key] = type(consumer)
+        return None
+
+    @classmethod
+    async def release(cls, room_key):
+        if cls._owned.pop(room_key, None) is None:
+            return
+        cls._proxies.pop(room_key, None)
+        try:
+            key = cls.cache_key(room_key)
+            if await cache.aget(key) == cls.worker_channel:
+                await cache.adelete(key)
+        except Exception as e:
+            print(f"Error releasing room {room_key}: {e}")
+
+    @classmethod
+    def is_local(cls, room_key):
+        # True when every connection of the room is a consumer of this
+        # worker: the room runs here and no other worker has joined it.
+        if cls.BACKEND == 'local':
+            return True
+        return room_key in cls._owned and not cls._proxies.get(room_key)
+
+    @classmethod
+    async def join(cls, consumer, owner):
+        # Lets the owner know about this connection before its first message.
+        await consumer.channel_layer.send(owner, {
+            'type': 'room.join',
+            **cls.describe(consumer),
+        })
+
+    @classmethod
+    async def forward(cls, consumer, owner, text_data=None, bytes_data=None):
+        await consumer.channel_layer.send(owner, {
+            'type': 'room.forward',
+            **cls.describe(consumer),
+            'text': text_data,
+            'bytes': bytes_data,
+        })
+
+    @classmethod
+    async def leave(cls, consumer, owner):
+        # The connection is gone without a cleanup (it dropped right after
+        # connecting); the owner only forgets its proxy.
+        await consumer.channel_layer.send(owner, {
+            'type': 'room.leave',
+            **cls.describe(consumer),
+        })
+
+    @classmethod
+    async def forward_cleanup(cls, consumer, owner, player):
+        await consumer.channel_layer.send(owner, {
+            'type': 'room.cleanup',
+            **cls.describe(consumer),
+            'player': player,
+        })
+
+    @classmethod
+    def describe(cls, consumer):
+        return {
+            'room': consumer.room_key,
+            'game_id': consumer.game_id,
+            'group': consumer.room_group_name,
+            'reply': consumer.channel_name,
+            'protocol': consumer.protocol.name,
+        }
+
+    @classmethod
+    async def start(cls, channel_layer):
+        if cls.worker_channel is None:
+            cls.worker_channel = await channel_layer.new_channel()
+        if cls._listener is None or cls._listener.done():
+            cls._listener = asyncio.create_task(cls._listen(channel_layer))
+        if cls._heartbeat is None or cls._heartbeat.done():
+            cls._heartbeat = asyncio.create_task(cls._renew())
+
+    @classmethod
+    async def _listen(cls, channel_layer):
+        while True:
+            message = await channel_layer.receive(cls.worker_channel)
+            try:
+                await cls.dispatch(channel_layer, message)
+            except Exception as e:
+                print(f"Error handling forwarded room message: {e}")
+
+    @classmethod
+    async def dispatch(cls, channel_layer, message):
+        consumer_class = cls._owned.get(message['room'])
+        if consumer_class is None:
+            return
+        if message['type'] == 'room.leave':
+            cls.drop_proxy(message['room'], message['reply'])
+            return
+
+        # One stand-in consumer per remote connection keeps that player's
+        # per-connection state (player number...) on the owner.
+        proxies = cls._proxies.setdefault(message['room'], {})
+        proxy = proxies.get(message['reply'])
+        if proxy is None:
+            proxy = cls.make_proxy(consumer_class, channel_layer, message)
+            proxies[message['reply']] = proxy
+
+        if message['type'] == 'room.forward':
+            await proxy.receive(text_data=message['text'], bytes_data=message['bytes'])
+        elif message['type'] == 'room.cleanup':
+            cleanup_task = asyncio.create_task(
+                proxy.delayed_cleanup(proxy.game_id, message['player'])
+            )
+            proxy.disconnection_cleanup_tasks[proxy.game_id] = cleanup_task
+            cls.drop_proxy(message['room'], message['reply'])
+
+    @classmethod
+    def drop_proxy(cls, room_key, reply):
+        proxies = cls._proxies.get(room_key)
+        if proxies is None:
+            return
+        proxies.pop(reply, None)
+        if not proxies:
+            cls._proxies.pop(room_key, None)
+
+    @classmethod
+    def make_proxy(cls, consumer_class, channel_layer, message):
+        proxy = consumer_class()
+        proxy.channel_layer = channel_layer
+        proxy.channel_name = message['reply']
+        proxy.game_id = message['game_id']
+        proxy.room_group_name = message['group']
+        proxy.room_key = message['room']
+        proxy.protocol = by_name(message['protocol'])
+
+        # Whatever the proxy sends (messages, close) goes back to the real
+        # connection, which passes it to its socket in room_relay().
+        async def relay(event):
+            await channel_layer.send(message['reply'], {
+                'type': 'room.relay',
+                'message': event,
+            })
+        proxy.base_send = relay
+        return proxy
+
+    @classmethod
+    async def _renew(cls):
+        while True:
+            await asyncio.sleep(cls.LEASE / 3)
+            for room_key in list(cls._owned):
+                key = cls.cache_key(room_key)
+                try:
+                    if not await cache.atouch(key, cls.LEASE):
+                        await cache.aadd(key, cls.worker_channel, cls.LEASE)
+                except Exception as e:
+                    print(f"Error renewing room {room_key}: {e}")
+
+    @classmethod
+    def stats(cls):
+        return {
+            'backend': cls.BACKEND,
+            'worker_channel': cls.worker_channel,
+            'owned': len(cls._owned),
+            'proxies': sum(len(proxies) for proxies in cls._proxies.values()),
+        }
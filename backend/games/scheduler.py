@@ -0,0 +1,202 @@
+import asyncio
+import math
+import time
+from django.conf import settings
+from .inputs import InputQueue
+from .metrics import TickMetrics
+
+
+class RoomScheduler:
+    # One clock per process for every active game room. Each tick calls the
+    # optional room.prepare(now) for every running room, then the
+    # synchronous room.step(now) for every running room, then schedules
+    # room.publish() for the network side without letting a slow send hold
+    # up the next tick. Parked rooms (not started, paused, finished) are not
+    # ticked at all until something wakes them, and the clock itself stops
+    # when no room is running.
+    _rooms = {}
+    _parked = {}
+    _publishing = {}
+    _metrics = {}
+    _task = None
+
+    tick_rate = settings.GAME_PHYSICS_RATE
+    tick = 0
+    late_ticks = 0
+    last_step_time = 0.0
+    max_step_time = 0.0
+    avg_step_time = 0.0
+    process_metrics = TickMetrics(lateness=True)
+
+    @classmethod
+    def register(cls, key, room, parked=False):
+        cls._metrics.setdefault(key, TickMetrics())
+        if parked:
+            cls._rooms.pop(key, None)
+            cls._parked[key] = room
+            return
+        cls._parked.pop(key, None)
+        cls._rooms[key] = room
+        cls._start()
+
+    @classmethod
+    def unregister(cls, key):
+        cls._rooms.pop(key, None)
+        cls._parked.pop(key, None)
+        cls._publishing.pop(key, None)
+        cls._metrics.pop(key, None)
+
+    @classmethod
+    def park(cls, key):
+        # Safe to call from room.step(): the room still publishes this tick.
+        room = cls._rooms.pop(key, None)
+        if room is not None:
+            cls._parked[key] = room
+
+    @classmethod
+    def wake(cls, key):
+        room = cls._parked.pop(key, None)
+        if room is not None:
+            cls._rooms[key] = room
+            cls._start()
+
+    @classmethod
+    def _start(cls):
+        if cls._task is None or cls._task.done():
+            cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    def is_registered(cls, key):
+        return key in cls._rooms or key in cls._parked
+
+    @classmethod
+    def is_parked(cls, key):
+        return key in cls._parked
+
+    @classmethod
+    def stats(cls):
+        interval = 1 / cls.tick_rate
+        return {
+            'rooms': len(cls._rooms) + len(cls._parked),
+            'running': len(cls._rooms),
+            'parked': len(cls._parked),
+            'tick': cls.tick,
+            'tick_rate': cls.tick_rate,
+            'late_ticks': cls.late_ticks,
+            'last_step_time': cls.last_step_time,
+            'avg_step_time': cls.avg_step_time,
+            'max_step_time': cls.max_step_time,
+            'utilization': cls.avg_step_time / interval,
+            'inputs': InputQueue.totals(),
+        }
+
+    @classmethod
+    def metrics(cls, key=None):
+        # Tick lateness, step/publish durations and missed ticks for the
+        # process, plus one entry per room (or only the room asked for).
+        if key is not None:
+            room = cls._metrics.get(key)
+            return room.snapshot() if room is not None else None
+        return {
+            'process': cls.process_metrics.snapshot(),
+            'rooms': {key: room.snapshot() for key, room in list(cls._metrics.items())},
+        }
+
+    @classmethod
+    def reset_metrics(cls):
+        cls.process_metrics.reset()
+        for room in list(cls._metrics.values()):
+            room.reset()
+
+    @classmethod
+    def step_rooms(cls, now, rooms):
+        started = time.perf_counter()
+        # Rooms that share state across the process (batched physics) get
+        # all their inputs in before the first room steps.
+        for key, room in rooms:
+            prepare = getattr(room, 'prepare', None)
+            if prepare is None:
+                continue
+            try:
+                prepare(now)
+            except Exception as e:
+                print(f"Error preparing room {key}: {e}")
+
+        room_started = time.perf_counter()
+        for key, room in rooms:
+            try:
+                room.step(now)
+            except Exception as e:
+                print(f"Error stepping room {key}: {e}")
+            room_done = time.perf_counter()
+            metrics = cls._metrics.get(key)
+            if metrics is not None:
+                metrics.step.observe(room_done - room_started)
+            room_started = room_done
+        step_time = time.perf_counter() - started
+        cls.process_metrics.step.observe(step_time)
+
+        cls.tick += 1
+        cls.last_step_time = step_time
+        cls.max_step_time = max(cls.max_step_time, step_time)
+        cls.avg_step_time += (step_time - cls.avg_step_time) * 0.05
+        return step_time
+
+    @classmethod
+    def publish_rooms(cls, rooms):
+        for key, room in rooms:
+            if not cls.is_registered(key):
+                continue
+            pending = cls._publishing.get(key)
+            if pending is not None and not pending.done():
+                metrics = cls._metrics.get(key)
+                if metrics is not None:
+                    metrics.skipped_publishes += 1
+                cls.process_metrics.skipped_publishes += 1
+                continue
+            cls._publishing[key] = asyncio.create_task(cls._publish(key, room))
+
+    @classmethod
+    async def _publish(cls, key, room):
+        started = time.perf_counter()
+        try:
+            await room.publish()
+        except Exception as e:
+            print(f"Error publishing room {key}: {e}")
+        publish_time = time.perf_counter() - started
+        metrics = cls._metrics.get(key)
+        if metrics is not None:
+            metrics.publish.observe(publish_time)
+        cls.process_metrics.publish.observe(publish_time)
+
+    @classmethod
+    async def _run(cls):
+        interval = 1 / cls.tick_rate
+        try:
+            while cls._rooms:
+                now = time.monotonic()
+                # Align every wake-up to the same grid of tick boundaries.
+                deadline = (math.floor(now / interval) + 1) * interval
+                await asyncio.sleep(deadline - now)
+
+                now = time.monotonic()
+                lateness = max(0.0, now - deadline)
+                cls.process_metrics.lateness.observe(lateness)
+                if lateness > interval:
+                    cls.late_ticks += 1
+                    # Whole grid ticks that went by without a step.
+                    missed = int(lateness / interval)
+                    cls.process_metrics.missed_ticks += missed
+                    for key in cls._rooms:
+                        metrics = cls._metrics.get(key)
+                        if metrics is not None:
+                            metrics.missed_ticks += missed
+
+                # Rooms that park during their step still publish this tick.
+                rooms = list(cls._rooms.items())
+                cls.step_rooms(now, rooms)
+                cls.publish_rooms(rooms)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            cls._task = None
@@ -0,0 +1,298 @@
+import secrets
+from collections import OrderedDict
+from django.conf import settings
+
+
+def freeze(value):
+    # Copy of the nested dicts/lists of a state, so later in-place changes to
+    # the live state do not leak into a kept snapshot.
+    if isinstance(value, dict):
+        return {k: freeze(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [freeze(v) for v in value]
+    return value
+
+
+def diff(old, new):
+    # Top-level fields of `new` that differ from `old`. A changed list is
+    # sent as an index patch {'$list': length, 'set': [[i, item], ...]}
+    # when fewer than half of its items changed.
+    changed = {}
+    for key, value in new.items():
+        if key not in old:
+            changed[key] = value
+            continue
+        previous = old[key]
+        if previous == value:
+            continue
+        if isinstance(value, list) and isinstance(previous, list):
+            items = [
+                [i, item] for i, item in enumerate(value)
+                if i >= len(previous) or previous[i] != item
+            ]
+            if len(items) * 2 < len(value):
+                value = {'$list': len(value), 'set': items}
+        changed[key] = value
+
+    delta = {'changed': changed}
+    removed = [key for key in old if key not in new]
+    if removed:
+        delta['removed'] = removed
+    return delta
+
+
+def patch(old, delta):
+    # Inverse of diff(). Returns a new dict and never modifies `old`.
+    state = dict(old)
+    for key, value in delta['changed'].items():
+        if isinstance(value, dict) and '$list' in value:
+            items = list(state.get(key, []))[:value['$list']]
+            items.extend([None] * (value['$list'] - len(items)))
+            for i, item in value['set']:
+                items[i] = item
+            value = items
+        state[key] = value
+    for key in delta.get('removed', ()):
+        state.pop(key, None)
+    return state
+
+
+def quantize(value, fields, scale):
+    # Numbers under any key in `fields`, and everything nested below such a
+    # key, become integers in 1/scale units; the client divides them back.
+    if isinstance(value, dict):
+        if '$list' in value:
+            return {
+                '$list': value['$list'],
+                'set': [[i, quantize(item, fields, scale)] for i, item in value['set']],
+            }
+        result = {}
+        for key, item in value.items():
+            if key in fields:
+                result[key] = scaled(item, scale)
+            elif isinstance(item, (dict, list)):
+                result[key] = quantize(item, fields, scale)
+            else:
+                result[key] = item
+        return result
+    if isinstance(value, list):
+        return [quantize(item, fields, scale) if isinstance(item, (dict, list)) else item for item in value]
+    return value
+
+
+def scaled(value, scale):
+    if isinstance(value, float) or (isinstance(value, int) and not isinstance(value, bool)):
+        return round(value * scale)
+    if isinstance(value, dict):
+        if '$list' in value:
+            return {'$list': value['$list'], 'set': [[i, scaled(item, scale)] for i, item in value['set']]}
+        return {key: scaled(item, scale) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scaled(item, scale) for item in value]
+    return value
+
+
+class SnapshotStream:
+    # Room side. Numbers the room's snapshots and turns each one into a
+    # group event holding either the full state (a keyframe) or only what
+    # changed since the previous snapshot, so the channel layer hop carries
+    # deltas too. Keyframes go out every KEYFRAME_INTERVAL seconds' worth of
+    # snapshots and whenever a new connection needs one.
+    KEYFRAME_INTERVAL = 1
+
+    def __init__(self, broadcast_rate=settings.GAME_BROADCAST_RATE):
+        self.keyframe_every = max(1, int(broadcast_rate * self.KEYFRAME_INTERVAL))
+        # Tells this stream's snapshots apart from an earlier stream of the
+        # same room when frames are cached by sequence number.
+        self.id = secrets.token_hex(4)
+        self.seq = 0
+        self.previous = None
+        self.keyframe_due = True
+
+    def event(self, state, tick=None):
+        # `tick` is the room's simulation tick the state belongs to.
+        self.seq += 1
+        current = freeze(state)
+        keyframe = self.keyframe_due or self.previous is None or self.seq % self.keyframe_every == 0
+        if keyframe:
+            event = {'stream': self.id, 'seq': self.seq, 'tick': tick, 'state': current}
+        else:
+            event = {'stream': self.id, 'seq': self.seq, 'tick': tick, 'delta': diff(self.previous, current)}
+        self.previous = current
+        self.keyframe_due = False
+        return event
+
+
+class SnapshotFrames:
+    # Encoded snapshot messages shared by every socket of this worker. All
+    # legacy clients of a room get the same game_state message, and delta
+    # clients acking the same base get the same delta, so each distinct
+    # message is encoded once per protocol and the other sockets send the
+    # cached bytes as they are.
+    KEEP = 4
+    MAX_STREAMS = 1024
+    _streams = OrderedDict()
+    encoded_total = 0
+    reused_total = 0
+
+    @classmethod
+    def get(cls, event, key, protocol, build):
+        stream = event.get('stream')
+        if stream is None:
+            cls.encoded_total += 1
+            return protocol.encode(build())
+
+        seq = event['seq']
+        entry = cls._streams.get(stream)
+        if entry is None:
+            entry = cls._streams[stream] = {'seq': seq, 'frames': {}}
+            if len(cls._streams) > cls.MAX_STREAMS:
+                cls._streams.popitem(last=False)
+        elif seq > entry['seq']:
+            entry['seq'] = seq
+            entry['frames'] = {
+                k: frame for k, frame in entry['frames'].items()
+                if k[0] > seq - cls.KEEP
+            }
+            cls._streams.move_to_end(stream)
+
+        frame_key = (seq, key, protocol.name)
+        frame = entry['frames'].get(frame_key)
+        if frame is None:
+            frame = entry['frames'][frame_key] = protocol.encode(build())
+            cls.encoded_total += 1
+        else:
+            cls.reused_total += 1
+        return frame
+
+    @classmethod
+    def discard(cls, stream):
+        cls._streams.pop(stream, None)
+
+    @classmethod
+    def stats(cls):
+        return {
+            'streams': len(cls._streams),
+            'encoded': cls.encoded_total,
+            'reused': cls.reused_total,
+        }
+
+
+class SnapshotView:
+    # Connection side. Rebuilds the room state from the stream's group events
+    # and decides what this socket gets: the full game_state message as
+    # before, or, for clients that sent 'deltas': true in their init
+    # message, a game_state_delta against the last snapshot they
+    # acknowledged with {'type': 'snapshot_ack', 'seq': n}. Every snapshot
+    # carries its seq so any client can ack it (see Outbox). Clients that
+    # send 'quantize': scale in init get the positions and velocities listed
+    # in `quantized` as integers in 1/scale units. `project(state, viewer)`,
+    # if given, trims the room state to what this player is shown; the
+    # viewer is the player named by init, None before it.
+    HISTORY = 32
+    MAX_SCALE = 1000
+
+    def __init__(self, quantized=(), project=None):
+        self.quantized = frozenset(quantized)
+        self.project = project
+        self.viewer = None
+        self.scale = None
+        self.deltas = False
+        self.state = None
+        self.current = None
+        self.tick = None
+        self.seq = None
+        self.acked = None
+        self.history = {}
+        self.full_sent = 0
+        self.deltas_sent = 0
+
+    def handle(self, data):
+        # Returns True for messages that only concern this view.
+        if data.get('type') == 'snapshot_ack':
+            seq = data.get('seq')
+            if seq in self.history:
+                self.acked = seq
+                for old in [s for s in self.history if s < seq]:
+                    del self.history[old]
+            return True
+        if data.get('type') == 'init':
+            self.viewer = 'player1' if data.get('isPlayer1') else 'player2'
+            if data.get('deltas'):
+                self.deltas = True
+            scale = data.get('quantize')
+            if isinstance(scale, int) and not isinstance(scale, bool) and 1 <= scale <= self.MAX_SCALE:
+                self.scale = scale
+        return False
+
+    def update(self, event):
+        # The rebuilt state, or None while waiting for a keyframe after a
+        # missed event.
+        self.tick = event.get('tick')
+        if 'seq' not in event:
+            self.state, self.seq = event['state'], None
+            return self.state
+
+        if 'state' in event:
+            self.state = event['state']
+        elif self.state is not None and self.seq == event['seq'] - 1:
+            self.state = patch(self.state, event['delta'])
+        else:
+            self.state = None
+        self.seq = event['seq']
+        return self.state
+
+    def select(self, event):
+        # Which message this socket gets for `event`: 'state' (legacy),
+        # 'keyframe' or 'delta', or None when there is nothing to send yet.
+        state = self.update(event)
+        if state is None:
+            return None
+        if self.project is not None:
+            state = self.project(state, self.viewer)
+        self.current = state
+        if not self.deltas or self.seq is None:
+            self.full_sent += 1
+            return 'state'
+
+        self.history[self.seq] = state
+        if len(self.history) > self.HISTORY:
+            # The client stopped acking; start again from a full snapshot.
+            self.history = {self.seq: state}
+            self.acked = None
+
+        if self.history.get(self.acked) is None or self.acked == self.seq:
+            self.full_sent += 1
+            return 'keyframe'
+        self.deltas_sent += 1
+        return 'delta'
+
+    def build(self, kind, base=None):
+        if kind == 'delta':
+            delta = diff(self.history[base], self.current)
+            if self.scale:
+                delta['changed'] = quantize(delta['changed'], self.quantized, self.scale)
+            message = {'type': 'game_state_delta', 'seq': self.seq, 'base': base, **delta}
+        else:
+            state = self.current
+            if self.scale:
+                state = quantize(state, self.quantized, self.scale)
+            message = {'type': 'game_state', 'state': state}
+            if self.seq is not None:
+                message['seq'] = self.seq
+        if self.tick is not None:
+            message['tick'] = self.tick
+        return message
+
+    def message(self, event):
+        kind = self.select(event)
+        return self.build(kind, self.acked) if kind is not None else None
+
+    def frame(self, event, protocol):
+        # send() arguments for `event`, encoded at most once per worker.
+        kind = self.select(event)
+        if kind is None:
+            return None
+        base = self.acked if kind == 'delta' else None
+        viewer = self.viewer if self.project is not None else None
+        return SnapshotFrames.get(event, (kind, base, self.scale, viewer), protocol, lambda: self.build(kind, base))
@@ -0,0 +1,55 @@
+import time
+
+
+class FixedTimestep:
+    # Fixed-step accumulator: the simulation always advances in steps of
+    # 1/physics_rate no matter how late the event loop wakes us up, and
+    # snapshots are paced independently at broadcast_rate.
+    def __init__(self, physics_rate, broadcast_rate, max_catchup=0.25):
+        self.step_dt = 1 / physics_rate
+        self.broadcast_dt = 1 / broadcast_rate
+        self.max_steps = max(1, int(max_catchup / self.step_dt))
+        self.accumulator = 0.0
+        self.broadcast_accumulator = 0.0
+        self.last_time = None
+        self.steps = 0
+        self.dropped_steps = 0
+
+    def reset(self, now=None):
+        self.last_time = time.monotonic() if now is None else now
+        self.accumulator = 0.0
+        self.broadcast_accumulator = self.broadcast_dt
+
+    def pause(self):
+        self.last_time = None
+
+    def advance(self, now):
+        if self.last_time is None:
+            self.reset(now)
+
+        elapsed = max(0.0, now - self.last_time)
+        self.last_time = now
+        self.accumulator += elapsed
+        self.broadcast_accumulator += elapsed
+
+        steps = int(self.accumulator / self.step_dt)
+        if steps > self.max_steps:
+            # Too far behind to catch up; drop the backlog instead of
+            # spiralling into ever longer frames.
+            self.dropped_steps += steps - self.max_steps
+            self.accumulator -= (steps - self.max_steps) * self.step_dt
+            steps = self.max_steps
+        self.accumulator -= steps * self.step_dt
+        self.steps += steps
+
+        broadcast_due = False
+        if steps and self.broadcast_accumulator >= self.broadcast_dt:
+            self.broadcast_accumulator %= self.broadcast_dt
+            broadcast_due = True
+
+        return steps, broadcast_due
+
+    def time_until_next_step(self):
+        if self.last_time is None:
+            return self.step_dt
+        return max(0.0, self.step_dt - self.accumulator)
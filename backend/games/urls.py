@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import GetUserMatch, MatchStatsViewSet, GetUserDash
+from .views import GetUserMatch, MatchStatsViewSet, GetUserDash, GameLoopMetrics
 
 urlpatterns = [
     path('usermatches/<int:userid>', GetUserMatch.as_view(), name='get_user_match'),
     path('userdash/<int:userid>', GetUserDash.as_view(), name='get_user_match'),
     path('stats', MatchStatsViewSet.as_view(), name='match-stats'),
+    path('loop-metrics', GameLoopMetrics.as_view(), name='game-loop-metrics'),
 ]
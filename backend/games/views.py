@@ -1,7 +1,17 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from .checkpoint import RoomCheckpoints
+from .delivery import RoomDelivery
+from .matchqueue import MatchQueue
 from .models import Match
+from .outbox import Outbox
+from .quality import LinkQuality
+from .pool import PhysicsPool
+from .room_directory import RoomDirectory
+from .scheduler import RoomScheduler
+from .snapshots import SnapshotFrames
 from django.contrib.auth import get_user_model
 from django.db.models import Count, Avg, F, Q, Max, Min, StdDev
 from django.db.models.functions import TruncDate, ExtractHour, Abs
@@ -223,3 +233,35 @@ class MatchStatsViewSet(APIView):
                                   'player2__username', 'score_player1',
                                   'score_player2', 'winner__username')[:10])
         })
+
+class GameLoopMetrics(APIView):
+    # Live tick timings of this worker process's game loop. Other ASGI
+    # workers have their own scheduler, so each one reports only itself.
+    # Staff only: it lists every room and socket. POST resets the counters.
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        room = request.query_params.get('room')
+        if room is not None:
+            metrics = RoomScheduler.metrics(room)
+            if metrics is None:
+                return Response({'error': 'Room not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(metrics, status=status.HTTP_200_OK)
+
+        return Response({
+            'scheduler': RoomScheduler.stats(),
+            'directory': RoomDirectory.stats(),
+            'delivery': RoomDelivery.stats(),
+            'outbox': Outbox.stats(),
+            'links': LinkQuality.stats(),
+            'matchmaking': MatchQueue.stats(),
+            'checkpoints': RoomCheckpoints.stats(),
+            'physics_pool': PhysicsPool.stats(),
+            'snapshot_frames': SnapshotFrames.stats(),
+            **RoomScheduler.metrics(),
+        }, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        RoomScheduler.reset_metrics()
+        LinkQuality.reset_metrics()
+        return Response(status=status.HTTP_204_NO_CONTENT)
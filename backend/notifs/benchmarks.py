@@ -0,0 +1,64 @@
+import asyncio
+import time
+from django.conf import settings
+from django.utils.module_loading import import_string
+from channels_redis.core import RedisChannelLayer
+from .fanout import group_send_many
+
+FRIEND_COUNTS = (10, 100, 500, 2000)
+
+
+def make_layer():
+    # A new layer like the configured one. On Redis it gets its own prefix
+    # so flush() only removes what the benchmark created.
+    config = settings.CHANNEL_LAYERS['default']
+    backend = import_string(config['BACKEND'])
+    options = dict(config.get('CONFIG', {}))
+    if issubclass(backend, RedisChannelLayer):
+        options['prefix'] = 'bench'
+    return backend(**options)
+
+
+async def add_friends(layer, friends):
+    groups = [f'notifs_user_bench{i}' for i in range(friends)]
+    for group in groups:
+        await layer.group_add(group, await layer.new_channel())
+    return groups
+
+
+async def time_fanout(layer, friends, iterations, send):
+    # Fresh groups for every run, so no channel fills up to its capacity.
+    groups = await add_friends(layer, friends)
+    message = {'type': 'friend_status_change', 'username': 'bench', 'is_online': True}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await send(layer, groups, message)
+    elapsed = (time.perf_counter() - started) / iterations
+    await layer.flush()
+    return elapsed
+
+
+async def send_one_by_one(layer, groups, message):
+    for group in groups:
+        await layer.group_send(group, message)
+
+
+async def measure(iterations):
+    layer = make_layer()
+    results = []
+    for friends in FRIEND_COUNTS:
+        sequential = await time_fanout(layer, friends, iterations, send_one_by_one)
+        bulk = await time_fanout(layer, friends, iterations, group_send_many)
+        results.append({
+            'friends': friends,
+            'sequential_ms': sequential * 1e3,
+            'bulk_ms': bulk * 1e3,
+            'speedup': sequential / bulk,
+        })
+    return results
+
+
+def run(iterations=20):
+    # One status change notification to every friend, as on connect and
+    # disconnect, against the configured channel layer.
+    return asyncio.run(measure(iterations))
@@ -5,6 +5,7 @@ from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from api.models import UserRelationship, RelationshipType
 from django.db.models import Q
+from .fanout import group_send_many
 User = get_user_model()
 import json
 import threading
@@ -242,28 +243,26 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
     async def notify_friends_of_my_status_change(self, user, is_online):
         friends = await self.get_user_friends(user)
 
-        for friend in friends:
-            friend_group_name = f"notifs_user_{friend.username}"
-            await self.channel_layer.group_send(
-                friend_group_name,
-                {
-                    'type': 'friend_status_change',
-                    'username': user.username,
-                    'is_online': is_online,
-                }
-            )
+        await group_send_many(
+            self.channel_layer,
+            [f"notifs_user_{friend.username}" for friend in friends],
+            {
+                'type': 'friend_status_change',
+                'username': user.username,
+                'is_online': is_online,
+            }
+        )
 
     async def notify_friends_of_my_data_change(self, justAvatar=False):
         friends = await self.get_user_friends(self.user)
-        for friend in friends:
-            friend_group_name = f"notifs_user_{friend.username}"
-            await self.channel_layer.group_send(
-                friend_group_name,
-                {
-                    'type': 'friend_data_updated',
-                    'username': self.user.username,
-                    'justAvatar': True
-                }
+        await group_send_many(
+            self.channel_layer,
+            [f"notifs_user_{friend.username}" for friend in friends],
+            {
+                'type': 'friend_data_updated',
+                'username': self.user.username,
+                'justAvatar': True
+            }
         )
     @database_sync_to_async
     def get_user_friends(self, user):
@@ -0,0 +1,30 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifs import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark friend notification fan-out on the configured channel layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--json', action='store_true',
+                            help='Print machine-readable results instead of a table')
+
+    def handle(self, *args, **options):
+        results = benchmarks.run(options['iterations'])
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'layer': settings.CHANNEL_LAYERS['default']['BACKEND'],
+                'iterations': options['iterations'],
+                'results': results,
+            }, indent=2))
+            return
+
+        self.stdout.write(f"Friend status fan-out ({settings.CHANNEL_LAYERS['default']['BACKEND']})")
+        self.stdout.write(f"{'friends':>8} {'one by one ms':>14} {'bulk ms':>10} {'speedup':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['friends']:>8} {row['sequential_ms']:>14.2f} {row['bulk_ms']:>10.2f} {row['speedup']:>7.1f}x"
+            )
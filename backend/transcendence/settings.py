@@ -215,6 +215,29 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Game loops: the physics rate sets the fixed simulation step, the broadcast
+# rate only controls how often snapshots go out (both in Hz).
+GAME_PHYSICS_RATE = int(os.getenv('GAME_PHYSICS_RATE', 60))
+GAME_BROADCAST_RATE = int(os.getenv('GAME_BROADCAST_RATE', 60))
+# 'scalar' steps each classic pong room on its own, 'batch' keeps every room
+# of the process in one NumPy array and steps them all at once. Batch has a
+# fixed cost per step: it is slower below ~200 rooms per worker (about 8x at
+# 10) and only pays off with several hundred (see bench_games).
+GAME_CLASSIC_PONG_ENGINE = os.getenv('GAME_CLASSIC_PONG_ENGINE', 'scalar')
+# 'client' relays the 3D pong ball simulated by player 1's browser, 'server'
+# simulates it on the server so clients only send paddle input.
+GAME_PONG3D_PHYSICS = os.getenv('GAME_PONG3D_PHYSICS', 'client')
+# Number of worker processes that step Space Rivalry rooms off the event
+# loop. 0 steps them in the ASGI process.
+GAME_PHYSICS_WORKERS = int(os.getenv('GAME_PHYSICS_WORKERS', 0))
+# 'local' runs every room in the worker its players connect to (one daphne
+# process). 'cache' claims an owner worker per room in the cache (Redis) so
+# several workers can serve the same game.
+GAME_ROOM_DIRECTORY = os.getenv('GAME_ROOM_DIRECTORY', 'local')
+# Seconds between room state checkpoints in the cache, used to resume games
+# after a worker restart. 0 turns checkpointing off.
+GAME_CHECKPOINT_INTERVAL = float(os.getenv('GAME_CHECKPOINT_INTERVAL', 2))
+
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
@@ -75,6 +75,9 @@ const ClassicPong = () => {
       const data = JSON.parse(event.data);
       switch(data.type) {
         case 'game_state':
+          if (data.seq !== undefined) {
+            ws.send(JSON.stringify({ type: 'snapshot_ack', seq: data.seq }));
+          }
           setGameState(data.state);
           break;
         case 'game_ended':
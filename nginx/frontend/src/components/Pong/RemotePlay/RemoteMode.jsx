@@ -84,6 +84,7 @@ const RemoteMode = () => {
         let isGameOver = false;
         let inGame = false;
         let lastHitAI = true;
+        let serverPhysics = false;
         let mouseCurrent = { x: 0, y: 0 };
         const ballSound = new Audio('/sounds/ping_pong.mp3');
 
@@ -157,6 +158,9 @@ const RemoteMode = () => {
                         break;
 
                     case 'game_state':
+                        if (data.seq !== undefined) {
+                            ws.send(JSON.stringify({ type: 'snapshot_ack', seq: data.seq }));
+                        }
                         handleGameState(data.state);
                         setConnectionState(prev => ({
                             ...prev,
@@ -244,15 +248,20 @@ const RemoteMode = () => {
 
 
         const handleGameState = (state) => {
+            // With server physics both players draw the server's ball and
+            // only send their paddle; otherwise player 1 runs the ball.
+            serverPhysics = state.physics === 'server';
             updatePaddlePositions(state);
             if (state.player1 !== username) {
                 setScores({ player1: state.scores.player2, player2: state.scores.player1 });
                 setMatches({ player1: state.rounds_won.player2, player2: state.rounds_won.player1 });
-                updateBallPosition(state);
             } else {
                 setScores({ player1: state.scores.player1, player2: state.scores.player2 });
                 setMatches({ player1: state.rounds_won.player1, player2: state.rounds_won.player2 });
             }
+            if (state.player1 !== username || serverPhysics) {
+                updateBallPosition(state);
+            }
         };
         const updatePaddlePositions = (state) => {
             const paddleOpponent = paddleOpponentRef.current;
@@ -747,7 +756,7 @@ const RemoteMode = () => {
                             6.8 + (1 * mouseCurrent.y),
                             12.8
                         );
-                        if (websocketRef.current && websocketRef.current.readyState === WebSocket.OPEN)
+                        if (!serverPhysics && websocketRef.current && websocketRef.current.readyState === WebSocket.OPEN)
                             websocketRef.current.send(JSON.stringify({ type: 'ball_position', ball_position: { x: ball.position.x, y: ball.position.y, z: ball.position.z } }));
                     } else {
                         camera.position.set(
@@ -799,7 +808,7 @@ const RemoteMode = () => {
                         });
                     }
                 }
-                if (isPlayer1) {
+                if (isPlayer1 && !serverPhysics) {
                     simulatePhysics(deltaTime);
                     checkCollisions();
                     gameLogic();
@@ -134,6 +134,9 @@ const RemoteRivalry = () => {
 
       switch(data.type) {
         case 'game_state':
+          if (data.seq !== undefined) {
+            ws.send(JSON.stringify({ type: 'snapshot_ack', seq: data.seq }));
+          }
           setGameState(data.state);
           break;
 
@@ -1,6 +1,7 @@
 import asyncio
 import websockets
 import json
+import msgpack
 import sys
 import requests
 import getpass
@@ -16,10 +17,36 @@ PADDLE_WIDTH = 15
 PADDLE_HEIGHT = 80
 BALL_SIZE = 10
 
+# Binary game socket protocol, see backend/games/protocol.py. The position of
+# a message type in MESSAGE_TYPES is its tag on the wire.
+MSGPACK_SUBPROTOCOL = 'transcendence.msgpack.v1'
+MESSAGE_TYPES = (
+    'init', 'player_input', 'mouse_move', 'ball_position', 'score_update',
+    'game_won', 'match_complete', 'client_disconnect', 'ping', 'pong',
+    'snapshot_ack', 'game_state', 'game_state_delta', 'game_ended',
+    'game_ended_by_forfeit', 'player_disconnected', 'player_reconnected',
+    'connection_warning', 'error', 'snapshot_rate',
+)
+MESSAGE_TAGS = {name: tag for tag, name in enumerate(MESSAGE_TYPES)}
+
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
+def encode_message(message, binary):
+    if not binary:
+        return json.dumps(message)
+    body = dict(message)
+    message_type = body.pop('type')
+    return msgpack.packb([MESSAGE_TAGS.get(message_type, message_type), body])
+
+def decode_message(frame):
+    if isinstance(frame, str):
+        return json.loads(frame)
+    tag, body = msgpack.unpackb(frame)
+    body['type'] = MESSAGE_TYPES[tag] if isinstance(tag, int) else tag
+    return body
+
 @dataclass
 class GameSession:
     game_id: str
@@ -68,29 +95,30 @@ class KeyboardHandler:
 
             await asyncio.sleep(0.001)
 
-    async def send_input(self, websocket):
+    async def send_input(self, websocket, binary=False):
         while True:
             current_time = asyncio.get_event_loop().time()
 
             if current_time - self.last_sent >= self.input_rate:
                 if self.keys['up'].pressed:
-                    await websocket.send(json.dumps({
+                    await websocket.send(encode_message({
                         "type": "player_input",
                         "input": "up"
-                    }))
+                    }, binary))
                 elif self.keys['down'].pressed:
-                    await websocket.send(json.dumps({
+                    await websocket.send(encode_message({
                         "type": "player_input",
                         "input": "down"
-                    }))
+                    }, binary))
                 self.last_sent = current_time
 
             await asyncio.sleep(self.input_rate)
 
 class PongCLI:
-    def __init__(self, api_url: str, ws_url: str):
+    def __init__(self, api_url: str, ws_url: str, binary: bool = False):
         self.api_url = api_url
         self.ws_url = ws_url
+        self.binary = binary
         self.access_token = None
         self.game_session: Optional[GameSession] = None
         self.matchmaking_ws = None
@@ -260,26 +288,29 @@ class PongCLI:
 
         try:
             ws_url = f"{self.ws_url}/ws/classic-pong/{self.game_session.game_id}/?token={self.access_token}"
-            async with websockets.connect(ws_url, ssl=ssl_context) as websocket:
+            subprotocols = [MSGPACK_SUBPROTOCOL] if self.binary else None
+            async with websockets.connect(ws_url, ssl=ssl_context, subprotocols=subprotocols) as websocket:
                 self.game_ws = websocket
+                # The server answers in JSON when it did not accept the subprotocol
+                binary = websocket.subprotocol == MSGPACK_SUBPROTOCOL
 
-                await websocket.send(json.dumps({
+                await websocket.send(encode_message({
                     "type": "init",
                     "username": self.game_session.username,
                     "opponent": self.game_session.opponent,
                     "isPlayer1": self.game_session.is_player1
-                }))
+                }, binary))
 
                 keyboard_task = asyncio.create_task(
                     self.keyboard_handler.handle_input(self.stdscr)
                 )
                 input_task = asyncio.create_task(
-                    self.keyboard_handler.send_input(websocket)
+                    self.keyboard_handler.send_input(websocket, binary)
                 )
 
                 try:
                     while True:
-                        response = json.loads(await websocket.recv())
+                        response = decode_message(await websocket.recv())
 
                         if response["type"] == "game_state":
                             await self.render_game_state(response["state"])
@@ -352,9 +383,13 @@ if __name__ == "__main__":
     api_url = "https://localhost"
     ws_url = "wss://localhost"
 
-    if len(sys.argv) > 1:
-        api_url = sys.argv[1]
-        ws_url = sys.argv[1].replace('https', 'wss')
+    args = sys.argv[1:]
+    binary = '--msgpack' in args
+    args = [arg for arg in args if arg != '--msgpack']
+
+    if args:
+        api_url = args[0]
+        ws_url = args[0].replace('https', 'wss')
 
-    client = PongCLI(api_url, ws_url)
+    client = PongCLI(api_url, ws_url, binary)
     asyncio.run(client.run())